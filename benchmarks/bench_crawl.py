@@ -0,0 +1,151 @@
+"""
+End to end crawl throughput against the local fake cache server: pages per
+second, CPU time and peak memory of full crawls of the same synthetic site
+graph, for every engine and thread count (concurrency for asyncio).
+
+Every crawl runs in a fresh interpreter in its own temporary directory, so
+the scraper's global state, save file, logs and reports start empty. CPU
+time includes the parser processes.
+
+Run from the repository root:
+    python -m benchmarks.bench_crawl [--pages N] [--latency SECONDS]
+        [--threads 1 4 16] [--engines threads asyncio] [--recrawl AGE]
+        [--robots]
+
+With --recrawl, every crawl keeps a page cache and is followed by a
+--restart crawl in the same directory, served from the cache for pages
+younger than AGE seconds and revalidated otherwise. With --robots, the
+crawls follow robots.txt and are seeded from sitemaps.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from configparser import ConfigParser
+
+from benchmarks.cache_server import SiteGraph, FakeCacheServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def crawl(engine, threads, cache_server, seed_urls, parsers, cache_age, robots):
+    """ Runs one crawl in this process and prints its measurements as JSON. """
+    import resource
+    import scraper
+    from crawler import Crawler
+    from crawler.async_crawler import AsyncCrawler
+    from utils import configure_logging, stop_logging
+    from utils.config import Config
+
+    cparser = ConfigParser()
+    cparser.read_dict({
+        "IDENTIFICATION": {"USERAGENT": "IR UF24 benchmark"},
+        "CONNECTION": {"HOST": "localhost", "PORT": "9000"},
+        "CRAWLER": {
+            "SEEDURL": ",".join(seed_urls), "POLITENESS": "0",
+            "ROBOTS": str(robots)},
+        "LOCAL PROPERTIES": {
+            "SAVE": "frontier.db", "THREADCOUNT": str(threads),
+            "ENGINE": engine, "CONCURRENCY": str(threads),
+            "PARSERS": str(parsers),
+            # A negative age turns the page cache off
+            "PAGECACHE": "pages.db" if cache_age >= 0 else "",
+            "PAGECACHEAGE": str(cache_age)},
+        "LOGGING": {"CONSOLE": "WARNING"},
+    })
+    config = Config(cparser)
+    configure_logging(
+        config.log_levels, config.log_level, config.console_log_level)
+    config.cache_server = cache_server
+
+    start = time.perf_counter()
+    if engine == "asyncio":
+        AsyncCrawler(config, True).start()
+    else:
+        Crawler(config, True).start()
+    elapsed = time.perf_counter() - start
+    scraper.reports.close()
+    stop_logging()
+
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    print(json.dumps({
+        "pages": len(scraper.seen_links),
+        "seconds": elapsed,
+        "cpu": own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime,
+        # Kilobytes on Linux
+        "rss": own.ru_maxrss / 1024,
+        "parser_rss": children.ru_maxrss / 1024}))
+
+
+def run(engine, threads, server, graph, parsers, cache_age, robots):
+    """ Returns the results of a crawl, and of the re-crawl with cache_age. """
+    results = list()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        host, port = server.address
+        for _ in range(1 if cache_age < 0 else 2):
+            before = server.requests
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_crawl", "--crawl",
+                 engine, str(threads), f"{host}:{port}",
+                 ",".join(graph.seed_urls), str(parsers), str(cache_age),
+                 str(robots)],
+                cwd=tmpdir, env=env, check=True, stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL, text=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            result["fetched"] = server.requests - before
+            results.append(result)
+    return results
+
+
+def main(pages, latency, threads_counts, engines, parsers, cache_age, robots):
+    graph = SiteGraph(page_count=pages)
+    server = FakeCacheServer(graph, latency).start()
+    print(f"{pages} pages on {len(graph.hosts)} hosts, {latency * 1000:.0f} ms "
+          f"latency, {os.cpu_count()} CPUs")
+    print(f"{'engine':>8} {'threads':>7} {'fetched':>8} {'kept':>6} "
+          f"{'seconds':>8} {'pages/s':>8} {'cpu s':>7} {'rss MB':>7} "
+          f"{'parser MB':>9}")
+    try:
+        for engine in engines:
+            for threads in threads_counts:
+                results = run(
+                    engine, threads, server, graph, parsers, cache_age, robots)
+                for result, name in zip(results, (engine, "re-crawl")):
+                    print(f"{name:>8} {threads:7d} {result['fetched']:8d} "
+                          f"{result['pages']:6d} {result['seconds']:8.2f} "
+                          f"{result['fetched'] / result['seconds']:8.1f} "
+                          f"{result['cpu']:7.2f} {result['rss']:7.1f} "
+                          f"{result['parser_rss']:9.1f}")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument(
+        "--engines", nargs="+", default=["threads", "asyncio"],
+        choices=("threads", "asyncio"))
+    parser.add_argument("--parsers", type=int, default=0)
+    parser.add_argument("--recrawl", type=float, default=-1.0)
+    parser.add_argument("--robots", action="store_true", default=False)
+    # Internal: runs one crawl, in the interpreter started by run()
+    parser.add_argument("--crawl", nargs=7, default=None)
+    args = parser.parse_args()
+    if args.crawl:
+        (engine, threads, cache_server, seed_urls, parsers, cache_age,
+         robots) = args.crawl
+        host, _, port = cache_server.rpartition(":")
+        crawl(engine, int(threads), (host, int(port)),
+              seed_urls.split(","), int(parsers), float(cache_age),
+              robots == "True")
+    else:
+        main(args.pages, args.latency, args.threads, args.engines,
+             args.parsers, args.recrawl, args.robots)
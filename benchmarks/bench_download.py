@@ -0,0 +1,47 @@
+"""
+Compares the latency of download, which keeps one pooled keep-alive
+connection to the cache server per thread, with a new connection for every
+request, against the local fake cache server.
+
+Run from the repository root:
+    python -m benchmarks.bench_download [--requests N]
+"""
+import time
+from argparse import ArgumentParser
+
+import requests
+
+from benchmarks.cache_server import SiteGraph, FakeCacheServer
+from utils.download import download
+from test_download import StandInConfig
+
+
+def main(count):
+    graph = SiteGraph(page_count=count)
+    server = FakeCacheServer(graph).start()
+    host, port = server.address
+    config = StandInConfig(server.address)
+    urls = [graph.page_url(number) for number in range(count)]
+    try:
+        start = time.perf_counter()
+        for url in urls:
+            download(url, config)
+        pooled = (time.perf_counter() - start) / count
+
+        start = time.perf_counter()
+        for url in urls:
+            requests.get(
+                f"http://{host}:{port}/",
+                params=[("q", url), ("u", config.user_agent)])
+        fresh = (time.perf_counter() - start) / count
+    finally:
+        server.stop()
+    print(f"        pooled: {pooled * 1000:6.2f} ms/request")
+    print(f"new connection: {fresh * 1000:6.2f} ms/request")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+    main(args.requests)
@@ -0,0 +1,68 @@
+"""
+Measures how many urls per second the frontier ingests through add_url,
+comparing the previous shelve save file (synced after every write) with the
+batched FrontierStore.
+
+Run from the repository root:
+    python -m benchmarks.bench_frontier_ingest [--urls N]
+"""
+import os
+import shelve
+import shutil
+import tempfile
+import time
+from argparse import ArgumentParser
+
+from crawler.frontier import Frontier
+from utils import get_urlhash, normalize
+from test_frontier import make_config
+
+
+def make_urls(count):
+    return [
+        f"https://h{i % 50}.ics.uci.edu/page/{i}"
+        for i in range(count)]
+
+
+def shelve_ingest(path, urls):
+    # The add_url body before batching.
+    save = shelve.open(path)
+    start = time.perf_counter()
+    for url in urls:
+        url = normalize(url)
+        urlhash = get_urlhash(url)
+        if urlhash not in save:
+            save[urlhash] = (url, False)
+            save.sync()
+    elapsed = time.perf_counter() - start
+    save.close()
+    return elapsed
+
+
+def frontier_ingest(path, urls):
+    frontier = Frontier(make_config(path, [urls[0]]), True)
+    start = time.perf_counter()
+    for url in urls:
+        frontier.add_url(url)
+    frontier.close()
+    return time.perf_counter() - start
+
+
+def main(count):
+    urls = make_urls(count)
+    tmpdir = tempfile.mkdtemp()
+    try:
+        old = shelve_ingest(os.path.join(tmpdir, "frontier.shelve"), urls)
+        new = frontier_ingest(os.path.join(tmpdir, "frontier.db"), urls)
+    finally:
+        shutil.rmtree(tmpdir)
+    print(f"shelve + sync: {count / old:10.0f} urls/sec")
+    print(f"  batched db:  {count / new:10.0f} urls/sec")
+    print(f"speedup: {old / new:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--urls", type=int, default=20000)
+    args = parser.parse_args()
+    main(args.urls)
@@ -0,0 +1,77 @@
+"""
+Measures the frontier's host scheduler with millions of queued urls: the
+urls per second it queues and hands out, and the memory it holds, compared
+with one heap of (priority, depth, order, url) entries over all urls,
+which keeps no per-host order or politeness.
+
+Run from the repository root:
+    python -m benchmarks.bench_frontier_order [--urls N] [--hosts N]
+"""
+import heapq
+import time
+import tracemalloc
+from argparse import ArgumentParser
+
+from crawler.frontier import HostScheduler
+from crawler.priority import ScorePolicy
+
+
+def make_urls(count, hosts):
+    return [
+        (f"https://h{i % hosts}.ics.uci.edu/page/{i}", i % 7)
+        for i in range(count)]
+
+
+def make_policy():
+    # A few urls with many in-links and a few likely traps.
+    return ScorePolicy(
+        lambda url: 1 << (len(url) % 5), lambda url: (len(url) % 3) / 2)
+
+
+def heap_order(urls, policy):
+    heap = list()
+    for order, (url, depth) in enumerate(urls):
+        heapq.heappush(heap, (policy.priority(url, depth), depth, order, url))
+    size = tracemalloc.get_traced_memory()[0]
+    while heap:
+        heapq.heappop(heap)
+    return size
+
+
+def scheduler_order(urls, policy):
+    scheduler = HostScheduler(0.0, policy)
+    for url, depth in urls:
+        scheduler.add(url, depth)
+    size = tracemalloc.get_traced_memory()[0]
+    while scheduler:
+        scheduler.pop()
+    return size
+
+
+def measure(order, urls):
+    policy = make_policy()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    size = order(urls, policy) - base
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+    return elapsed, size
+
+
+def main(count, hosts):
+    urls = make_urls(count, hosts)
+    for name, order in (("one heap", heap_order),
+                        ("host scheduler", scheduler_order)):
+        elapsed, size = measure(order, urls)
+        print(
+            f"{name:>14}: {2 * count / elapsed:10.0f} ops/sec, "
+            f"{size / count:6.1f} bytes per queued url")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--urls", type=int, default=1000000)
+    parser.add_argument("--hosts", type=int, default=200)
+    args = parser.parse_args()
+    main(args.urls, args.hosts)
@@ -0,0 +1,87 @@
+"""
+Compares link extraction on link-heavy index pages: building a
+BeautifulSoup tree to read its <a href> tags and joining every link with
+urljoin, as Page.links did, against scanning the raw bytes with a base url
+split once per page. Also times reading the links of a tree that was
+already built for the page text.
+
+Run from the repository root:
+    python -m benchmarks.bench_links [--pages N] [--links N]
+"""
+import time
+from argparse import ArgumentParser
+from urllib.parse import urldefrag, urljoin
+
+from bs4 import BeautifulSoup
+
+from utils import normalize
+from utils.links import extract_links
+from utils.page import PARSER
+
+
+def make_page(links):
+    # A directory listing: every kind of relative link, a few absolute ones.
+    rows = list()
+    for i in range(links):
+        href = (
+            f"/people/{i}.html#bio", f"entry{i}/?sort=name&amp;page=2",
+            f"https://www.cs.uci.edu/news/{i}", f"?page={i}")[i % 4]
+        rows.append(
+            f'<tr><td class="name"><a href="{href}">Entry {i}</a></td>'
+            f'<td>2024-01-{i % 28 + 1:02d}</td></tr>')
+    return (
+        "<html><head><title>Index of /archive</title></head><body>"
+        f"<table>{''.join(rows)}</table></body></html>").encode("utf-8")
+
+
+def tree_links(url, content):
+    soup = BeautifulSoup(content, PARSER)
+    return [
+        normalize(urldefrag(urljoin(url, anchor["href"]))[0])
+        for anchor in soup.find_all("a", href=True)]
+
+
+def built_tree_links(url, soup):
+    return [
+        normalize(urldefrag(urljoin(url, anchor["href"]))[0])
+        for anchor in soup.find_all("a", href=True)]
+
+
+def scanned_links(url, content):
+    return list(extract_links(content, url))
+
+
+def measure(func, pages):
+    start = time.perf_counter()
+    for url, page in pages:
+        func(url, page)
+    return time.perf_counter() - start
+
+
+def main(count, links):
+    content = make_page(links)
+    pages = [
+        (f"https://www.ics.uci.edu/archive/{i}/index.html", content)
+        for i in range(count)]
+    assert tree_links(*pages[0]) == scanned_links(*pages[0])
+    trees = [(url, BeautifulSoup(page, PARSER)) for url, page in pages]
+
+    tree = measure(tree_links, pages)
+    built = measure(built_tree_links, trees)
+    scanned = measure(scanned_links, pages)
+    total = count * links
+    print(f"{count} pages of {links} links, {PARSER} tree builder")
+    for name, elapsed in (("tree + urljoin", tree),
+                          ("built tree + urljoin", built),
+                          ("scanned", scanned)):
+        print(f"{name:>20}: {total / elapsed:10.0f} links/sec")
+    print(f"speedup: {tree / scanned:.1f}x, "
+          f"{built / scanned:.1f}x over an already built tree")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--links", type=int, default=1000)
+    args = parser.parse_args()
+    main(args.pages, args.links)
@@ -0,0 +1,52 @@
+"""
+Cost per call of the instrumentation on the crawl hot paths, with metrics
+disabled (the default) and enabled.
+
+Run from the repository root:
+    python -m benchmarks.bench_metrics [--calls N]
+"""
+import os
+import tempfile
+import time
+from argparse import ArgumentParser
+
+from utils.metrics import Metrics
+
+
+def bench(metrics, calls):
+    @metrics.timed("frontier.add_url")
+    def add_url(url):
+        return url
+
+    def download(url):
+        if metrics.enabled:
+            metrics.incr("download.fetches", host="www.ics.uci.edu")
+        with metrics.timer("download"):
+            return url
+
+    results = list()
+    for func in (lambda url: url, add_url, download):
+        start = time.perf_counter()
+        for i in range(calls):
+            func(i)
+        results.append((time.perf_counter() - start) / calls * 1e9)
+    return results
+
+
+def main(calls):
+    metrics = Metrics()
+    disabled = bench(metrics, calls)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        metrics.start(os.path.join(tmpdir, "stats.json"), interval=60)
+        enabled = bench(metrics, calls)
+        metrics.close()
+    print(f"{'':>10} {'plain':>8} {'timed':>8} {'download':>9}  ns/call")
+    for name, results in (("disabled", disabled), ("enabled", enabled)):
+        print(f"{name:>10} " + " ".join(f"{ns:8.0f}" for ns in results))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--calls", type=int, default=1000000)
+    args = parser.parse_args()
+    main(args.calls)
@@ -0,0 +1,100 @@
+"""
+Compares the single-parse Page pipeline against the previous scraper path,
+which built a new BeautifulSoup tree in every analysis helper.
+
+Run from the repository root:
+    python -m benchmarks.bench_page_analysis [--pages N] [--paragraphs N]
+"""
+import re
+import time
+from argparse import ArgumentParser
+from collections import Counter
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+from utils.page import Page, PARSER
+from utils.tokenizer import STOPWORDS
+
+# The stopwords were a list before they became a frozenset
+stopwords = list(STOPWORDS)
+
+
+def make_page(paragraphs, links):
+    body = []
+    for i in range(paragraphs):
+        body.append(
+            f"<p>Professor {i} studies distributed systems, machine learning "
+            f"and information retrieval at the Donald Bren School of "
+            f"Information and Computer Sciences. Publication number {i}.</p>")
+    anchors = "".join(
+        f'<li><a href="/people/{i}.html#bio">Person {i}</a></li>'
+        for i in range(links))
+    return (
+        "<html><head><title>Faculty</title><style>p {color: red}</style>"
+        "<script>var x = 1;</script></head><body>"
+        f"<header>ICS Header</header><nav><ul>{anchors}</ul></nav>"
+        f"<main>{''.join(body)}</main>"
+        "<aside>Related</aside><footer>Footer text</footer>"
+        "</body></html>").encode("utf-8")
+
+
+def old_path(url, content):
+    # has_high_textual_content
+    soup = BeautifulSoup(content, "html.parser")
+    text = soup.get_text(separator=" ", strip=True)
+    len(re.findall(r"\b\w+\b", text.lower()))
+    # scraper body
+    soup = BeautifulSoup(content, "html.parser")
+    text = soup.get_text(separator=" ", strip=True)
+    len(re.findall(r"\b\w+\b", text.lower()))
+    # update_longest_page
+    soup = BeautifulSoup(content, "html.parser")
+    for tag in soup(["script", "style", "nav", "footer", "header", "aside"]):
+        tag.decompose()
+    text = soup.get_text(separator=" ", strip=True)
+    len(re.findall(r"\b[a-zA-Z]{3,}\b", text.lower()))
+    # count_words_in_content
+    soup = BeautifulSoup(content, "html.parser")
+    words = re.findall(r"\b\w+\b", soup.get_text().lower())
+    Counter(w for w in words if w not in stopwords and len(w) > 2)
+    # extract_next_links
+    soup = BeautifulSoup(content, "html.parser")
+    return [
+        urlparse(urljoin(url, a["href"]))._replace(fragment="").geturl()
+        for a in soup.find_all("a", href=True)]
+
+
+def new_path(url, content):
+    page = Page(url, content)
+    page.stats.word_count
+    page.stats.content_word_count
+    page.stats.word_counts()
+    return page.links
+
+
+def bench(name, func, url, content, pages):
+    start = time.perf_counter()
+    for _ in range(pages):
+        func(url, content)
+    elapsed = time.perf_counter() - start
+    print(f"{name:>10}: {elapsed:.3f}s total, "
+          f"{elapsed / pages * 1000:.2f} ms/page")
+    return elapsed
+
+
+def main(pages, paragraphs):
+    url = "https://www.ics.uci.edu/faculty/index.html"
+    content = make_page(paragraphs, paragraphs // 2)
+    print(f"Page size {len(content)} bytes, parser for Page: {PARSER}")
+    old = bench("old", old_path, url, content, pages)
+    new = bench("page", new_path, url, content, pages)
+    print(f"speedup: {old / new:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--paragraphs", type=int, default=500)
+    args = parser.parse_args()
+    main(args.pages, args.paragraphs)
@@ -0,0 +1,56 @@
+"""
+Pages analyzed per second by worker threads parsing inline (bound by the GIL)
+against the same threads handing pages to the shared parser process pool.
+
+Run from the repository root:
+    python -m benchmarks.bench_parse_pool [--pages N] [--threads 1 2 4 8]
+"""
+import os
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+
+from crawler.parser_pool import parse, shutdown_parser_pool
+from utils.page import analyze_page
+from benchmarks.bench_page_analysis import make_page
+
+
+class PoolConfig(object):
+    parser_processes = 0
+
+
+def analyze_inline(url, content):
+    return analyze_page(url, 200, content, url)
+
+
+def analyze_in_pool(url, content):
+    return parse(PoolConfig, analyze_page, url, 200, content, url)
+
+
+def run(analyze, threads, pages, content):
+    urls = [f"https://www.ics.uci.edu/faculty/{i}" for i in range(pages)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda url: analyze(url, content), urls))
+    return pages / (time.perf_counter() - start)
+
+
+def main(pages, threads_counts):
+    content = make_page(40, 40)
+    # Start the processes before timing.
+    run(analyze_in_pool, os.cpu_count(), os.cpu_count() * 2, content)
+    print(f"{os.cpu_count()} CPUs, {len(content)} byte pages")
+    for threads in threads_counts:
+        inline = run(analyze_inline, threads, pages, content)
+        pooled = run(analyze_in_pool, threads, pages, content)
+        print(f"threads={threads:>3}: inline {inline:7.1f} pages/s, "
+              f"process pool {pooled:7.1f} pages/s")
+    shutdown_parser_pool()
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    main(args.pages, args.threads)
@@ -0,0 +1,79 @@
+"""
+Latency and peak memory per response of decoding cache server answers: the
+previous eager path (cbor.loads, then pickle.loads of the whole response)
+against the lazy Response, both when only the status is looked at (pages
+that are skipped) and when the content is read.
+
+Run from the repository root:
+    python -m benchmarks.bench_response [--sizes 10000 100000 1000000]
+"""
+import pickle
+import time
+import tracemalloc
+from argparse import ArgumentParser
+
+import cbor
+import requests
+
+from utils.response import Response, decode_cache_response
+
+
+def make_body(size):
+    raw = requests.models.Response()
+    raw.status_code = 200
+    raw.url = "https://www.ics.uci.edu/page"
+    raw.headers["Content-Type"] = "text/html"
+    raw._content = b"<p>word</p>" * (size // 11)
+    return cbor.dumps({
+        "url": raw.url, "status": 200, "response": pickle.dumps(raw)})
+
+
+def old_status(body):
+    resp_dict = cbor.loads(body)
+    pickle.loads(resp_dict["response"])
+    return resp_dict["status"]
+
+
+def old_content(body):
+    resp_dict = cbor.loads(body)
+    return pickle.loads(resp_dict["response"]).content
+
+
+def new_status(body):
+    return Response(decode_cache_response(body)).status
+
+
+def new_content(body):
+    return Response(decode_cache_response(body)).raw_response.content
+
+
+def measure(func, body, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func(body)
+    elapsed = (time.perf_counter() - start) / rounds
+    tracemalloc.start()
+    func(body)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed * 1e6, peak / 1024
+
+
+def main(sizes, rounds):
+    print(f"{'body KB':>8} {'path':>14} {'us':>9} {'peak KB':>9}")
+    for size in sizes:
+        body = make_body(size)
+        for name, func in (
+                ("old status", old_status), ("lazy status", new_status),
+                ("old content", old_content), ("lazy content", new_content)):
+            micros, peak = measure(func, body, rounds)
+            print(f"{len(body) / 1024:8.0f} {name:>14} {micros:9.1f} {peak:9.1f}")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    main(args.sizes, args.rounds)
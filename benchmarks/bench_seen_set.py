@@ -0,0 +1,75 @@
+"""
+Memory and lookup cost of SeenSet against the previous dedup structures: a
+set of full url strings plus a set of 64 character sha256 hex digests.
+
+Run from the repository root:
+    python -m benchmarks.bench_seen_set [--sizes 1000000 10000000]
+"""
+import gc
+import time
+import tracemalloc
+from argparse import ArgumentParser
+
+from utils import get_urlhash
+from utils.seen import SeenSet
+
+
+def make_url(i):
+    return f"https://h{i % 997}.ics.uci.edu/people/{i}/index.html"
+
+
+def measure(name, build, lookup, size):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    seen = build(size)
+    build_time = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    probes = min(size, 200000)
+    start = time.perf_counter()
+    for i in range(probes):
+        lookup(seen, make_url(i))
+        lookup(seen, make_url(size + i))
+    lookup_time = (time.perf_counter() - start) / (2 * probes)
+    print(f"{name:>14} n={size:>9}: {memory / size:7.1f} bytes/url, "
+          f"build {build_time:6.1f}s, lookup {lookup_time * 1e6:5.2f} us")
+
+
+def build_sets(size):
+    urls, hashes = set(), set()
+    for i in range(size):
+        url = make_url(i)
+        urls.add(url)
+        hashes.add(get_urlhash(url))
+    return urls, hashes
+
+
+def lookup_sets(seen, url):
+    urls, hashes = seen
+    return url in urls or get_urlhash(url) in hashes
+
+
+def build_seen_set(size, bloom=False):
+    seen = SeenSet(size, bloom=bloom)
+    for i in range(size):
+        seen.add(make_url(i))
+    return seen
+
+
+def main(sizes):
+    for size in sizes:
+        measure("str+hex sets", build_sets, lookup_sets, size)
+        measure("SeenSet", build_seen_set, SeenSet.contains, size)
+        measure(
+            "SeenSet+bloom", lambda n: build_seen_set(n, bloom=True),
+            SeenSet.contains, size)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000000, 10000000])
+    args = parser.parse_args()
+    main(args.sizes)
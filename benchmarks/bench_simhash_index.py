@@ -0,0 +1,86 @@
+"""
+Near-duplicate query time and memory of SimhashIndex as the number of
+stored fingerprints grows, against the previous linear scan over every
+stored fingerprint (which is only run for the smaller sizes) and the set of
+fingerprints it kept.
+
+Run from the repository root:
+    python -m benchmarks.bench_simhash_index [--sizes 1000 ... 1000000]
+        [--blocks N]
+"""
+import random
+import sys
+import time
+from argparse import ArgumentParser
+
+from simhash import Simhash
+
+from utils.simhash_index import SimhashIndex
+
+QUERIES = 1000
+LINEAR_LIMIT = 10000
+
+
+def flip_bits(value, count, rng):
+    for bit in rng.sample(range(64), count):
+        value ^= 1 << bit
+    return value
+
+
+def linear_scan(stored, value):
+    current = Simhash(value)
+    for existing in stored:
+        if current.distance(Simhash(existing)) < 5:
+            return True
+    return False
+
+
+def index_bytes(index):
+    # The fingerprint array and the tables hold everything the index stores.
+    return sys.getsizeof(index.values) + sum(
+        sys.getsizeof(table) for table in index.tables)
+
+
+def set_bytes(values):
+    return sys.getsizeof(values) + sum(sys.getsizeof(value) for value in values)
+
+
+def main(sizes, blocks):
+    rng = random.Random(0)
+    for size in sizes:
+        stored = [rng.getrandbits(64) for _ in range(size)]
+        index = SimhashIndex(max_distance=4, blocks=blocks)
+        for value in stored:
+            index.add(value)
+        # Half the queries are near-duplicates of a stored fingerprint.
+        queries = [
+            flip_bits(rng.choice(stored), rng.randint(0, 4), rng)
+            if i % 2 else rng.getrandbits(64)
+            for i in range(QUERIES)]
+
+        start = time.perf_counter()
+        hits = sum(1 for value in queries if value in index)
+        indexed = (time.perf_counter() - start) / QUERIES
+        line = (f"n={size:>8}: {len(index.tables)} tables "
+                f"{indexed * 1e6:7.1f} us/query "
+                f"({hits} near-duplicates), "
+                f"{index_bytes(index) / size:6.1f} bytes/fingerprint "
+                f"(set {set_bytes(set(stored)) / size:5.1f})")
+
+        if size <= LINEAR_LIMIT:
+            sample = queries[:50]
+            start = time.perf_counter()
+            for value in sample:
+                linear_scan(stored, value)
+            linear = (time.perf_counter() - start) / len(sample)
+            line += f", linear scan {linear * 1e6:9.1f} us/query"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--blocks", type=int, default=None)
+    args = parser.parse_args()
+    main(args.sizes, args.blocks)
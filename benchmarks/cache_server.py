@@ -0,0 +1,264 @@
+"""
+A local stand-in for the course cache server, serving a synthetic site graph
+over the same protocol: GET /?q=<url>&u=<user agent> answers with a cbor map
+holding the status and a pickled requests Response.
+
+The graph is generated from a seed, so every run crawls the same pages. It
+has ordinary pages on several hosts, calendar traps that link to the next and
+previous day forever, printer-friendly near-duplicates of some pages, and
+pages that answer 404. Every host has a robots.txt that disallows its
+calendar, and a sitemap of its pages.
+
+Run from the repository root:
+    python -m benchmarks.cache_server [--pages N] [--latency SECONDS] [--port P]
+"""
+import pickle
+import random
+import time
+from argparse import ArgumentParser
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread, Lock
+from urllib.parse import urlparse, parse_qs
+
+import cbor
+import requests
+
+_SYLLABLES = [
+    "ba", "ce", "di", "fo", "gu", "ha", "ke", "li", "mo", "nu", "pa", "re",
+    "si", "to", "vu", "wa", "xe", "yo", "za", "tri", "gen", "lor", "mun", "pex"]
+
+
+def encode(number):
+    """ Writes a number in letters, since digits in paths look like traps. """
+    letters = ""
+    while True:
+        number, digit = divmod(number, 26)
+        letters = chr(97 + digit) + letters
+        if not number:
+            return letters
+
+
+def decode(letters):
+    number = 0
+    for letter in letters:
+        number = number * 26 + ord(letter) - 97
+    return number
+
+
+class SiteGraph(object):
+    """
+    A deterministic synthetic web of `page_count` pages over `host_count`
+    hosts of ics.uci.edu.
+
+    Page n links to page n + 1 (so every page is reachable from page 0) and
+    to `link_count` - 1 other random pages. Pages of the first `trap_hosts`
+    hosts also link into an endless calendar, a `near_duplicates` fraction
+    of pages link to a printer-friendly copy of themselves that differs in
+    one word, and an `errors` fraction of pages answer 404.
+
+    Args:
+        page_count (int): Number of ordinary pages.
+        host_count (int): Number of hosts the pages are spread over.
+        link_count (int): Links to other ordinary pages per page.
+        word_count (int): Words of text per page.
+        trap_hosts (int): Hosts with a calendar trap.
+        near_duplicates (float): Fraction of pages with a near-duplicate.
+        errors (float): Fraction of pages that answer 404.
+        seed (int): Seed of the generated graph and text.
+    """
+    def __init__(self, page_count=2000, host_count=20, link_count=8,
+                 word_count=300, trap_hosts=2, near_duplicates=0.1,
+                 errors=0.02, seed=0):
+        self.page_count = page_count
+        self.link_count = link_count
+        self.word_count = word_count
+        self.near_duplicates = near_duplicates
+        self.errors = errors
+        self.seed = seed
+        self.hosts = [
+            f"{encode(i)}lab.ics.uci.edu" for i in range(host_count)]
+        self.trap_hosts = set(self.hosts[:trap_hosts])
+        rng = random.Random(seed)
+        self.vocabulary = list({
+            "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4)))
+            for _ in range(5000)})
+        self.vocabulary.sort()
+
+    @property
+    def seed_urls(self):
+        return [self.page_url(0)]
+
+    def page_url(self, number):
+        host = self.hosts[number % len(self.hosts)]
+        topic = self.vocabulary[number % len(self.vocabulary)]
+        return f"https://{host}/{topic}/{encode(number)}"
+
+    def calendar_url(self, host, day):
+        return f"https://{host}/events/calendar?date={day.isoformat()}"
+
+    def lookup(self, url):
+        """ Returns a tuple (status, html) for url. """
+        parsed = urlparse(url)
+        if parsed.netloc not in self.hosts:
+            return 404, b""
+        if parsed.path == "/robots.txt":
+            return 200, (
+                f"User-agent: *\nDisallow: /events/\nCrawl-delay: 0.01\n"
+                f"Sitemap: https://{parsed.netloc}/sitemap.xml\n").encode("utf-8")
+        if parsed.path == "/sitemap.xml":
+            return 200, self._sitemap(parsed.netloc)
+        if parsed.path == "/events/calendar" and parsed.netloc in self.trap_hosts:
+            day = date.fromisoformat(parse_qs(parsed.query)["date"][0])
+            return 200, self._calendar(parsed.netloc, day)
+
+        segments = parsed.path.strip("/").split("/")
+        if len(segments) != 2 or not segments[1].isalpha():
+            return 404, b""
+        number = decode(segments[1])
+        if number >= self.page_count or url.split("?")[0] != self.page_url(number):
+            return 404, b""
+        rng = random.Random(self.seed * 1000003 + number)
+        if rng.random() < self.errors:
+            return 404, b"<html><body>Not found</body></html>"
+        if parsed.query == "print=yes":
+            return 200, self._page(number, rng, printable=True)
+        return 200, self._page(number, rng)
+
+    def _words(self, rng, count):
+        vocabulary = self.vocabulary
+        # Skewed towards the start of the vocabulary, like real text.
+        return [
+            vocabulary[int(len(vocabulary) * rng.random() ** 3)]
+            for _ in range(count)]
+
+    def _page(self, number, rng, printable=False):
+        url = self.page_url(number)
+        words = self._words(rng, self.word_count)
+        links = [self.page_url((number + 1) % self.page_count)] + [
+            self.page_url(rng.randrange(self.page_count))
+            for _ in range(self.link_count - 1)]
+        has_copy = rng.random() < self.near_duplicates
+        host = urlparse(url).netloc
+        if has_copy:
+            links.append(f"{url}?print=yes")
+        if host in self.trap_hosts:
+            links.append(self.calendar_url(host, date(2024, 1, 1)))
+        if printable:
+            # Same page, links and all, with one word changed
+            words[len(words) // 2] = "printable"
+        return _html(f"Page {encode(number)}", words, links)
+
+    def _sitemap(self, host):
+        index = self.hosts.index(host)
+        locations = "".join(
+            f"<url><loc>{self.page_url(number)}</loc></url>"
+            for number in range(index, self.page_count, len(self.hosts)))
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?><urlset xmlns='
+            '"http://www.sitemaps.org/schemas/sitemap/0.9">'
+            f"{locations}</urlset>").encode("utf-8")
+
+    def _calendar(self, host, day):
+        rng = random.Random(day.toordinal())
+        words = ["events", "for", day.strftime("%B"), "calendar"] + self._words(
+            rng, self.word_count // 2)
+        links = [
+            self.calendar_url(host, day + timedelta(days=1)),
+            self.calendar_url(host, day - timedelta(days=1))]
+        return _html(f"Events on {day.isoformat()}", words, links)
+
+
+def _html(title, words, links):
+    paragraphs = "".join(
+        f"<p>{' '.join(words[i:i + 50])}</p>" for i in range(0, len(words), 50))
+    anchors = "".join(f'<li><a href="{link}">{link}</a></li>' for link in links)
+    return (
+        f"<html><head><title>{title}</title></head><body>"
+        f"<nav><a href=\"/\">Home</a></nav><main><h1>{title}</h1>"
+        f"{paragraphs}<ul>{anchors}</ul></main>"
+        f"<footer>Synthetic site</footer></body></html>").encode("utf-8")
+
+
+class FakeCacheServer(object):
+    """
+    Serves a SiteGraph like the cache server, waiting `latency` seconds
+    (give or take half of it) before every answer.
+
+    Args:
+        graph (SiteGraph): The pages to serve.
+        latency (float): Mean seconds every request takes.
+        host (str): Interface to listen on.
+        port (int): Port to listen on, 0 for any free port.
+    """
+    def __init__(self, graph, latency=0.0, host="127.0.0.1", port=0):
+        self.graph = graph
+        self.latency = latency
+        self.lock = Lock()
+        self.requests = 0
+        self.server = ThreadingHTTPServer((host, port), _handler_for(self))
+        self.server.daemon_threads = True
+        # Clients that timed out close their end before the reply is sent.
+        self.server.handle_error = lambda request, client_address: None
+        self.address = self.server.server_address
+
+    def start(self):
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def respond(self, url):
+        """ Returns the cbor body the cache server would answer url with. """
+        with self.lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency * random.uniform(0.5, 1.5))
+        status, content = self.graph.lookup(url)
+        raw = requests.models.Response()
+        raw.status_code = status
+        raw.url = url
+        raw._content = content
+        return cbor.dumps({
+            "url": url, "status": status, "response": pickle.dumps(raw)})
+
+
+def _handler_for(cache_server):
+    class FakeCacheHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            url = parse_qs(urlparse(self.path).query)["q"][0]
+            body = cache_server.respond(url)
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FakeCacheHandler
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--hosts", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=9000)
+    args = parser.parse_args()
+    graph = SiteGraph(args.pages, args.hosts)
+    server = FakeCacheServer(graph, args.latency, port=args.port)
+    print(f"Serving {args.pages} pages on {args.hosts} hosts at "
+          f"127.0.0.1:{server.address[1]}, seed url {graph.seed_urls[0]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -1,11 +1,16 @@
 from utils import get_logger
 from crawler.frontier import Frontier
 from crawler.worker import Worker
+from crawler.parser_pool import shutdown_parser_pool
+from crawler.page_cache import close_page_cache
+from crawler.robots import close_robots
+import scraper
 
 class Crawler(object):
     def __init__(self, config, restart, frontier_factory=Frontier, worker_factory=Worker):
         self.config = config
         self.logger = get_logger("CRAWLER")
+        scraper.configure(config)
         self.frontier = frontier_factory(config, restart)
         self.workers = list()
         self.worker_factory = worker_factory
@@ -24,3 +29,7 @@ class Crawler(object):
     def join(self):
         for worker in self.workers:
             worker.join()
+        shutdown_parser_pool()
+        close_page_cache()
+        close_robots()
+        self.frontier.close()
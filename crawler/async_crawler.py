@@ -0,0 +1,163 @@
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from utils import get_logger
+from utils.download import decode_response
+from utils.metrics import metrics
+from utils.response import Response
+from crawler.frontier import Frontier
+from crawler.parser_pool import parse_async, shutdown_parser_pool
+from crawler.page_cache import get_page_cache, close_page_cache
+from crawler.robots import get_robots, close_robots
+from utils.page import analyze_page
+import scraper
+
+
+class AsyncCrawler(object):
+    """
+    Crawls with a single asyncio event loop instead of a thread per worker.
+
+    Up to `config.concurrency` urls are downloaded at once over a shared
+    aiohttp session, and pages are parsed in a process pool. The frontier is
+    used through the same get_tbd_url / add_url / mark_url_complete calls as
+    the threaded Worker, and the scraper through should_analyze, analyze_page
+    and record_page. Calls that may block (the page cache, robots.txt, the
+    scraper and the frontier, which take locks) run in the default executor
+    so they never hold up the downloads in flight.
+    """
+    def __init__(self, config, restart, frontier_factory=Frontier):
+        if aiohttp is None:
+            raise RuntimeError(
+                "The asyncio engine needs aiohttp: "
+                "python -m pip install aiohttp")
+        self.config = config
+        self.logger = get_logger("CRAWLER")
+        scraper.configure(config)
+        self.frontier = frontier_factory(config, restart)
+        self.page_cache = get_page_cache(config)
+        self.robots = get_robots(config)
+
+    def start(self):
+        try:
+            asyncio.run(self._crawl())
+        finally:
+            close_page_cache()
+            close_robots()
+            self.frontier.close()
+
+    async def _crawl(self):
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.config.concurrency)
+        tasks = set()
+        # get_tbd_url blocks until a host is ready, so it gets its own thread.
+        dispatcher = ThreadPoolExecutor(max_workers=1)
+
+        def task_done(task):
+            tasks.discard(task)
+            slots.release()
+
+        timeout = aiohttp.ClientTimeout(total=self.config.download_timeout)
+        connector = aiohttp.TCPConnector(limit=self.config.concurrency)
+        try:
+            async with aiohttp.ClientSession(
+                    timeout=timeout, connector=connector) as session:
+                while True:
+                    await slots.acquire()
+                    url = await loop.run_in_executor(
+                        dispatcher, self.frontier.get_tbd_url)
+                    if url is None:
+                        self.logger.info("Frontier is empty. Stopping Crawler.")
+                        break
+                    task = loop.create_task(self._process(session, url))
+                    tasks.add(task)
+                    task.add_done_callback(task_done)
+                if tasks:
+                    await asyncio.wait(tasks)
+        finally:
+            # The dispatcher may be blocked in get_tbd_url after an error.
+            dispatcher.shutdown(wait=False)
+            shutdown_parser_pool()
+
+    async def _process(self, session, url):
+        loop = asyncio.get_running_loop()
+
+        def blocking(func, *args):
+            return loop.run_in_executor(None, func, *args)
+
+        try:
+            if not await blocking(scraper.should_download, url):
+                return
+            # robots.txt may have to be downloaded.
+            if self.robots and not await blocking(self.robots.allowed, url):
+                return
+            cached = self.page_cache and await blocking(self.page_cache.get, url)
+            if cached and self.page_cache.is_fresh(cached):
+                # Analyzed recently, so neither downloaded nor parsed.
+                metrics.incr("page_cache.hits")
+                await blocking(
+                    self._add_links, url, scraper.record_cached_page(
+                        url, cached.digest, cached.analysis))
+                return
+            if metrics.enabled:
+                metrics.incr("download.fetches", host=urlparse(url).netloc)
+            with metrics.timer("download"):
+                resp = await self._download(session, url)
+            self.logger.info(
+                f"Downloaded {url}, status <{resp.status}>, "
+                f"using cache {self.config.cache_server}.")
+            if await blocking(scraper.should_analyze, url, resp):
+                if cached and cached.is_unchanged(resp):
+                    metrics.incr("page_cache.revalidated")
+                    analysis = cached.analysis
+                else:
+                    with metrics.timer("scraper.analyze_page"):
+                        analysis = await parse_async(
+                            self.config, analyze_page, url, resp.status,
+                            resp.raw_response.content, resp.raw_response.url)
+                if self.page_cache:
+                    await blocking(self.page_cache.put, url, resp, analysis)
+                await blocking(
+                    self._add_links, url, scraper.record_page(url, analysis))
+        except Exception:
+            self.logger.exception(f"Failed to process {url}.")
+        finally:
+            # Always release the url, or the crawl never finishes.
+            await blocking(self.frontier.mark_url_complete, url)
+
+    def _add_links(self, url, links):
+        # Runs record_page, a generator, and adds the links it yields.
+        for scraped_url in links:
+            self.frontier.add_url(scraped_url, url)
+
+    async def _download(self, session, url):
+        """ The asyncio counterpart of utils.download.download. """
+        host, port = self.config.cache_server
+        params = [("q", url), ("u", self.config.user_agent)]
+        retries = self.config.download_retries
+        for attempt in range(retries + 1):
+            if attempt:
+                await asyncio.sleep(
+                    self.config.download_backoff * 2 ** (attempt - 1))
+            try:
+                async with session.get(
+                        f"http://{host}:{port}/", params=params) as resp:
+                    status, content = resp.status, await resp.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt < retries:
+                    continue
+                metrics.incr("download.errors")
+                self.logger.error(
+                    f"Cache server request failed for url {url}: {e!r}")
+                return Response({
+                    "error": f"Cache server request failed: {e!r}",
+                    "status": 0,
+                    "url": url})
+            if status < 500 or attempt == retries:
+                return decode_response(url, status, content, self.logger)
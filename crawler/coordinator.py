@@ -0,0 +1,131 @@
+import json
+
+from argparse import ArgumentParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread, Lock
+
+
+class Coordinator(object):
+    """
+    Relays links between the nodes of a partitioned crawl and decides when
+    the crawl is over.
+
+    Nodes send the links they found for other partitions with `send`, and
+    poll for the links sent to them with `poll`, reporting whether they are
+    idle: nothing queued, nothing in flight and nothing left to send. The
+    crawl is finished once every node's last poll found it idle with nothing
+    delivered, and no links are waiting for any node. A node can only get
+    new work through a poll, which then marks it busy, so no link can arrive
+    after that.
+
+    Args:
+        node_count (int): Number of nodes in the crawl.
+    """
+    def __init__(self, node_count):
+        self.node_count = node_count
+        self.lock = Lock()
+        self.inboxes = [list() for _ in range(node_count)]
+        self.idle = [False] * node_count
+        self.finished = False
+
+    def send(self, batches):
+        """
+        Queues links for their nodes.
+
+        Args:
+            batches (dict): Lists of [url, depth] pairs by node id.
+        """
+        with self.lock:
+            for node_id, urls in batches.items():
+                self.inboxes[int(node_id)].extend(urls)
+
+    def poll(self, node_id, idle):
+        """
+        Returns a tuple (urls, finished): the [url, depth] pairs queued for
+        node_id, and whether the whole crawl is finished.
+        """
+        with self.lock:
+            urls, self.inboxes[node_id] = self.inboxes[node_id], list()
+            self.idle[node_id] = idle and not urls
+            if not self.finished:
+                self.finished = all(self.idle) and not any(self.inboxes)
+            return urls, self.finished
+
+
+class CoordinatorServer(object):
+    """
+    Serves a Coordinator over HTTP with JSON bodies, for nodes running in
+    other processes or on other machines:
+
+        POST /send {"batches": {"<node id>": [[url, depth], ...]}}
+        POST /poll {"node": <node id>, "idle": bool}
+            -> {"urls": [[url, depth], ...], "finished": bool}
+
+    Args:
+        node_count (int): Number of nodes in the crawl.
+        host (str): Interface to listen on.
+        port (int): Port to listen on, 0 for any free port.
+    """
+    def __init__(self, node_count, host="127.0.0.1", port=0):
+        self.coordinator = Coordinator(node_count)
+        self.server = ThreadingHTTPServer(
+            (host, port), _handler_for(self.coordinator))
+        self.server.daemon_threads = True
+        self.address = self.server.server_address
+
+    def start(self):
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _handler_for(coordinator):
+    class CoordinatorHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if self.path == "/send":
+                coordinator.send(request["batches"])
+                response = {}
+            elif self.path == "/poll":
+                urls, finished = coordinator.poll(
+                    int(request["node"]), bool(request["idle"]))
+                response = {"urls": urls, "finished": finished}
+            else:
+                self.send_error(404)
+                return
+            body = json.dumps(response).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return CoordinatorHandler
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(
+        description="Stand-in coordinator for a crawl split over several nodes.")
+    parser.add_argument("--nodes", type=int, required=True)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    args = parser.parse_args()
+    server = CoordinatorServer(args.nodes, args.host, args.port)
+    print(f"Coordinating {args.nodes} nodes on {args.host}:{server.address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -1,17 +1,224 @@
 import os
-import shelve
+import time
+import heapq
 
-from threading import Thread, RLock
+from collections import deque
+from threading import Thread, RLock, Condition, Event
 from queue import Queue, Empty
+from urllib.parse import urlparse
 
 from utils import get_logger, get_urlhash, normalize
+from utils.metrics import metrics
+from utils.seen import SeenSet
+from crawler.store import FrontierStore
+from crawler.robots import get_robots
+from crawler.priority import make_policy
 from scraper import is_valid
 
+
+def _host_of(url):
+    # urlparse(url).netloc, without parsing the rest of the url.
+    parts = url.split("/", 3)
+    if len(parts) < 3 or "?" in parts[2] or "#" in parts[2]:
+        return urlparse(url).netloc
+    return parts[2]
+
+
+class HostQueue(object):
+    """
+    The urls of one host, in a bucket per (priority, depth) and first in,
+    first out within a bucket. Priorities are small integers, so there are
+    few buckets, and a url costs one deque slot however many are queued.
+    """
+    __slots__ = ("buckets", "keys", "count")
+
+    def __init__(self):
+        self.buckets = dict()
+        self.keys = list()
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def add(self, url, key):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = deque()
+            heapq.heappush(self.keys, key)
+        bucket.append(url)
+        self.count += 1
+
+    def head(self):
+        """ The (priority, depth) of the url that pop returns next. """
+        return self.keys[0]
+
+    def first(self):
+        """ The url that pop returns next. """
+        return self.buckets[self.keys[0]][0]
+
+    def pop(self):
+        key = self.keys[0]
+        bucket = self.buckets[key]
+        url = bucket.popleft()
+        self.count -= 1
+        if not bucket:
+            heapq.heappop(self.keys)
+            del self.buckets[key]
+        return url, key
+
+
+class HostScheduler(object):
+    """
+    Keeps one HostQueue of urls per host, ordered by `policy`, and hands a
+    url out only once its host has waited at least `delay` seconds since its
+    previous fetch finished. A host is busy from the time a url of it is
+    handed out until release is called for that url, so it is never fetched
+    by two workers at once. Hosts that ask for a longer Crawl-delay in
+    robots.txt have their own delay.
+
+    Hosts with pending urls wait in a min-heap of the time they may next be
+    fetched, and then in a min-heap ranked by the policy's host priority,
+    from which the best host is fetched. A host is in one heap at a time; a
+    ready host whose rank improves is pushed again, and its outdated entry
+    is skipped when it comes up.
+    """
+    def __init__(self, delay, policy):
+        self.delay = delay
+        self.policy = policy
+        self.delays = dict()
+        self.queues = dict()
+        self.next_fetch = dict()
+        self.fetches = dict()
+        self.busy = set()
+        self.waiting = list()
+        self.ready = list()
+        # Rank of the current entry in ready of every ready host
+        self.ready_ranks = dict()
+        self.pushes = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def set_delay(self, host, delay):
+        if delay > self.delay:
+            self.delays[host] = delay
+
+    def add(self, url, depth=0):
+        host = _host_of(url)
+        key = (self.policy.priority(url, depth), depth)
+        queue = self.queues.get(host)
+        if queue is None:
+            queue = self.queues[host] = HostQueue()
+            if host not in self.busy:
+                heapq.heappush(
+                    self.waiting, (self.next_fetch.get(host, 0.0), host))
+            queue.add(url, key)
+        else:
+            improves = key < queue.head()
+            queue.add(url, key)
+            if improves and host in self.ready_ranks:
+                self._push_ready(host, queue)
+        self.count += 1
+
+    def _push_ready(self, host, queue):
+        rank = self.policy.host_priority(
+            queue.head()[0], self.fetches.get(host, 0))
+        self.ready_ranks[host] = rank
+        self.pushes += 1
+        heapq.heappush(self.ready, (rank, self.pushes, host))
+
+    def pop(self, skip=None):
+        """
+        Returns a tuple (url, depth, wait). url is None when no host is ready
+        yet, in which case wait is the number of seconds until the earliest
+        one is, or None if every host with urls left is busy or there is
+        nothing left to schedule.
+
+        Urls for which skip(url) is true are dropped as they come up, without
+        taking up their host's turn or delay.
+        """
+        now = time.monotonic()
+        waiting, ready = self.waiting, self.ready
+        while waiting and waiting[0][0] <= now:
+            host = heapq.heappop(waiting)[1]
+            self._push_ready(host, self.queues[host])
+        url = None
+        while url is None:
+            while ready:
+                rank, _, host = heapq.heappop(ready)
+                if self.ready_ranks.get(host) == rank:
+                    break
+            else:
+                if not waiting:
+                    return None, None, None
+                return None, None, waiting[0][0] - now
+
+            del self.ready_ranks[host]
+            queue = self.queues[host]
+            if skip is not None and not self._drop_skipped(host, queue, skip):
+                continue
+            url, (_, depth) = queue.pop()
+            self.count -= 1
+        self.fetches[host] = self.fetches.get(host, 0) + 1
+        self.busy.add(host)
+        if not queue:
+            del self.queues[host]
+        return url, depth, None
+
+    def _drop_skipped(self, host, queue, skip):
+        # Drops the urls at the head of the queue of host for which skip(url)
+        # is true. Returns False if that empties the queue.
+        while queue and skip(queue.first()):
+            queue.pop()
+            self.count -= 1
+        if not queue:
+            del self.queues[host]
+            return False
+        return True
+
+    def release(self, url, skip=None):
+        """
+        Ends the fetch of url, which pop handed out. Its host may be fetched
+        again once its delay has passed from now. Returns True if the host
+        has more urls queued, not counting those for which skip(url) is true.
+        """
+        host = _host_of(url)
+        if host not in self.busy:
+            return False
+        self.busy.discard(host)
+        ready_at = time.monotonic() + self.delays.get(host, self.delay)
+        self.next_fetch[host] = ready_at
+        queue = self.queues.get(host)
+        if queue is None or (
+                skip is not None and not self._drop_skipped(host, queue, skip)):
+            return False
+        heapq.heappush(self.waiting, (ready_at, host))
+        return True
+
+
 class Frontier(object):
     def __init__(self, config, restart):
         self.logger = get_logger("FRONTIER")
         self.config = config
-        self.to_be_downloaded = list()
+        self.policy = make_policy(self.config.frontier_policy)
+        self.to_be_downloaded = HostScheduler(self.config.time_delay, self.policy)
+        # Depth of every url being processed, which its links are one deeper
+        # than, and [entries queued, handed out] of urls queued again.
+        self.depths = dict()
+        self.requeued = dict()
+        # Guards the scheduler and save file. Workers wait on the condition
+        # while the frontier is empty but other workers may still add urls.
+        self.lock = RLock()
+        self.changed = Condition(self.lock)
+        self.in_flight = 0
+        self.loading = False
+        self.finished = Event()
+        metrics.gauge("frontier.queued", lambda: len(self.to_be_downloaded))
+        metrics.gauge("frontier.in_flight", lambda: self.in_flight)
+        metrics.gauge(
+            "frontier.hosts", lambda: len(self.to_be_downloaded.queues))
+        metrics.gauge("frontier.host_queues", self._host_queue_depths)
         
         if not os.path.exists(self.config.save_file) and not restart:
             # Save file does not exist, but request to load save.
@@ -22,9 +229,21 @@ class Frontier(object):
             # Save file does exists, but request to start from seed.
             self.logger.info(
                 f"Found save file {self.config.save_file}, deleting it.")
-            os.remove(self.config.save_file)
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(self.config.save_file + suffix):
+                    os.remove(self.config.save_file + suffix)
         # Load existing save file, or create one if it does not exist.
-        self.save = shelve.open(self.config.save_file)
+        self.save = FrontierStore(
+            self.config.save_file, self.config.save_batch_size,
+            self.config.save_interval)
+        # Crawl-delays and sitemaps of hosts, as their robots.txt is read.
+        self.robots = get_robots(config)
+        if self.robots:
+            self.robots.add_listener(self._apply_robots)
+        # In-memory set of every url hash added in this run. On a fresh crawl
+        # it covers the whole save file, so add_url never has to query it.
+        self.seen = SeenSet()
+        self.seen_is_complete = restart or not self.save
         if restart:
             for url in self.config.seed_urls:
                 self.add_url(url)
@@ -37,36 +256,176 @@ class Frontier(object):
 
     def _parse_save_file(self):
         ''' This function can be overridden for alternate saving techniques. '''
-        total_count = len(self.save)
+        # Only the pending urls are read, and they are streamed into the
+        # scheduler in the background so workers can start right away.
+        self.loading = True
+        pending = self.save.pending_urls()
+        loader = Thread(target=self._load_pending, args=(pending,), daemon=True)
+        loader.start()
+
+    def _load_pending(self, pending, chunk_size=1000):
         tbd_count = 0
-        for url, completed in self.save.values():
-            if not completed and is_valid(url):
-                self.to_be_downloaded.append(url)
-                tbd_count += 1
+        chunk = list()
+        try:
+            for url, depth in pending:
+                if is_valid(url):
+                    chunk.append((url, depth))
+                if len(chunk) >= chunk_size:
+                    tbd_count += self._schedule(chunk)
+                    chunk = list()
+            tbd_count += self._schedule(chunk)
+        finally:
+            with self.changed:
+                self.loading = False
+                self.changed.notify_all()
         self.logger.info(
-            f"Found {tbd_count} urls to be downloaded from {total_count} "
+            f"Found {tbd_count} urls to be downloaded from {len(self.save)} "
             f"total urls discovered.")
 
+    def _schedule(self, urls):
+        with self.changed:
+            for url, depth in urls:
+                self.to_be_downloaded.add(url, depth)
+            self.changed.notify_all()
+        return len(urls)
+
+    def _host_queue_depths(self, count=20):
+        # The deepest host queues, for the crawl metrics.
+        with self.lock:
+            depths = [
+                (len(queue), host)
+                for host, queue in self.to_be_downloaded.queues.items()]
+        return {host: depth for depth, host in heapq.nlargest(count, depths)}
+
+    def _apply_robots(self, host, rules, sitemap_urls, batch_size=1000):
+        """
+        Applies the Crawl-delay of host and adds the urls of its sitemaps,
+        one link below the seeds, in batches so workers are not held up.
+        """
+        if rules.crawl_delay:
+            with self.lock:
+                self.to_be_downloaded.set_delay(
+                    host, min(rules.crawl_delay, self.config.max_crawl_delay))
+        # add_url checks the urls against the rules, published by now.
+        sitemap_urls = [url for url in sitemap_urls if is_valid(url)]
+        for start in range(0, len(sitemap_urls), batch_size):
+            with self.lock:
+                for url in sitemap_urls[start:start + batch_size]:
+                    self.add_url(url, depth=1)
+
+    def _more_urls_expected(self):
+        ''' Whether urls may still arrive from outside the workers. '''
+        return self.loading
+
+    @metrics.timed("frontier.get_tbd_url")
     def get_tbd_url(self):
-        try:
-            return self.to_be_downloaded.pop()
-        except IndexError:
+        """
+        Blocks until a url whose host may be fetched is available. Returns None
+        once the frontier is empty, no url is still being processed and the
+        save file is fully loaded, since then no more urls can be discovered.
+        """
+        with self.changed:
+            while not self.finished.is_set():
+                url, depth, wait = self.to_be_downloaded.pop(self._is_stale)
+                if url is not None:
+                    if url in self.requeued:
+                        self._claim(url)
+                    self.in_flight += 1
+                    self.depths[url] = depth
+                    return url
+                if (wait is None and self.in_flight == 0
+                        and not self._more_urls_expected()):
+                    self.logger.info("Frontier is empty, crawl finished.")
+                    # Entries of urls whose copies never came up.
+                    self.requeued.clear()
+                    self.finished.set()
+                    self.changed.notify_all()
+                    break
+                # Woken up early by add_url and mark_url_complete, which
+                # frees the host of the url it completes.
+                self.changed.wait(wait)
             return None
 
-    def add_url(self, url):
+    def _is_stale(self, url):
+        # Whether this entry of a url queued more than once is to be dropped,
+        # because another entry of it was handed out. Counts it off if so.
+        entry = self.requeued.get(url)
+        if entry is None or not entry[1]:
+            return False
+        self._claim(url)
+        return True
+
+    def _claim(self, url):
+        # Counts off an entry of a url queued more than once as it leaves the
+        # scheduler, and marks the url handed out.
+        entry = self.requeued[url]
+        entry[0] -= 1
+        entry[1] = True
+        if entry[0] == 0:
+            del self.requeued[url]
+
+    @metrics.timed("frontier.add_url")
+    def add_url(self, url, parent=None, depth=None):
+        """
+        Queues url, found on the page `parent`, or a seed or sitemap url if
+        that is None. A url already seen is queued again when the policy may
+        rank it higher now that another page links to it.
+        """
         url = normalize(url)
+        if self.robots:
+            # Urls of hosts whose robots.txt is known are checked right away,
+            # rather than after being saved, queued and handed out.
+            rules = self.robots.cached_rules(url)
+            if rules is not None and not rules.allowed(url):
+                metrics.incr("robots.disallowed")
+                return
         urlhash = get_urlhash(url)
-        if urlhash not in self.save:
-            self.save[urlhash] = (url, False)
-            self.save.sync()
-            self.to_be_downloaded.append(url)
+        if depth is None:
+            depth = self.depths.get(parent, -1) + 1
+        with self.lock:
+            if not self.seen.add(urlhash):
+                if self.policy.promotes:
+                    self._promote(url, urlhash, depth)
+                return
+            if self.seen_is_complete or urlhash not in self.save:
+                self.save.put(urlhash, url, False, depth)
+                self.to_be_downloaded.add(url, depth)
+                self.changed.notify()
+
+    def _promote(self, url, urlhash, depth):
+        # The first entry to come out is handed out and the others skipped,
+        # so a url is only queued again while it is still waiting.
+        entry = self.requeued.get(url)
+        # A pending url of the save file the loader dropped as invalid is
+        # not queued, so it must not be queued here either.
+        if (self.loading or url in self.depths or not is_valid(url)
+                or (entry is not None and entry[1])
+                or (entry is None and self.save.is_completed(urlhash))):
+            return
+        if entry is None:
+            entry = self.requeued[url] = [1, False]
+        entry[0] += 1
+        self.to_be_downloaded.add(url, depth)
+        metrics.incr("frontier.promoted")
     
+    @metrics.timed("frontier.mark_url_complete")
     def mark_url_complete(self, url):
         urlhash = get_urlhash(url)
-        if urlhash not in self.save:
-            # This should not happen.
-            self.logger.error(
-                f"Completed url {url}, but have not seen it before.")
+        with self.lock:
+            if urlhash not in self.save:
+                # This should not happen.
+                self.logger.error(
+                    f"Completed url {url}, but have not seen it before.")
+
+            self.save.put(urlhash, url, True, self.depths.pop(url, 0))
+            self.in_flight -= 1
+            if self.to_be_downloaded.release(url, self._is_stale):
+                # The host of url can be fetched again after its delay.
+                self.changed.notify()
+            elif self.in_flight == 0 and not self.to_be_downloaded:
+                # Let waiting workers notice the crawl is over.
+                self.changed.notify_all()
 
-        self.save[urlhash] = (url, True)
-        self.save.sync()
+    def close(self):
+        # Flush buffered updates to the save file.
+        self.save.close()
@@ -0,0 +1,173 @@
+import json
+import sqlite3
+import time
+import zlib
+
+from threading import Thread, Lock, RLock, Event
+
+from utils import get_urlhash
+from utils.metrics import metrics
+from utils.page import PageAnalysis
+
+_cache = None
+_cache_lock = Lock()
+
+
+class CachedPage(object):
+    """
+    What an earlier crawl learned about a url: the digest and validators of
+    its content, when it was fetched, and its analysis (None for pages with
+    too little text).
+    """
+    __slots__ = ("digest", "etag", "last_modified", "fetched", "analysis")
+
+    def __init__(self, digest, etag, last_modified, fetched, analysis):
+        self.digest = digest
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched = fetched
+        self.analysis = analysis
+
+    def is_unchanged(self, resp):
+        """
+        Whether resp holds the same page. The ETag or Last-Modified header
+        decide when the page has them, the content digest otherwise.
+        """
+        headers = resp.raw_response.headers
+        etag = headers.get("ETag")
+        if etag and self.etag:
+            return etag == self.etag
+        last_modified = headers.get("Last-Modified")
+        if last_modified and self.last_modified:
+            return last_modified == self.last_modified
+        return resp.content_digest == self.digest
+
+
+class PageCache(object):
+    """
+    Digests, validators and analyses of downloaded pages, kept across crawls
+    (also across --restart) in a SQLite database.
+
+    A url analyzed less than `max_age` seconds ago is served from the cache
+    without being downloaded. An older one is downloaded again, and its
+    cached analysis is reused when the page is unchanged, so only changed
+    pages are parsed. Writes are buffered like the frontier save file.
+
+    Args:
+        path (str): The database file.
+        max_age (float): Seconds a cached page is served without downloading.
+        batch_size (int): Pending writes that trigger a flush.
+        flush_interval (float): Maximum seconds a write stays buffered.
+    """
+    def __init__(self, path, max_age, batch_size=1000, flush_interval=1.0):
+        self.max_age = max_age
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.lock = RLock()
+        self.pending = dict()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "urlhash TEXT PRIMARY KEY, digest TEXT NOT NULL, etag TEXT, "
+            "last_modified TEXT, fetched REAL NOT NULL, analysis BLOB)")
+        self.db.commit()
+        self.closed = Event()
+        self.flusher = Thread(target=self._flush_periodically, daemon=True)
+        self.flusher.start()
+
+    def get(self, url):
+        """ Returns the CachedPage of url, or None if it was never cached. """
+        urlhash = get_urlhash(url)
+        with self.lock:
+            row = self.pending.get(urlhash)
+            if row is None:
+                row = self.db.execute(
+                    "SELECT * FROM pages WHERE urlhash = ?",
+                    (urlhash,)).fetchone()
+        if row is None:
+            return None
+        _, digest, etag, last_modified, fetched, analysis = row
+        return CachedPage(
+            digest, etag, last_modified, fetched, _load_analysis(url, analysis))
+
+    def is_fresh(self, page):
+        return time.time() - page.fetched < self.max_age
+
+    def put(self, url, resp, analysis):
+        """ Caches the analysis of the page resp holds. """
+        headers = resp.raw_response.headers
+        urlhash = get_urlhash(url)
+        with self.lock:
+            self.pending[urlhash] = (
+                urlhash, resp.content_digest, headers.get("ETag"),
+                headers.get("Last-Modified"), time.time(),
+                _dump_analysis(analysis))
+            if len(self.pending) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        with self.lock:
+            if not self.pending:
+                return
+            with metrics.timer("page_cache.flush"), self.db:
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                    self.pending.values())
+            self.pending.clear()
+
+    def close(self):
+        if self.closed.is_set():
+            return
+        self.closed.set()
+        self.flusher.join()
+        with self.lock:
+            self.flush()
+            self.db.close()
+
+    def _flush_periodically(self):
+        while not self.closed.wait(self.flush_interval):
+            self.flush()
+
+
+def _dump_analysis(analysis):
+    if analysis is None:
+        return None
+    return zlib.compress(json.dumps([
+        analysis.word_count, analysis.fingerprint, analysis.content_word_count,
+        analysis.word_counts, analysis.links]).encode("utf-8"))
+
+
+def _load_analysis(url, data):
+    if data is None:
+        return None
+    word_count, fingerprint, content_word_count, word_counts, links = (
+        json.loads(zlib.decompress(data)))
+    return PageAnalysis(
+        url, 200, word_count, fingerprint, content_word_count, word_counts,
+        links)
+
+
+def get_page_cache(config):
+    """
+    Returns the page cache shared by every worker of the crawl, opened on
+    first use from `config.page_cache_file`, or None when it is turned off.
+    """
+    global _cache
+    if not config.page_cache_file:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = PageCache(
+                config.page_cache_file, config.page_cache_age,
+                config.save_batch_size, config.save_interval)
+        return _cache
+
+
+def close_page_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is not None:
+            _cache.close()
+            _cache = None
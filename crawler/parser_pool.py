@@ -0,0 +1,84 @@
+import asyncio
+import multiprocessing
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+
+from utils import get_logger
+from utils.metrics import metrics
+
+_pool = None
+_pool_lock = Lock()
+
+
+def get_parser_pool(config):
+    """
+    Returns the process pool pages are parsed in, shared by every worker of
+    the crawl and created on first use with `config.parser_processes`
+    processes (one per CPU when 0).
+
+    The processes are spawned rather than forked, since the crawler already
+    runs threads holding locks and an open save file when they start.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=config.parser_processes or None,
+                mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _discard(pool):
+    # A parser process died, which breaks the whole pool: every later submit
+    # fails at once. Drop it so get_parser_pool starts a new one.
+    global _pool
+    with _pool_lock:
+        if _pool is not pool:
+            # Another worker already replaced it.
+            return
+        _pool = None
+    pool.shutdown(wait=False)
+    get_logger("PARSER").warning("A parser process died, starting a new pool.")
+    metrics.incr("parser_pool.broken")
+
+
+def parse(config, func, *args):
+    """
+    Runs func(*args) in the parser pool and returns its result. If the pool
+    is broken, it is replaced and the call is tried once more.
+
+    Raises:
+        BrokenProcessPool: If the new pool breaks too, e.g. because this
+            very call kills its process.
+    """
+    for attempt in range(2):
+        pool = get_parser_pool(config)
+        try:
+            return pool.submit(func, *args).result()
+        except BrokenProcessPool:
+            _discard(pool)
+            if attempt:
+                raise
+
+
+async def parse_async(config, func, *args):
+    """ Same as parse, awaiting the result instead of blocking. """
+    loop = asyncio.get_running_loop()
+    for attempt in range(2):
+        pool = get_parser_pool(config)
+        try:
+            return await loop.run_in_executor(pool, func, *args)
+        except BrokenProcessPool:
+            _discard(pool)
+            if attempt:
+                raise
+
+
+def shutdown_parser_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
@@ -0,0 +1,137 @@
+from collections import defaultdict
+from hashlib import blake2b
+from threading import Thread, Event
+from urllib.parse import urlparse
+
+import requests
+
+from crawler.frontier import Frontier
+from utils.metrics import metrics
+
+
+def partition_of(url, node_count):
+    """
+    Returns the id of the node that owns url. Every url of a host belongs to
+    the same node, so politeness towards a host is kept by one node.
+    """
+    host = urlparse(url).netloc.lower().encode("utf-8")
+    # A stable hash, unlike hash(), so every process agrees on the owner.
+    digest = blake2b(host, digest_size=8).digest()
+    return int.from_bytes(digest, "big") % node_count
+
+
+class PartitionedFrontier(Frontier):
+    """
+    The frontier of one node of a crawl split over `config.node_count` nodes
+    by host hash.
+
+    The node keeps the frontier, save file and politeness for its own hosts.
+    Links to other hosts are batched per owner and sent through the
+    coordinator at `config.coordinator` once `config.forward_batch_size`
+    are pending or every `config.forward_interval` seconds, when the node
+    also picks up the links others found for it. The crawl only finishes
+    once the coordinator sees every node idle, or after `max_failures`
+    exchanges in a row have failed, when the node finishes its own work.
+    """
+    max_failures = 30
+
+    def __init__(self, config, restart):
+        self.node_id = config.node_id
+        self.node_count = config.node_count
+        host, port = config.coordinator
+        self.coordinator_url = f"http://{host}:{port}"
+        self.session = requests.Session()
+        self.outbox = defaultdict(list)
+        self.outbox_size = 0
+        self.cluster_finished = False
+        self.wakeup = Event()
+        self.closed = Event()
+        # Seeds for other nodes are added (and queued for them) here.
+        super().__init__(config, restart)
+        self.exchanger = Thread(target=self._exchange_periodically, daemon=True)
+        self.exchanger.start()
+
+    def add_url(self, url, parent=None, depth=None):
+        owner = partition_of(url, self.node_count)
+        if owner == self.node_id:
+            super().add_url(url, parent, depth)
+            return
+        # Links keep their depth on the node that crawls them.
+        if depth is None:
+            depth = self.depths.get(parent, -1) + 1
+        with self.lock:
+            self.outbox[owner].append([url, depth])
+            self.outbox_size += 1
+            if self.outbox_size >= self.config.forward_batch_size:
+                self.wakeup.set()
+
+    def _more_urls_expected(self):
+        return self.loading or not self.cluster_finished
+
+    def close(self):
+        self.closed.set()
+        self.wakeup.set()
+        self.exchanger.join()
+        super().close()
+
+    def _exchange_periodically(self):
+        failures = 0
+        while not self.closed.is_set() and not self.cluster_finished:
+            self.wakeup.wait(self.config.forward_interval)
+            self.wakeup.clear()
+            try:
+                self._exchange()
+                failures = 0
+                continue
+            except requests.RequestException as e:
+                self.logger.error(f"Coordinator request failed: {e}")
+            except Exception:
+                self.logger.exception("Exchange with the coordinator failed.")
+            failures += 1
+            if failures >= self.max_failures:
+                # Without the exchange, workers would wait for the cluster
+                # to finish forever.
+                self.logger.error(
+                    f"{failures} exchanges with the coordinator failed in a "
+                    f"row, finishing with the urls of this node.")
+                with self.changed:
+                    self.cluster_finished = True
+                    self.changed.notify_all()
+
+    def _exchange(self):
+        with self.lock:
+            batches, self.outbox = self.outbox, defaultdict(list)
+            self.outbox_size = 0
+        if batches:
+            try:
+                self._post("/send", {"batches": batches})
+            except requests.RequestException:
+                # Put the batches back to be sent next time.
+                with self.lock:
+                    for owner, urls in batches.items():
+                        self.outbox[owner][:0] = urls
+                        self.outbox_size += len(urls)
+                raise
+            metrics.incr(
+                "cluster.forwarded", sum(len(urls) for urls in batches.values()))
+
+        with self.lock:
+            idle = (
+                not self.to_be_downloaded and self.in_flight == 0
+                and not self.loading and not self.outbox)
+        reply = self._post("/poll", {"node": self.node_id, "idle": idle})
+        for url, depth in reply["urls"]:
+            self.add_url(url, depth=depth)
+        metrics.incr("cluster.received", len(reply["urls"]))
+        if reply["finished"]:
+            self.logger.info("Every node is idle, crawl finished.")
+            with self.changed:
+                self.cluster_finished = True
+                self.changed.notify_all()
+
+    def _post(self, path, request):
+        resp = self.session.post(
+            f"{self.coordinator_url}{path}", json=request,
+            timeout=self.config.download_timeout)
+        resp.raise_for_status()
+        return resp.json()
@@ -0,0 +1,75 @@
+import scraper
+
+
+class BreadthFirstPolicy(object):
+    """
+    Crawls the shallowest urls first: those the fewest links away from a
+    seed, over all hosts.
+
+    A policy gives every url a priority when it is queued, a small integer
+    where lower is crawled first, and ranks the hosts that may be fetched
+    by the best priority they have queued and how often they were fetched.
+    """
+    # Whether a url is queued again when more pages link to it.
+    promotes = False
+
+    def priority(self, url, depth):
+        return depth
+
+    def host_priority(self, priority, fetches):
+        return priority
+
+
+class HostFairPolicy(BreadthFirstPolicy):
+    """
+    Breadth first within a host, and the hosts fetched least so far first,
+    so new subdomains are reached before the large ones are exhausted.
+    """
+    def host_priority(self, priority, fetches):
+        return (fetches, priority)
+
+
+class ScorePolicy(object):
+    """
+    Ranks urls by depth, how many pages link to them and how likely they are
+    to be traps, and hosts by their best url and, more weakly, by how often
+    they were fetched.
+
+    priority = 2 * depth + trap_weight * trap likelihood - 2 * log2(in-links)
+
+    Args:
+        inlinks (callable): Approximate number of pages linking to a url.
+        trap_likelihood (callable): How likely a url is a trap, 0 to 1.
+        trap_weight (int): Priority added to a url that is surely a trap.
+        max_priority (int): Priorities are capped at this.
+    """
+    promotes = True
+
+    def __init__(self, inlinks, trap_likelihood, trap_weight=8,
+                 max_priority=63):
+        self.inlinks = inlinks
+        self.trap_likelihood = trap_likelihood
+        self.trap_weight = trap_weight
+        self.max_priority = max_priority
+
+    def priority(self, url, depth):
+        score = (
+            2 * depth + round(self.trap_weight * self.trap_likelihood(url))
+            - 2 * (self.inlinks(url).bit_length() - 1))
+        return min(max(score, 0), self.max_priority)
+
+    def host_priority(self, priority, fetches):
+        return priority + fetches.bit_length()
+
+
+def make_policy(name):
+    """ Returns the frontier policy named in the config: score, bfs or fair. """
+    if name == "bfs":
+        return BreadthFirstPolicy()
+    if name == "fair":
+        return HostFairPolicy()
+    if name == "score":
+        # In-links and trap counts are collected by the scraper.
+        return ScorePolicy(
+            scraper.inlink_count, scraper.trap_detector.likelihood)
+    raise ValueError(f"Unknown frontier order {name}")
@@ -0,0 +1,221 @@
+import sqlite3
+import time
+
+from threading import Lock, Event, local
+from urllib.parse import urlparse
+
+from utils import get_logger
+from utils.download import download
+from utils.metrics import metrics
+from utils.robots import ALLOW_ALL, parse_robots, parse_sitemap
+
+_robots = None
+_robots_lock = Lock()
+
+
+class RobotsCache(object):
+    """
+    The robots.txt rules of every host, fetched through the cache server the
+    first time one of its urls is about to be downloaded.
+
+    Parsed rules are kept in memory and the robots.txt files in a SQLite
+    database, both for `ttl` seconds. A host whose robots.txt could not be
+    fetched (status 0 or 5xx, or a cache server error) is allowed, and tried
+    again after `retry_ttl` seconds; a missing robots.txt allows everything.
+    Fetches are spaced by the politeness delay, and so is the download the
+    worker goes on to make from the same host.
+
+    When a host's rules are first used in a crawl, its sitemaps (those
+    listed in robots.txt, or /sitemap.xml) are read, and every listener gets
+    listener(host, rules, sitemap_urls). The rules are available to other
+    workers, and cached_rules, before the sitemaps are read.
+
+    Args:
+        config (Config): Used to download and for the user agent.
+        path (str): The database file.
+        ttl (float): Seconds fetched rules are used for.
+        retry_ttl (float): Seconds before a failed fetch is retried.
+        sitemaps (bool): Whether to read sitemaps.
+        max_sitemaps (int): Sitemap files read per host.
+        max_sitemap_urls (int): Urls taken from the sitemaps of a host.
+    """
+    def __init__(self, config, path, ttl=86400.0, retry_ttl=3600.0,
+                 sitemaps=True, max_sitemaps=10, max_sitemap_urls=50000):
+        self.config = config
+        self.ttl = ttl
+        self.retry_ttl = retry_ttl
+        self.sitemaps = sitemaps
+        self.max_sitemaps = max_sitemaps
+        self.max_sitemap_urls = max_sitemap_urls
+        self.logger = get_logger("ROBOTS")
+        self.lock = Lock()
+        # host -> (rules, expires), or an Event while the host is fetched
+        self.hosts = dict()
+        self.used_hosts = set()
+        self.listeners = list()
+        # When the current thread last fetched, if it has not waited since
+        self.local = local()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS robots ("
+            "host TEXT PRIMARY KEY, status INTEGER NOT NULL, body TEXT, "
+            "expires REAL NOT NULL)")
+        with self.db:
+            self.db.execute(
+                "DELETE FROM robots WHERE expires < ?", (time.time(),))
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def allowed(self, url):
+        """ Whether robots.txt lets us fetch url. May fetch robots.txt. """
+        allowed = self.rules(url).allowed(url)
+        if not allowed:
+            metrics.incr("robots.disallowed")
+        return allowed
+
+    def cached_rules(self, url):
+        """
+        The RobotsRules of the host of url if they are known, or None. Never
+        fetches robots.txt or waits for it.
+        """
+        with self.lock:
+            entry = self.hosts.get(urlparse(url).netloc)
+        if entry is None or isinstance(entry, Event) or entry[1] < time.time():
+            return None
+        return entry[0]
+
+    def rules(self, url):
+        """ The RobotsRules of the host of url. May fetch robots.txt. """
+        parsed = urlparse(url)
+        host = parsed.netloc
+        while True:
+            with self.lock:
+                entry = self.hosts.get(host)
+                if entry is None or (
+                        not isinstance(entry, Event) and entry[1] < time.time()):
+                    # Expired entries are dropped and fetched again.
+                    fetching = self.hosts[host] = Event()
+                    first_use = host not in self.used_hosts
+                    self.used_hosts.add(host)
+                    break
+            if not isinstance(entry, Event):
+                return entry[0]
+            # Another worker is fetching the rules of this host.
+            entry.wait()
+
+        rules, expires = ALLOW_ALL, time.time() + self.retry_ttl
+        loaded = False
+        try:
+            rules, expires = self._load(parsed.scheme, host)
+            loaded = True
+        except Exception:
+            self.logger.exception(f"Failed to read robots.txt of {host}.")
+        finally:
+            with self.lock:
+                self.hosts[host] = (rules, expires)
+            # Waiting workers only need the rules, not the sitemaps.
+            fetching.set()
+        try:
+            if loaded and first_use:
+                self._notify(parsed.scheme, host, rules)
+        except Exception:
+            self.logger.exception(f"Failed to read the sitemaps of {host}.")
+        finally:
+            # The caller goes on to download from host.
+            self._wait()
+        return rules
+
+    def _load(self, scheme, host):
+        # Returns (rules, expires), from the database while it is fresh.
+        with self.lock:
+            row = self.db.execute(
+                "SELECT status, body, expires FROM robots WHERE host = ?",
+                (host,)).fetchone()
+        if row is None or row[2] < time.time():
+            metrics.incr("robots.fetches")
+            resp = self._fetch(f"{scheme}://{host}/robots.txt")
+            body = None
+            if resp.status == 200 and resp.raw_response is not None:
+                body = resp.raw_response.content.decode("utf-8", "replace")
+            failed = resp.status == 0 or resp.status >= 500
+            row = (resp.status, body,
+                   time.time() + (self.retry_ttl if failed else self.ttl))
+            with self.lock, self.db:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO robots VALUES (?, ?, ?, ?)",
+                    (host,) + row)
+        status, body, expires = row
+        rules = ALLOW_ALL
+        if body is not None:
+            rules = parse_robots(body, self.config.user_agent)
+        return rules, expires
+
+    def _notify(self, scheme, host, rules):
+        if not self.listeners:
+            return
+        urls = self._read_sitemaps(scheme, host, rules) if self.sitemaps else []
+        for listener in self.listeners:
+            listener(host, rules, urls)
+
+    def _read_sitemaps(self, scheme, host, rules):
+        """ Returns the page urls of the sitemaps of host. """
+        pending = list(rules.sitemaps) or [f"{scheme}://{host}/sitemap.xml"]
+        urls = list()
+        for _ in range(self.max_sitemaps):
+            if not pending or len(urls) >= self.max_sitemap_urls:
+                break
+            metrics.incr("robots.sitemap_fetches")
+            resp = self._fetch(pending.pop(0))
+            if resp.status != 200 or not resp.raw_response:
+                continue
+            locations, is_index = parse_sitemap(resp.raw_response.content)
+            if is_index:
+                pending.extend(locations)
+            else:
+                urls.extend(locations)
+        metrics.incr("robots.sitemap_urls", len(urls))
+        return urls[:self.max_sitemap_urls]
+
+    def _fetch(self, url):
+        self._wait()
+        resp = download(url, self.config, self.logger)
+        self.local.fetched_at = time.monotonic()
+        return resp
+
+    def _wait(self):
+        # Sleeps until the politeness delay after this thread's last fetch.
+        # Only the thread that fetches waits; the rules are already published.
+        fetched_at = getattr(self.local, "fetched_at", None)
+        if fetched_at is not None:
+            self.local.fetched_at = None
+            time.sleep(max(
+                0.0, fetched_at + self.config.time_delay - time.monotonic()))
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+def get_robots(config):
+    """
+    Returns the robots.txt cache shared by the whole crawl, opened on first
+    use from `config.robots_file`, or None when robots.txt is ignored.
+    """
+    global _robots
+    if not config.robots_file:
+        return None
+    with _robots_lock:
+        if _robots is None:
+            _robots = RobotsCache(
+                config, config.robots_file, config.robots_ttl,
+                sitemaps=config.sitemaps)
+        return _robots
+
+
+def close_robots():
+    global _robots
+    with _robots_lock:
+        if _robots is not None:
+            _robots.close()
+            _robots = None
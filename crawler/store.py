@@ -0,0 +1,138 @@
+import sqlite3
+
+from threading import Thread, RLock, Event
+
+from utils.metrics import metrics
+
+
+class FrontierStore(object):
+    """
+    Write-behind persistence for the frontier save file.
+
+    Updates are buffered in memory and written to a SQLite database in WAL
+    mode, one transaction per batch. A batch is flushed once `batch_size`
+    updates are pending or `flush_interval` seconds have passed, and on close.
+    Because a batch holds every update made since the previous one and is
+    committed atomically, a crash loses at most the last few updates and never
+    leaves a url marked complete without the links discovered before it.
+    Every url is stored with its depth, the number of links from a seed,
+    which the frontier ranks pending urls by when a crawl is resumed.
+
+    Args:
+        path (str): The database file.
+        batch_size (int): Pending updates that trigger a flush.
+        flush_interval (float): Maximum seconds an update stays buffered.
+    """
+    def __init__(self, path, batch_size=1000, flush_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.lock = RLock()
+        self.pending = dict()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS urls ("
+            "urlhash TEXT PRIMARY KEY, url TEXT NOT NULL, "
+            "completed INTEGER NOT NULL, depth INTEGER NOT NULL DEFAULT 0)")
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(urls)")]
+        if "depth" not in columns:
+            # Save files written before urls had a depth.
+            self.db.execute(
+                "ALTER TABLE urls ADD COLUMN depth INTEGER NOT NULL DEFAULT 0")
+        # Index of incomplete urls only, so resuming never scans the rows of
+        # urls that were already downloaded.
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS pending ON urls(urlhash) "
+            "WHERE completed = 0")
+        self.db.commit()
+        self.closed = Event()
+        self.flusher = Thread(target=self._flush_periodically, daemon=True)
+        self.flusher.start()
+
+    def __contains__(self, urlhash):
+        with self.lock:
+            if urlhash in self.pending:
+                return True
+            return self.db.execute(
+                "SELECT 1 FROM urls WHERE urlhash = ?",
+                (urlhash,)).fetchone() is not None
+
+    def __len__(self):
+        with self.lock:
+            self.flush()
+            return self.db.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+
+    def __bool__(self):
+        with self.lock:
+            if self.pending:
+                return True
+            return self.db.execute(
+                "SELECT 1 FROM urls LIMIT 1").fetchone() is not None
+
+    def is_completed(self, urlhash):
+        with self.lock:
+            if urlhash in self.pending:
+                return self.pending[urlhash][1]
+            row = self.db.execute(
+                "SELECT completed FROM urls WHERE urlhash = ?",
+                (urlhash,)).fetchone()
+            return row is not None and bool(row[0])
+
+    def put(self, urlhash, url, completed, depth=0):
+        with self.lock:
+            self.pending[urlhash] = (url, completed, depth)
+            if len(self.pending) >= self.batch_size:
+                self.flush()
+
+    def pending_urls(self, chunk_size=1000):
+        """
+        Returns an iterator over (url, depth) for the urls that are not
+        completed, read through the pending index in chunks of `chunk_size`.
+
+        The query runs on its own connection and its snapshot is taken before
+        this returns, so urls added afterwards are never yielded twice and the
+        iterator can be consumed from another thread.
+        """
+        self.flush()
+        reader = sqlite3.connect(self.path, check_same_thread=False)
+        cursor = reader.execute(
+            "SELECT url, depth FROM urls INDEXED BY pending "
+            "WHERE completed = 0")
+        first = cursor.fetchmany(chunk_size)
+        return self._stream(reader, cursor, first, chunk_size)
+
+    def _stream(self, reader, cursor, rows, chunk_size):
+        try:
+            while rows:
+                yield from rows
+                rows = cursor.fetchmany(chunk_size)
+        finally:
+            reader.close()
+
+    def flush(self):
+        with self.lock:
+            if not self.pending:
+                return
+            batch = [
+                (urlhash, url, int(completed), depth)
+                for urlhash, (url, completed, depth) in self.pending.items()]
+            with metrics.timer("frontier.save.flush"), self.db:
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO urls VALUES (?, ?, ?, ?)", batch)
+            metrics.incr("frontier.save.rows", len(batch))
+            self.pending.clear()
+
+    def close(self):
+        if self.closed.is_set():
+            return
+        self.closed.set()
+        self.flusher.join()
+        with self.lock:
+            self.flush()
+            self.db.close()
+
+    def _flush_periodically(self):
+        while not self.closed.wait(self.flush_interval):
+            self.flush()
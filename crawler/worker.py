@@ -3,8 +3,12 @@ from threading import Thread
 from inspect import getsource
 from utils.download import download
 from utils import get_logger
+from utils.metrics import metrics
+from crawler.parser_pool import parse
+from crawler.page_cache import get_page_cache
+from crawler.robots import get_robots
+from utils.page import analyze_page
 import scraper
-import time
 
 
 class Worker(Thread):
@@ -12,6 +16,8 @@ class Worker(Thread):
         self.logger = get_logger(f"Worker-{worker_id}", "Worker")
         self.config = config
         self.frontier = frontier
+        self.page_cache = get_page_cache(config)
+        self.robots = get_robots(config)
         # basic check for requests in scraper
         assert {getsource(scraper).find(req) for req in {"from requests import", "import requests"}} == {-1}, "Do not use requests in scraper.py"
         assert {getsource(scraper).find(req) for req in {"from urllib.request import", "import urllib.request"}} == {-1}, "Do not use urllib.request in scraper.py"
@@ -23,12 +29,40 @@ class Worker(Thread):
             if not tbd_url:
                 self.logger.info("Frontier is empty. Stopping Crawler.")
                 break
-            resp = download(tbd_url, self.config, self.logger)
-            self.logger.info(
-                f"Downloaded {tbd_url}, status <{resp.status}>, "
-                f"using cache {self.config.cache_server}.")
-            scraped_urls = scraper.scraper(tbd_url, resp)
-            for scraped_url in scraped_urls:
-                self.frontier.add_url(scraped_url)
-            self.frontier.mark_url_complete(tbd_url)
-            time.sleep(self.config.time_delay)
+            try:
+                if not scraper.should_download(tbd_url) or (
+                        self.robots and not self.robots.allowed(tbd_url)):
+                    continue
+                cached = self.page_cache and self.page_cache.get(tbd_url)
+                if cached and self.page_cache.is_fresh(cached):
+                    # Analyzed recently, so neither downloaded nor parsed.
+                    metrics.incr("page_cache.hits")
+                    for scraped_url in scraper.record_cached_page(
+                            tbd_url, cached.digest, cached.analysis):
+                        self.frontier.add_url(scraped_url, tbd_url)
+                    continue
+                resp = download(tbd_url, self.config, self.logger)
+                self.logger.info(
+                    f"Downloaded {tbd_url}, status <{resp.status}>, "
+                    f"using cache {self.config.cache_server}.")
+                if scraper.should_analyze(tbd_url, resp):
+                    if cached and cached.is_unchanged(resp):
+                        metrics.incr("page_cache.revalidated")
+                        analysis = cached.analysis
+                    else:
+                        # Parsing runs in another process so it does not
+                        # hold the GIL; the results are merged back here.
+                        with metrics.timer("scraper.analyze_page"):
+                            analysis = parse(
+                                self.config, analyze_page, tbd_url,
+                                resp.status, resp.raw_response.content,
+                                resp.raw_response.url)
+                    if self.page_cache:
+                        self.page_cache.put(tbd_url, resp, analysis)
+                    for scraped_url in scraper.record_page(tbd_url, analysis):
+                        self.frontier.add_url(scraped_url, tbd_url)
+            except Exception:
+                self.logger.exception(f"Failed to process {tbd_url}.")
+            finally:
+                # Always release the url, or other workers wait on it forever.
+                self.frontier.mark_url_complete(tbd_url)
@@ -2,22 +2,49 @@ from configparser import ConfigParser
 from argparse import ArgumentParser
 
 from utils.server_registration import get_cache_server
+from utils import configure_logging
 from utils.config import Config
-from crawler import Crawler
+from utils.metrics import metrics
 
 
-def main(config_file, restart):
+def main(config_file, restart, engine=None, node_id=None):
+    # Imported here rather than at the top: the spawned parser processes
+    # import this module, and the crawler imports the scraper and all of its
+    # crawl state, which they do not need.
+    from crawler import Crawler
+    from crawler.async_crawler import AsyncCrawler
+    from crawler.frontier import Frontier
+    from crawler.partition import PartitionedFrontier
+
     cparser = ConfigParser()
     cparser.read(config_file)
     config = Config(cparser)
+    configure_logging(
+        config.log_levels, config.log_level, config.console_log_level)
+    if engine:
+        config.engine = engine
+    if node_id is not None:
+        config.node_id = node_id
     config.cache_server = get_cache_server(config, restart)
-    crawler = Crawler(config, restart)
-    crawler.start()
+    metrics.start(config.stats_file, config.stats_interval, config.metrics_port)
+    # With several nodes, each one crawls the hosts of its partition.
+    frontier_factory = (
+        PartitionedFrontier if config.node_count > 1 else Frontier)
+    if config.engine == "asyncio":
+        crawler = AsyncCrawler(config, restart, frontier_factory)
+    else:
+        crawler = Crawler(config, restart, frontier_factory)
+    try:
+        crawler.start()
+    finally:
+        metrics.close()
 
 
 if __name__ == "__main__":
     parser = ArgumentParser()
     parser.add_argument("--restart", action="store_true", default=False)
     parser.add_argument("--config_file", type=str, default="config.ini")
+    parser.add_argument("--engine", choices=("threads", "asyncio"), default=None)
+    parser.add_argument("--node", type=int, default=None)
     args = parser.parse_args()
-    main(args.config_file, args.restart)
+    main(args.config_file, args.restart, args.engine, args.node)
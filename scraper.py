@@ -1,116 +1,238 @@
-import re
-from collections import Counter, defaultdict
-from urllib.parse import urlparse, urljoin
-from bs4 import BeautifulSoup
-from simhash import Simhash
-
-seen_patterns = {}
-seen_links = set()
-visited_hashes = set()
-common_words_count = Counter()
-subdomain_pages = defaultdict(set)
-processed_count = 0
-
-# Global variable to store the longest page information
-longest_page = {"url": "", "word_count": 0}
-
-# Keep track of our stopwords to ignore
-stopwords = [
-    "a", "about", "above", "after", "again", "against", "all", "am", "an", "and", "any", 
-    "are", "aren't", "as", "at", "be", "because", "been", "before", "being", "below", 
-    "between", "both", "but", "by", "can't", "cannot", "could", "couldn't", "did", "didn't", 
-    "do", "does", "doesn't", "doing", "don't", "down", "during", "each", "few", "for", "from", 
-    "further", "had", "hadn't", "has", "hasn't", "have", "haven't", "having", "he", "he'd", 
-    "he'll", "he's", "her", "here", "here's", "hers", "herself", "him", "himself", "his", "how", 
-    "how's", "i", "i'd", "i'll", "i'm", "i've", "if", "in", "into", "is", "isn't", "it", "it's", 
-    "its", "itself", "let's", "me", "more", "most", "mustn't", "my", "myself", "no", "nor", 
-    "not", "of", "off", "on", "once", "only", "or", "other", "ought", "our", "ours", "ourselves", 
-    "out", "over", "own", "same", "shan't", "she", "she'd", "she'll", "she's", "should", 
-    "shouldn't", "so", "some", "such", "than", "that", "that's", "the", "their", "theirs", "them", 
-    "themselves", "then", "there", "there's", "these", "they", "they'd", "they'll", "they're", 
-    "they've", "this", "those", "through", "to", "too", "under", "until", "up", "very", "was", 
-    "wasn't", "we", "we'd", "we'll", "we're", "we've", "were", "weren't", "what", "what's", 
-    "when", "when's", "where", "where's", "which", "while", "who", "who's", "whom", "why", 
-    "why's", "with", "won't", "would", "wouldn't", "you", "you'd", "you'll", "you're", "you've", 
-    "your", "yours", "yourself", "yourselves"
-]
+from threading import RLock
+from utils import get_logger
+from utils.metrics import metrics
+from utils.page import Page, analyze_page
+from utils.seen import SeenSet
+from utils.simhash_index import SimhashIndex
+from utils.report import ReportWriter
+from utils.url_filter import UrlFilter
+from utils.trap_detector import TrapDetector, CountMinSketch
+from utils.content_gate import ContentGate
+
+logger = get_logger("SCRAPER")
+
+# Guards the crawl statistics below, which every worker folds its pages into
+state_lock = RLock()
+
+trap_detector = TrapDetector()
+seen_links = SeenSet()
+discovered_links = SeenSet()
+# Digests of the page contents analyzed so far, for exact duplicates
+page_digests = SeenSet()
+# Approximate number of pages linking to each url, for the frontier order
+inlink_counts = CountMinSketch(width_bits=20, depth=3)
+# Pages are near-duplicates when their SimHashes differ in fewer than 5 bits
+visited_hashes = SimhashIndex(max_distance=4)
+# Unique pages, longest page, common words and subdomains, written periodically
+reports = ReportWriter(interval=10.0)
+# Responses that are too large, binary or link farms are dropped unparsed,
+# and the hosts and directories serving them are skipped from then on
+content_gate = ContentGate(
+    # Content types parsed as pages; "" is a response without a Content-Type
+    page_types=["text/html", "application/xhtml+xml", "text/plain", ""])
+
+
+def configure(config):
+    """
+    Applies the crawl settings of config.ini to the scraper. Called once by
+    the crawler before it starts.
+
+    Args:
+        config (Config): The crawl configuration.
+    """
+    content_gate.max_bytes = config.max_page_bytes
+    content_gate.max_links = config.max_page_links
+
 
 def scraper(url, resp):
-    global processed_count
-    print(f"Scraper called for URL: {url}")
+    logger.debug("Scraper called for URL: %s", url)
     # Check the url being passed into scraper
     #### check if it's empty
     #### call is valid
     #### check if unique
     #### not a trap
-
-    # Makes sure we skip already seen links
-    if url in seen_links:
-        return []
-    
-    # Checks if url and its content has a trap or if is empty, if so, skip over
-    if check_trap(url) or empty_URL(resp) or not is_valid(url):
-        print(f"No information or trap detected for URL {url}, skipping...")
+    if not should_analyze(url, resp):
         return []
-    
+
+    with metrics.timer("scraper.analyze_page"):
+        analysis = analyze_page(
+            url, resp.status, resp.raw_response.content, resp.raw_response.url)
+    return record_page(url, analysis)
+
+
+@metrics.timed("scraper.should_analyze")
+def should_analyze(url, resp):
+    """
+    Cheap checks run before a page is parsed.
+
+    Args:
+        url (str): The URL that was downloaded.
+        resp (Response): The response object for the given URL content
+
+    Returns:
+        bool: True if the page should be parsed and analyzed.
+    """
+    if not should_visit(url):
+        return False
+
+    # Only pages that downloaded fine are parsed; the others are never decoded
+    if resp.status != 200:
+        logger.debug("Status %s for URL %s, skipping...", resp.status, url)
+        return False
+
+    # Checks the size, type and first bytes before anything is parsed
+    reason = content_gate.check(url, resp)
+    if reason:
+        logger.debug("%s for URL %s, skipping...", reason, url)
+        metrics.incr("scraper.gated")
+        return False
+
+    # Checks if the content is empty
+    if empty_URL(resp):
+        logger.debug("No information for URL %s, skipping...", url)
+        return False
+
     # Check if `resp.raw_response` and `resp.raw_response.content` are available
     if not resp.raw_response or not resp.raw_response.content:
-        print(f"No content available for {url}, skipping...")
-        return []
+        logger.debug("No content available for %s, skipping...", url)
+        return False
+
+    # Exact copies of an earlier page (mirrors, http and https) are not parsed
+    return is_new_content(url, resp.content_digest)
+
+
+def should_download(url):
+    """
+    Returns False for urls on hosts or in directories that only served
+    responses the content gate dropped.
+    """
+    if content_gate.is_blocked(url):
+        logger.debug("Blocked host or directory for URL %s, skipping...", url)
+        metrics.incr("scraper.blocked")
+        return False
+    return True
+
+
+def should_visit(url):
+    """
+    Returns True if url was not processed before, is allowed and is not a trap.
+    """
+    with state_lock:
+        # Makes sure we skip already processed pages
+        if url in seen_links:
+            return False
     
-    if not has_high_textual_content(resp.raw_response.content):
-        print(f"[DEBUG] Low textual content detected for URL {url}, skipping...")
-        return []
+        # Checks if url has a trap or is not allowed, if so, skip over
+        if check_trap(url) or not is_valid(url):
+            logger.debug("No information or trap detected for URL %s, skipping...", url)
+            return False
+    return True
+
+
+def is_new_content(url, digest):
+    """
+    Returns True the first time a page content digest is seen in the crawl.
+
+    Args:
+        url (str): The URL of the page.
+        digest (str): The digest of the page content, see Response.content_digest.
+    """
+    if not page_digests.add(digest):
+        logger.debug("Exact duplicate page detected for URL %s, skipping...", url)
+        metrics.incr("scraper.exact_duplicates")
+        return False
+    return True
+
+
+@metrics.timed("scraper.record_page")
+def record_page(url, analysis):
+    """
+    Folds a page analysis into the crawl statistics.
+
+    Args:
+        url (str): The URL that was downloaded.
+        analysis (PageAnalysis): The result of analyze_page.
+
+    Returns:
+        iterable: The links that were not discovered before.
+    """
+    with state_lock:
+        if analysis is None:
+            logger.debug("Low textual content detected for URL %s, skipping...", url)
+            metrics.incr("scraper.low_text_pages")
+            return []
+
+        # Check if the page is similar to others seen before or if it lacks information
+        if is_similar_page(analysis.fingerprint):
+            logger.debug("Similar or low-information page detected for URL %s, skipping...", url)
+            metrics.incr("scraper.near_duplicates")
+            return []
     
-    # Process content to evaluate similarity and information quality
-    soup = BeautifulSoup(resp.raw_response.content, 'html.parser')
-    text_content = soup.get_text(separator=' ', strip=True)
-    word_count = len(re.findall(r'\b\w+\b', text_content.lower()))
-
-    # Check if the page is similar to others seen before or if it lacks information
-    if is_similar_page(text_content):
-        print(f"[DEBUG] Similar or low-information page detected for URL {url}, skipping...")
+        # Otherwise, add the page to our seen set
+        seen_links.add(url)
+
+    if analysis.status == 200:
+        # Longest page and common words only count pages that downloaded fine
+        reports.add_page(url, analysis.content_word_count, analysis.word_counts)
+    else:
+        reports.add_page(url)
+
+    logger.debug("Total links extracted: %d", len(analysis.links))
+    metrics.incr("scraper.pages")
+    metrics.incr("scraper.links", len(analysis.links))
+
+    # Only hand back links that no earlier page has produced
+    return discover_links(analysis.links)
+
+
+def record_cached_page(url, digest, analysis):
+    """
+    Folds in a page analyzed by an earlier crawl, without downloading it.
+
+    Args:
+        url (str): The URL of the page.
+        digest (str): The digest of the page content.
+        analysis (PageAnalysis): The cached result of analyze_page.
+
+    Returns:
+        iterable: The links that were not discovered before.
+    """
+    if not should_visit(url) or not is_new_content(url, digest):
         return []
-    
-    if resp.status == 200 and resp.raw_response and resp.raw_response.content:
-        # Update the longest page if the current page has more words
-        update_longest_page(url, resp.raw_response.content)
-        most_common_words(resp.raw_response.content)
-    
-    # Otherwise, add the link to our seen set
-    seen_links.add(url)
-    add_to_subdomains(url)
-    
-    # Increment the processed counter
-    processed_count += 1
-    
-    # Checkpoint: save subdomain info every 100 URLs processed
-    if processed_count % 100 == 0:
-        print("[DEBUG] Checkpoint reached. Saving subdomain information.")
-        save_subdomain_info()
-    
+    return record_page(url, analysis)
 
-    # Extract all links found in our URL
-    links = extract_next_links(url, resp)
 
-    # Check each link thats been extracted
-    for link in links:
+def discover_links(links):
+    """
+    Yields each valid link the first time it is seen anywhere in the crawl,
+    and again when its count of linking pages reaches 2, 4, 8 and 16, so the
+    frontier can move it up.
+
+    Links are streamed so the frontier can consume them as they are produced,
+    and duplicates within the same page are dropped as well.
 
-        # call is valid and we have not added link yet
-        if is_valid(link) and link not in seen_links:
+    Args:
+        links (iterable): Absolute links extracted from a page.
 
-            # add valid link to our seen_extracted set
-            seen_links.add(link)
+    Yields:
+        str: Valid links that were not discovered before.
+    """
+    # Validate the whole page at once, then keep links we have not added yet
+    for link in dict.fromkeys(url_filter.filter(links)):
+        if content_gate.is_blocked(link):
+            continue
+        inlinks = inlink_counts.add(link)
+        if discovered_links.add(link) or (
+                inlinks <= 16 and not inlinks & (inlinks - 1)):
+            yield link
 
-    print(f"[DEBUG] Unique valid links extracted from {url}: {list(seen_links)}")
 
-    save_unique_pages()
-    save_most_common_words()
-    
-    return list(seen_links)
+def inlink_count(url):
+    """ The approximate number of pages that link to url. """
+    return max(1, inlink_counts.estimate(url))
 
 
-def extract_next_links(url, resp):
+def extract_next_links(url, resp, page=None):
     # Implementation required.
     # url: the URL that was used to get the page
     # resp.url: the actual url of the page
@@ -120,88 +242,57 @@ def extract_next_links(url, resp):
     #         resp.raw_response.url: the url, again
     #         resp.raw_response.content: the content of the page!
     # Return a list with the hyperlinks (as strings) scrapped from resp.raw_response.content
-    print(f"Extracting links from: {url}")
+    logger.debug("Extracting links from: %s", url)
     if resp.status != 200 or not resp.raw_response:
         return[]
 
     # Step 2: Check if `raw_response` and `raw_response.content` are available
     if not resp.raw_response or not resp.raw_response.content:
-        print(f"No content available for {url}")
+        logger.debug("No content available for %s", url)
         return []
 
-    # Parse the content of the page
-    soup = BeautifulSoup(resp.raw_response.content, 'html.parser')
+    # Reuse the already parsed page when the caller has one
+    if page is None:
+        page = Page(url, resp.raw_response.content, resp.raw_response.url)
 
-    links = []
+    # Absolute links with fragments removed
+    links = page.links
 
-    for link in soup.find_all('a', href = True):
-        href = link['href']
-        absolute_link = urljoin(resp.raw_response.url, link['href'])
+    logger.debug("Total links extracted: %d", len(links))
+    return links
 
-        # Removes fragments
-        absolute_link = urlparse(absolute_link)._replace(fragment="").geturl()
-        links.append(absolute_link)
+# Crawl rules, compiled once and shared by every is_valid call
+url_filter = UrlFilter(
+    # Allowed domains and all of their subdomains
+    domains=["ics.uci.edu", "cs.uci.edu", "informatics.uci.edu", "stat.uci.edu"],
+    # Hosts that are only allowed under some paths
+    path_prefixes={
+        "today.uci.edu": ["/department/information_computer_sciences"]},
+    # File extensions that are not web pages
+    extensions=[
+        "css", "js", "bmp", "gif", "jpeg", "jpg", "ico",
+        "png", "tiff", "tif", "mid", "mp2", "mp3", "mp4",
+        "wav", "avi", "mov", "mpeg", "ram", "m4v", "mkv", "ogg", "ogv", "pdf",
+        "ps", "eps", "tex", "ppt", "pptx", "doc", "docx", "xls", "xlsx", "names",
+        "data", "dat", "exe", "bz2", "tar", "msi", "bin", "7z", "psd", "dmg", "iso",
+        "epub", "dll", "cnf", "tgz", "sha1",
+        "thmx", "mso", "arff", "rtf", "jar", "csv",
+        "rm", "smil", "wmv", "swf", "wma", "zip", "rar", "gz"])
 
-    print(f"Total links extracted: {len(links)}")
-    return links
 
 def is_valid(url):
     # Decide whether to crawl this url or not. 
     # If you decide to crawl it, return True; otherwise return False.
     # There are already some conditions that return False.
-    print(f"Validating URL: {url}")
-    try:
-        usel = urlparse(url)._replace(fragment="").geturl()
-        parsed = urlparse(usel)
-
-        if parsed.scheme not in set(["http", "https"]):
-            return False
+    return url_filter.is_valid(url)
 
-        # check if the URL belongs to allowed domains and paths
-        if re.match(r"(.*\.)?(ics|cs|informatics|stat)\.uci\.edu$", parsed.netloc):
-            pass
-        elif parsed.netloc == "today.uci.edu" and parsed.path.startswith("/department/information_computer_sciences"):
-            pass
-        else:
-            return False
-        
-        return not re.match(
-            r".*\.(css|js|bmp|gif|jpe?g|ico"
-            + r"|png|tiff?|mid|mp2|mp3|mp4"
-            + r"|wav|avi|mov|mpeg|ram|m4v|mkv|ogg|ogv|pdf"
-            + r"|ps|eps|tex|ppt|pptx|doc|docx|xls|xlsx|names"
-            + r"|data|dat|exe|bz2|tar|msi|bin|7z|psd|dmg|iso"
-            + r"|epub|dll|cnf|tgz|sha1"
-            + r"|thmx|mso|arff|rtf|jar|csv"
-            + r"|rm|smil|wmv|swf|wma|zip|rar|gz)$", parsed.path.lower())
-
-    except TypeError:
-        print ("TypeError for ", parsed)
-        raise
-
-def extract_pattern(url):
-    # Parse the URL
-    parsed = urlparse(url)
-    
-    # Replace digit sequences in the path with "[digit]"
-    path_pattern = re.sub(r'\d+', '[digit]', parsed.path)
-    
-    # Rebuild the URL pattern with the modified path
-    url_pattern = f"{parsed.scheme}://{parsed.netloc}{path_pattern}"
-    
-    return url_pattern
 
 def check_trap(url) -> bool:
-    pattern = extract_pattern(url)  # Get the URL pattern with placeholders for digits
-    
-    if pattern not in seen_patterns:
-        seen_patterns[pattern] = 1
-    
-    seen_patterns[pattern] += 1  # Increment count for this pattern
-    
-    # Threshold for pattern repetition (e.g., more than 10 occurrences)
-    if seen_patterns[pattern] > 10:
-        print(f"[DEBUG] Trap detected for pattern: {pattern}")
+    # Repeated url patterns, query and calendar explosions, repeated path segments
+    reason = trap_detector.is_trap(url)
+    if reason:
+        logger.debug("Trap detected: %s", reason)
+        metrics.incr("scraper.traps")
         return True
 
     return False
@@ -227,152 +318,21 @@ def empty_URL(resp):
             return True  # Empty URL
     return False  # Not empty URL
 
-def has_high_textual_content(content):
-    """
-    Determines if a page has high textual information content based on the text-to-HTML ratio
-    and the presence of meaningful keywords.
-
-    Args:
-        content (bytes): The raw HTML content of the page.
-
-    Returns:
-        bool: True if the page is deemed to have high textual information, otherwise False.
-    """
-    if not content:
-        print("Debug: No content provided.")
-        return False
-    
-    # Parse the page content using BeautifulSoup
-    soup = BeautifulSoup(content, 'html.parser')
-    print("Debug: Parsed HTML content with BeautifulSoup.")
-
-    # Extract text content from the HTML
-    text_content = soup.get_text(separator=' ', strip=True)
-    print("Debug: Extracted text content.")
-    
-    # Count the number of words
-    words = re.findall(r'\b\w+\b', text_content.lower())
-    word_count = len(words)
-    print(f"Debug: Word count = {word_count}")
-
-    # Check if word count meets threshold
-    if word_count < 100:
-        print("Debug: Page does not have significant textual content.")
-        return False
-    else:
-        print("Debug: Page has significant textual content.")
-        return True
-    
-    
-def is_similar_page(content):
+def is_similar_page(fingerprint):
     """
     Detects if a page is similar to previously seen pages by comparing SimHash values.
 
     Args:
-        content (str): The text content of the page.
+        fingerprint (int): The integer SimHash value of the page text.
 
     Returns:
         bool: True if the page is similar to existing pages, False otherwise.
     """
-    # Generate SimHash for the content
-    current_hash = Simhash(content)
-    current_hash_value = current_hash.value  # Get the integer representation of the Simhash
-
-    for existing_hash_value in visited_hashes:
-        # Create a Simhash object from the stored integer value to compare distances
-        existing_hash = Simhash(existing_hash_value)
-        # Check for similarity using SimHash's Hamming distance
-        if current_hash.distance(existing_hash) < 5:  # threshold of 5 can be adjusted
-            print("[DEBUG] Similar page detected, skipping...")
-            return True
+    # Only fingerprints sharing a block with ours are compared
+    if fingerprint in visited_hashes:
+        logger.debug("Similar page detected, skipping...")
+        return True
 
     # If not similar, add the integer hash to visited_hashes
-    visited_hashes.add(current_hash_value)
+    visited_hashes.add(fingerprint)
     return False
-
-def save_unique_pages():
-    with open('unique_pages.txt', 'w') as file:
-        file.write(f"Total Unique Pages: {len(seen_links)}\n")
-
-
-# def update_longest_page(url, word_count):
-#     global longest_page
-#     if word_count > longest_page["word_count"]:
-#         longest_page["url"] = url
-#         longest_page["word_count"] = word_count
-#         print(f"[DEBUG] New longest page found: {url} with {word_count} words.")
-        
-#         # Save the longest page information to a file
-#         with open("longest_page.txt", "w") as file:
-#             file.write(f"Longest Page URL: {url}\n")
-#             file.write(f"Word Count: {word_count}\n")
-
-
-def update_longest_page(url, html_content):
-    global longest_page
-    
-    # Parse the HTML content
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    # Remove unwanted tags like <script>, <style>, <nav>, <footer>, <header>, and <aside>
-    for tag in soup(['script', 'style', 'nav', 'footer', 'header', 'aside']):
-        tag.decompose()
-    
-    # Extract the visible text content
-    text_content = soup.get_text(separator=' ', strip=True)
-    
-    # Count the number of words using a regular expression
-    words = re.findall(r'\b[a-zA-Z]{3,}\b', text_content.lower())  # Words of 3 or more letters
-    word_count = len(words)
-    
-    # Update the longest page if the current page has more words
-    if word_count > longest_page["word_count"]:
-        longest_page["url"] = url
-        longest_page["word_count"] = word_count
-        print(f"[DEBUG] New longest page found: {url} with {word_count} words.")
-        
-        # Save the longest page information to a file
-        with open("longest_page.txt", "w") as file:
-            file.write(f"Longest Page URL: {url}\n")
-            file.write(f"Word Count: {word_count}\n")
-
-
-def most_common_words(html_content):
-    word_counts = count_words_in_content(html_content)
-    common_words_count.update(word_counts)
-
-
-def count_words_in_content(html_content):
-    """
-    Returns a counter object of every word in the content and its count, filtering out stop words
-    """
-    soup = BeautifulSoup(html_content, 'html.parser')
-    text = soup.get_text()
-    words = re.findall(r'\b\w+\b', text.lower())
-    filtered_words = [word for word in words if word not in stopwords and len(word) > 2]
-    return Counter(filtered_words)
-
-def save_most_common_words():
-    with open('common_words.txt', 'w') as file:
-        file.write("Most Common Words:\n")
-        for word, count in common_words_count.most_common(50):
-            file.write(f"{word}: {count}\n")
-            
-def add_to_subdomains(url):
-    parsed_url = urlparse(url)
-    if parsed_url.netloc.endswith("uci.edu"):
-        subdomain = parsed_url.netloc  # Get the full subdomain, e.g., "vision.ics.uci.edu"
-        subdomain_pages[subdomain].add(url)  # Add unique URL to the set
-        
-def save_subdomain_info():
-    with open('subdomains.txt', 'w') as file:
-        for subdomain, urls in sorted(subdomain_pages.items()):
-            if urls:
-                example_url = next(iter(urls))
-                parsed_url = urlparse(example_url)
-                scheme = parsed_url.scheme
-                netloc = parsed_url.netloc
-
-                formatted_subdomain = f"{scheme}://{netloc}"
-                file.write(f"{formatted_subdomain}, {len(urls)}\n")
-                
\ No newline at end of file
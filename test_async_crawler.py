@@ -0,0 +1,51 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import scraper
+from benchmarks.cache_server import SiteGraph, FakeCacheServer
+from crawler.async_crawler import AsyncCrawler, aiohttp
+from utils.report import ReportWriter
+from test_frontier import make_config
+
+
+@unittest.skipIf(aiohttp is None, "the asyncio engine needs aiohttp")
+class TestAsyncCrawler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_crawls_every_page_of_the_graph(self):
+        # No traps, copies or errors, so every page is kept.
+        graph = SiteGraph(
+            page_count=40, host_count=4, trap_hosts=0, near_duplicates=0.0,
+            errors=0.0, seed=10)
+        server = FakeCacheServer(graph).start()
+        reports = ReportWriter(directory=self.tmpdir)
+        try:
+            config = make_config(
+                os.path.join(self.tmpdir, "frontier.db"), graph.seed_urls)
+            config.cache_server = server.address
+            config.concurrency = 8
+            config.parser_processes = 1
+            with mock.patch.object(scraper, "reports", reports):
+                AsyncCrawler(config, True).start()
+        finally:
+            reports.close()
+            server.stop()
+        urls = [graph.page_url(number) for number in range(40)]
+        self.assertEqual(
+            [url for url in urls if url not in scraper.seen_links], [])
+        with open(os.path.join(self.tmpdir, "unique_pages.txt")) as file:
+            self.assertEqual(file.read(), "Total Unique Pages: 40\n")
+        # Every page once, and the home page of every host, which is a 404
+        self.assertEqual(server.requests, len(urls) + len(graph.hosts))
+
+
+if __name__ == "__main__":
+    unittest.main()
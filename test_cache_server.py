@@ -0,0 +1,77 @@
+import unittest
+from collections import Counter
+
+from benchmarks.cache_server import SiteGraph, FakeCacheServer
+from utils.download import download
+from utils.page import Page
+from test_download import StandInConfig
+
+
+class TestSiteGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = SiteGraph(page_count=200, host_count=5, errors=0.1)
+
+    def test_pages_are_deterministic(self):
+        url = self.graph.page_url(17)
+        self.assertEqual(
+            self.graph.lookup(url),
+            SiteGraph(page_count=200, host_count=5, errors=0.1).lookup(url))
+
+    def test_every_page_is_reachable_from_the_seed(self):
+        status, content = self.graph.lookup(self.graph.page_url(41))
+        self.assertEqual(status, 200)
+        self.assertIn(self.graph.page_url(42), Page("", content).links)
+
+    def test_traps_duplicates_and_errors(self):
+        statuses, copies, calendars = set(), list(), list()
+        for number in range(200):
+            status, content = self.graph.lookup(self.graph.page_url(number))
+            statuses.add(status)
+            if status == 200:
+                for link in Page("", content).links:
+                    if link.endswith("?print=yes"):
+                        copies.append(link)
+                    elif "/events/calendar" in link:
+                        calendars.append(link)
+        self.assertEqual(statuses, {200, 404})
+        self.assertTrue(copies)
+
+        # A printable copy differs from its page in one word.
+        original = Page("", self.graph.lookup(copies[0].split("?")[0])[1])
+        copy = Page("", self.graph.lookup(copies[0])[1])
+        self.assertEqual(original.stats.word_count, copy.stats.word_count)
+        before, after = original.stats.word_counts(), copy.stats.word_counts()
+        self.assertEqual(after - before, Counter(printable=1))
+        self.assertEqual(sum((before - after).values()), 1)
+
+        # The calendar never ends.
+        url = calendars[0]
+        for _ in range(50):
+            status, content = self.graph.lookup(url)
+            self.assertEqual(status, 200)
+            # The first calendar link is the next day.
+            url = [
+                link for link in Page("", content).links
+                if "/events/calendar" in link][0]
+        self.assertIn("2024-02-20", url)
+        self.assertEqual(self.graph.lookup("https://www.ics.uci.edu/")[0], 404)
+
+
+class TestFakeCacheServer(unittest.TestCase):
+
+    def test_download_from_the_fake_server(self):
+        graph = SiteGraph(page_count=50)
+        server = FakeCacheServer(graph).start()
+        try:
+            resp = download(graph.seed_urls[0], StandInConfig(server.address))
+        finally:
+            server.stop()
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(resp.raw_response.url, graph.seed_urls[0])
+        self.assertIn(b"<main>", resp.raw_response.content)
+        self.assertEqual(server.requests, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+
+import scraper
+from utils.content_gate import ContentGate
+from test_frontier import make_config
+from test_response import make_response
+
+PAGE_TYPES = ["text/html", "text/plain", ""]
+
+
+class TestContentGate(unittest.TestCase):
+
+    def setUp(self):
+        self.gate = ContentGate(
+            PAGE_TYPES, max_bytes=10000, max_links=5, directory_limit=3,
+            host_limit=4)
+
+    def check(self, url, content, content_type="text/html"):
+        headers = {"Content-Type": content_type} if content_type else None
+        return self.gate.check(url, make_response(url, content, headers))
+
+    def test_pages_pass(self):
+        self.assertIsNone(self.check(
+            "https://a.ics.uci.edu/page", b"<html><a href='/x'>x</a></html>"))
+        self.assertIsNone(self.check(
+            "https://a.ics.uci.edu/notes", b"plain text", None))
+
+    def test_oversized_responses_are_not_unpickled(self):
+        url = "https://a.ics.uci.edu/dump"
+        resp = make_response(
+            url, b"<p>row</p>" * 2000, {"Content-Type": "text/html"})
+        self.assertIn("bytes", self.gate.check(url, resp))
+        self.assertIsNotNone(resp._payload)
+
+    def test_binary_and_link_farms(self):
+        url = "https://a.ics.uci.edu/paper"
+        self.assertIn("application/pdf", self.check(
+            url, b"%PDF-1.4", "application/pdf"))
+        # Extensionless files served as html or without a type are sniffed
+        self.assertEqual(self.check(url, b"%PDF-1.4 ..."), "Binary content")
+        self.assertEqual(
+            self.check(url, b"\x00\x01\x02 data", None), "Binary content")
+        self.assertEqual(
+            self.check(url, b"<a href=x>" * 3 + b"<A HREF=y>" * 3), "6 links")
+
+    def test_rejections_block_directories_and_hosts(self):
+        for number in range(3):
+            self.check(
+                f"https://a.ics.uci.edu/data/dump{number}", b"%PDF-1.4")
+        self.assertTrue(self.gate.is_blocked("https://a.ics.uci.edu/data/next"))
+        self.assertFalse(self.gate.is_blocked("https://a.ics.uci.edu/other"))
+
+        # A directory that also served a page stays open
+        self.check("https://a.ics.uci.edu/mixed/page", b"<html></html>")
+        for number in range(5):
+            self.check(
+                f"https://a.ics.uci.edu/mixed/dump{number}", b"%PDF-1.4")
+        self.assertFalse(
+            self.gate.is_blocked("https://a.ics.uci.edu/mixed/next"))
+
+        # A host is blocked after host_limit rejections, unless it served pages
+        for number in range(4):
+            self.check(f"https://b.ics.uci.edu/{number}/file", b"\x00")
+        self.assertTrue(self.gate.is_blocked("https://b.ics.uci.edu/new/page"))
+        self.assertFalse(self.gate.is_blocked("https://a.ics.uci.edu/new/page"))
+
+    def test_rejection_counts_use_fixed_memory(self):
+        rows = [len(row) for row in self.gate.rejected_directories.rows]
+        for number in range(2000):
+            self.check(f"https://c{number}.ics.uci.edu/d/file", b"\x00")
+        self.assertEqual(
+            [len(row) for row in self.gate.rejected_directories.rows], rows)
+        # Only the hosts and directories that reached their limit are kept
+        self.assertEqual(self.gate.blocked_directories, set())
+        self.assertEqual(self.gate.blocked_hosts, set())
+
+    def test_scraper_limits_come_from_the_config(self):
+        config = make_config("frontier.db", ["https://www.ics.uci.edu"])
+        self.assertEqual(config.max_page_bytes, 2 << 20)
+        self.assertEqual(config.max_page_links, 3000)
+        config.max_page_bytes, config.max_page_links = 5000, 2
+        html = {"Content-Type": "text/html"}
+        url = "https://gate.ics.uci.edu/page"
+        scraper.configure(config)
+        try:
+            self.assertEqual(scraper.content_gate.check(
+                url, make_response(url, b"<a href=x>" * 3, html)), "3 links")
+            self.assertIn("bytes", scraper.content_gate.check(
+                url, make_response(url, b"<p>row</p>" * 500, html)))
+        finally:
+            scraper.configure(
+                make_config("frontier.db", ["https://www.ics.uci.edu"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import pickle
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import cbor
+import requests
+
+from utils import download as download_module
+from utils.download import download
+
+
+class StandInCacheHandler(BaseHTTPRequestHandler):
+    """ Answers like the cache server: a cbor map holding a pickled response. """
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.clients.add(self.client_address)
+            failing = server.failures > 0
+            if failing:
+                server.failures -= 1
+        if server.delay:
+            time.sleep(server.delay)
+        if failing:
+            self._reply(503, b"")
+            return
+        url = parse_qs(urlparse(self.path).query)["q"][0]
+        raw = requests.models.Response()
+        raw.status_code = 200
+        raw.url = url
+        raw._content = b"<html><body>stand-in page</body></html>"
+        self._reply(200, cbor.dumps({
+            "url": url, "status": 200, "response": pickle.dumps(raw)}))
+
+    def _reply(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInConfig(object):
+    def __init__(self, cache_server, timeout=2.0, retries=3):
+        self.cache_server = cache_server
+        self.user_agent = "IR UF24 test"
+        self.download_timeout = timeout
+        self.download_retries = retries
+        self.download_backoff = 0.01
+
+
+class TestDownload(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInCacheHandler)
+        self.server.daemon_threads = True
+        # Clients that timed out close their end before the reply is sent.
+        self.server.handle_error = lambda request, client_address: None
+        self.server.lock = threading.Lock()
+        self.server.requests = 0
+        self.server.clients = set()
+        self.server.failures = 0
+        self.server.delay = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.cache_server = self.server.server_address
+        # Every test starts without a pooled connection.
+        download_module._sessions.session = None
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        download_module._sessions.session = None
+
+    def test_reuses_connection(self):
+        config = StandInConfig(self.cache_server)
+        for i in range(50):
+            resp = download(f"https://www.ics.uci.edu/{i}", config)
+            self.assertEqual(resp.status, 200)
+            self.assertEqual(resp.url, f"https://www.ics.uci.edu/{i}")
+
+        for i in range(50):
+            requests.get(
+                f"http://{self.cache_server[0]}:{self.cache_server[1]}/",
+                params=[("q", f"https://www.ics.uci.edu/{i}"), ("u", "test")])
+
+        # All pooled downloads went over a single keep-alive connection.
+        self.assertEqual(self.server.requests, 100)
+        self.assertEqual(len(self.server.clients), 51)
+
+    def test_retries_server_errors(self):
+        self.server.failures = 2
+        resp = download(
+            "https://www.ics.uci.edu/", StandInConfig(self.cache_server))
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(self.server.requests, 3)
+
+    def test_gives_up_after_retries(self):
+        self.server.failures = 10
+        resp = download(
+            "https://www.ics.uci.edu/",
+            StandInConfig(self.cache_server, retries=2))
+        self.assertEqual(resp.status, 503)
+        self.assertEqual(self.server.requests, 3)
+
+    def test_timeout(self):
+        self.server.delay = 0.5
+        resp = download(
+            "https://www.ics.uci.edu/",
+            StandInConfig(self.cache_server, timeout=0.1, retries=1))
+        self.assertEqual(resp.status, 0)
+        self.assertIsNotNone(resp.error)
+
+
+if __name__ == "__main__":
+    unittest.main()
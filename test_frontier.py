@@ -0,0 +1,318 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from collections import Counter
+from configparser import ConfigParser
+
+from crawler.frontier import Frontier
+from crawler.priority import ScorePolicy
+from crawler.store import FrontierStore
+from utils import get_urlhash
+from utils.config import Config
+
+
+def make_config(save_file, seed_urls, time_delay=0.0, threads_count=1):
+    cparser = ConfigParser()
+    cparser.read_dict({
+        "IDENTIFICATION": {"USERAGENT": "IR UF24 test"},
+        "CONNECTION": {"HOST": "localhost", "PORT": "9000"},
+        "CRAWLER": {
+            "SEEDURL": ",".join(seed_urls),
+            "POLITENESS": str(time_delay)},
+        "LOCAL PROPERTIES": {
+            "SAVE": save_file, "THREADCOUNT": str(threads_count)},
+    })
+    return Config(cparser)
+
+
+class TestFrontierConcurrency(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.save_file = os.path.join(self.tmpdir, "frontier.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_many_workers_process_every_url_once(self):
+        # Every page n links to 2n+1 and 2n+2 on one of a few hosts, so the
+        # frontier keeps running dry while other workers are still adding.
+        hosts = [f"https://h{i}.ics.uci.edu" for i in range(8)]
+        limit = 2000
+        seed = f"{hosts[0]}/0"
+        frontier = Frontier(make_config(self.save_file, [seed]), True)
+
+        processed = []
+        processed_lock = threading.Lock()
+
+        def work():
+            while True:
+                url = frontier.get_tbd_url()
+                if url is None:
+                    break
+                n = int(url.rsplit("/", 1)[1])
+                for child in (2 * n + 1, 2 * n + 2):
+                    if child < limit:
+                        frontier.add_url(f"{hosts[child % len(hosts)]}/{child}")
+                with processed_lock:
+                    processed.append(url)
+                frontier.mark_url_complete(url)
+
+        workers = [threading.Thread(target=work) for _ in range(32)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=60)
+            self.assertFalse(worker.is_alive())
+
+        self.assertEqual(len(processed), limit)
+        self.assertEqual(len(set(processed)), limit)
+        self.assertTrue(frontier.finished.is_set())
+        self.assertEqual(frontier.in_flight, 0)
+        self.assertIsNone(frontier.get_tbd_url())
+        frontier.close()
+
+    def test_politeness_per_host(self):
+        urls = [f"https://a.ics.uci.edu/{i}" for i in range(3)]
+        frontier = Frontier(make_config(self.save_file, urls, 0.1), True)
+        times = []
+        while True:
+            url = frontier.get_tbd_url()
+            if url is None:
+                break
+            times.append(time.monotonic())
+            frontier.mark_url_complete(url)
+        frontier.close()
+        self.assertEqual(len(times), 3)
+        for earlier, later in zip(times, times[1:]):
+            self.assertGreaterEqual(later - earlier, 0.09)
+
+    def test_host_is_busy_until_its_url_is_complete(self):
+        urls = [f"https://a.ics.uci.edu/{i}" for i in range(2)]
+        frontier = Frontier(make_config(self.save_file, urls, 0.05), True)
+        first = frontier.get_tbd_url()
+        handed_out = []
+        waiter = threading.Thread(
+            target=lambda: handed_out.append(
+                (frontier.get_tbd_url(), time.monotonic())))
+        waiter.start()
+        # A fetch slower than the delay keeps the host from other workers
+        time.sleep(0.2)
+        self.assertEqual(handed_out, [])
+        completed = time.monotonic()
+        frontier.mark_url_complete(first)
+        waiter.join(timeout=5)
+        [(second, handed_at)] = handed_out
+        self.assertNotEqual(second, first)
+        self.assertGreaterEqual(handed_at - completed, 0.045)
+        frontier.mark_url_complete(second)
+        frontier.close()
+
+    def test_resume_from_save_file(self):
+        seed = "https://www.ics.uci.edu/a"
+        frontier = Frontier(make_config(self.save_file, [seed]), True)
+        url = frontier.get_tbd_url()
+        frontier.add_url("https://www.ics.uci.edu/b")
+        frontier.add_url("https://www.ics.uci.edu/c")
+        frontier.mark_url_complete(url)
+        frontier.close()
+
+        frontier = Frontier(make_config(self.save_file, [seed]), False)
+        resumed = set()
+        while True:
+            url = frontier.get_tbd_url()
+            if url is None:
+                break
+            resumed.add(url)
+            frontier.mark_url_complete(url)
+        frontier.close()
+        self.assertEqual(
+            resumed, {"https://www.ics.uci.edu/b", "https://www.ics.uci.edu/c"})
+
+
+    def test_workers_drain_while_the_save_file_loads(self):
+        hosts = [f"https://h{i}.ics.uci.edu" for i in range(200)]
+        pending = [f"{hosts[n % len(hosts)]}/page/{n}" for n in range(20000)]
+        store = FrontierStore(self.save_file)
+        for url in pending:
+            store.put(get_urlhash(url), url, False, 1)
+        for n in range(1000):
+            url = f"{hosts[n % len(hosts)]}/done/{n}"
+            store.put(get_urlhash(url), url, True, 1)
+        for n in range(500):
+            url = f"{hosts[n % len(hosts)]}/file/{n}.pdf"
+            store.put(get_urlhash(url), url, False, 1)
+        store.close()
+
+        frontier = Frontier(make_config(self.save_file, [pending[0]]), False)
+        processed = Counter()
+        during_load = []
+        lock = threading.Lock()
+
+        def work():
+            while True:
+                url = frontier.get_tbd_url()
+                if url is None:
+                    break
+                loading = frontier.loading
+                if "/page/" in url:
+                    # A link to a pending url the loader may not have
+                    # reached yet, and one to a new url
+                    n = int(url.rsplit("/", 1)[1])
+                    frontier.add_url(pending[(n * 7) % len(pending)], url)
+                    if n % 10 == 0:
+                        frontier.add_url(f"{hosts[0]}/new/{n}", url)
+                with lock:
+                    processed[url] += 1
+                    during_load.append(loading)
+                frontier.mark_url_complete(url)
+
+        workers = [threading.Thread(target=work) for _ in range(8)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=120)
+            self.assertFalse(worker.is_alive())
+        frontier.close()
+
+        new = {f"{hosts[0]}/new/{n}" for n in range(0, 20000, 10)}
+        self.assertEqual(set(processed), set(pending) | new)
+        self.assertEqual(set(processed.values()), {1})
+        # Workers started before the loader was done, and running dry while
+        # it was still loading did not end the crawl.
+        self.assertTrue(during_load[0])
+
+
+class TestFrontierOrder(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.save_file = os.path.join(self.tmpdir, "frontier.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def make_frontier(self, seed_urls, order, time_delay=0.0):
+        config = make_config(self.save_file, seed_urls, time_delay)
+        config.frontier_policy = order
+        return Frontier(config, True)
+
+    def drain(self, frontier):
+        order = list()
+        while True:
+            url = frontier.get_tbd_url()
+            if url is None:
+                frontier.close()
+                return order
+            order.append(url)
+            frontier.mark_url_complete(url)
+
+    def test_breadth_first(self):
+        seed = "https://a.ics.uci.edu/0"
+        frontier = self.make_frontier([seed], "bfs")
+        self.assertEqual(frontier.get_tbd_url(), seed)
+        frontier.add_url("https://a.ics.uci.edu/1", seed)
+        frontier.add_url("https://a.ics.uci.edu/2", seed)
+        frontier.mark_url_complete(seed)
+        url = frontier.get_tbd_url()
+        self.assertEqual(url, "https://a.ics.uci.edu/1")
+        frontier.add_url("https://a.ics.uci.edu/3", url)
+        frontier.add_url("https://a.ics.uci.edu/4")
+        frontier.mark_url_complete(url)
+        self.assertEqual(self.drain(frontier), [
+            "https://a.ics.uci.edu/4", "https://a.ics.uci.edu/2",
+            "https://a.ics.uci.edu/3"])
+
+    def test_hosts_take_turns(self):
+        seed = "https://c.ics.uci.edu/0"
+        for order, expected in (("bfs", "aaabbb"), ("fair", "ababab")):
+            frontier = self.make_frontier([seed], order)
+            frontier.get_tbd_url()
+            for number in range(1, 4):
+                frontier.add_url(f"https://a.ics.uci.edu/{number}")
+                frontier.add_url(f"https://b.ics.uci.edu/{number}", seed)
+            frontier.mark_url_complete(seed)
+            hosts = "".join(url[8] for url in self.drain(frontier))
+            self.assertEqual(hosts, expected)
+            os.remove(self.save_file)
+
+    def test_linked_urls_are_promoted_and_traps_put_off(self):
+        seed = "https://a.ics.uci.edu/0"
+        inlinks = dict()
+        frontier = self.make_frontier([seed], "score")
+        frontier.policy = frontier.to_be_downloaded.policy = ScorePolicy(
+            lambda url: inlinks.get(url, 1),
+            lambda url: 1.0 if "calendar" in url else 0.0)
+        frontier.get_tbd_url()
+        for path in ("calendar", "x", "y", "z"):
+            frontier.add_url(f"https://a.ics.uci.edu/{path}", seed)
+        # More pages link to z once it is queued
+        inlinks["https://a.ics.uci.edu/z"] = 4
+        frontier.add_url("https://a.ics.uci.edu/z", seed)
+        frontier.mark_url_complete(seed)
+        self.assertEqual(self.drain(frontier), [
+            f"https://a.ics.uci.edu/{path}"
+            for path in ("z", "x", "y", "calendar")])
+
+    def test_promoted_copies_do_not_use_up_the_delay(self):
+        seed = "https://c.ics.uci.edu/0"
+        x, y = "https://a.ics.uci.edu/x", "https://a.ics.uci.edu/y"
+        inlinks = dict()
+        frontier = self.make_frontier([seed], "score", time_delay=0.2)
+        frontier.policy = frontier.to_be_downloaded.policy = ScorePolicy(
+            lambda url: inlinks.get(url, 1), lambda url: 0.0)
+        frontier.get_tbd_url()
+        frontier.add_url(x, seed)
+        frontier.add_url(y, seed)
+        # Each url is queued three times, and two of the copies are stale
+        for count in (2, 4):
+            inlinks[x], inlinks[y] = count * 4, count
+            frontier.add_url(x, seed)
+            frontier.add_url(y, seed)
+        frontier.mark_url_complete(seed)
+        start = time.monotonic()
+        self.assertEqual(self.drain(frontier), [x, y])
+        # One delay between x and y, none for the stale copies
+        self.assertLess(time.monotonic() - start, 0.35)
+
+    def test_resumed_invalid_url_is_not_promoted(self):
+        seed = "https://a.ics.uci.edu/0"
+        invalid = "https://a.ics.uci.edu/slides.pdf"
+        frontier = self.make_frontier([seed], "score")
+        frontier.add_url(invalid, seed)
+        frontier.close()
+
+        frontier = Frontier(make_config(self.save_file, [seed]), False)
+        self.assertEqual(frontier.get_tbd_url(), seed)
+        while frontier.loading:
+            time.sleep(0.01)
+        # More pages link to it, but the loader dropped it
+        for _ in range(3):
+            frontier.add_url(invalid, seed)
+        frontier.mark_url_complete(seed)
+        self.assertEqual(self.drain(frontier), [])
+        self.assertEqual(frontier.requeued, {})
+
+    def test_save_file_without_depths(self):
+        db = sqlite3.connect(self.save_file)
+        db.execute(
+            "CREATE TABLE urls (urlhash TEXT PRIMARY KEY, url TEXT NOT NULL, "
+            "completed INTEGER NOT NULL)")
+        db.execute("INSERT INTO urls VALUES ('h', 'https://a.ics.uci.edu', 0)")
+        db.commit()
+        db.close()
+        store = FrontierStore(self.save_file)
+        self.assertEqual(
+            list(store.pending_urls()), [("https://a.ics.uci.edu", 0)])
+        store.put("h2", "https://b.ics.uci.edu", True, 3)
+        self.assertTrue(store.is_completed("h2"))
+        self.assertFalse(store.is_completed("h"))
+        store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
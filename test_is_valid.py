@@ -1,5 +1,5 @@
 import unittest
-from scraper import is_valid
+from scraper import is_valid, url_filter
 
 class TestIsValidFunction(unittest.TestCase):
 
@@ -28,5 +28,17 @@ class TestIsValidFunction(unittest.TestCase):
         self.assertFalse(is_valid("ftp://www.ics.uci.edu"))
         self.assertFalse(is_valid("mailto:info@ics.uci.edu"))
 
+    def test_malformed_urls(self):
+        # urlparse raises ValueError on these
+        self.assertFalse(is_valid("http://[bad/x"))
+        self.assertFalse(is_valid("https://www.ics.uci.edu]/page"))
+
+    def test_malformed_link_does_not_drop_the_page(self):
+        self.assertEqual(
+            url_filter.filter([
+                "https://www.ics.uci.edu/a", "http://[bad/x",
+                "https://www.ics.uci.edu/b"]),
+            ["https://www.ics.uci.edu/a", "https://www.ics.uci.edu/b"])
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
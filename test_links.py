@@ -0,0 +1,71 @@
+import timeit
+import unittest
+from urllib.parse import urldefrag, urljoin
+
+from bs4 import BeautifulSoup
+
+from benchmarks.cache_server import SiteGraph
+from utils import normalize
+from utils.links import BaseUrl, extract_links
+
+
+class TestExtractLinks(unittest.TestCase):
+
+    def test_same_links_as_the_tree(self):
+        graph = SiteGraph(page_count=100, host_count=4)
+        for number in range(100):
+            url = graph.page_url(number)
+            content = graph.lookup(url)[1]
+            expected = [
+                normalize(urldefrag(urljoin(url, anchor["href"]))[0])
+                for anchor in BeautifulSoup(content, "html.parser").find_all(
+                    "a", href=True)]
+            self.assertEqual(list(extract_links(content, url)), expected)
+
+    def test_base_href_and_skipped_markup(self):
+        content = (
+            b"<html><head><base href='/docs/v2/'></head><body>"
+            b"<!-- <a href='commented'> --><script>'<a href=\"script\">'</script>"
+            b"<a class='a>b' href = 'intro.html?a=1&amp;b=2#top'>Intro</a>"
+            b"<A HREF=../faq/>FAQ</A><abbr href='abbr'></abbr><a name='x'>"
+            b"<a href='//cs.uci.edu/#news'>CS</a><a href=' #top '>Top</a>")
+        self.assertEqual(
+            list(extract_links(content, "https://www.ics.uci.edu/index.php")), [
+                "https://www.ics.uci.edu/docs/v2/intro.html?a=1&b=2",
+                "https://www.ics.uci.edu/docs/faq",
+                "https://cs.uci.edu",
+                "https://www.ics.uci.edu/docs/v2"])
+
+    def test_unclosed_markup_stays_linear(self):
+        def page(repeats):
+            # Every "<a" opens a quote that no tag closes, and the unclosed
+            # script hides the rest of the page.
+            return (b'<a href="/first">first</a>' + b'<a href="x' * repeats
+                    + b"<script>'<a '" * repeats)
+
+        def seconds(repeats):
+            content = page(repeats)
+            return min(timeit.repeat(
+                lambda: list(extract_links(content, "https://www.ics.uci.edu/")),
+                number=1, repeat=3))
+
+        self.assertEqual(
+            next(extract_links(page(100), "https://www.ics.uci.edu/")),
+            "https://www.ics.uci.edu/first")
+        # Four times the page in well under sixteen times the time.
+        self.assertLess(seconds(8000), 8 * seconds(2000))
+
+    def test_join_matches_urljoin(self):
+        base_url = "https://www.ics.uci.edu/a/b/page.html?x=1#frag"
+        base = BaseUrl(base_url)
+        for href in ("", "c.html", "/d", "//stat.uci.edu/e", "?y=2",
+                     "#f", "./g", "../h/", "http://cs.uci.edu/i#j",
+                     "mailto:someone@uci.edu", "?", "k?", "??z",
+                     "wrapped\nacross/\r\nlines.html", "\t/tabbed\tpath",
+                     " \n?q=wrapped"):
+            self.assertEqual(
+                base.join(href), urldefrag(urljoin(base_url, href))[0], href)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+import scraper
+from utils import configure_logging, get_logger, stop_logging
+
+
+class TestLogging(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmpdir = tempfile.mkdtemp()
+        os.chdir(self.tmpdir)
+
+    def tearDown(self):
+        stop_logging()
+        configure_logging({})
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmpdir)
+
+    def test_handlers_are_attached_once(self):
+        logger = get_logger("TEST-ONCE")
+        self.assertIs(get_logger("TEST-ONCE"), logger)
+        self.assertEqual(len(logger.handlers), 1)
+
+    def test_levels_by_logger_and_file_name(self):
+        configure_logging(
+            {"test-scraper": "DEBUG", "testworker": "WARNING"}, console="CRITICAL")
+        scraper = get_logger("TEST-SCRAPER")
+        worker = get_logger("TestWorker-0", "TestWorker")
+        other = get_logger("TEST-OTHER")
+        self.assertTrue(scraper.isEnabledFor(logging.DEBUG))
+        self.assertFalse(worker.isEnabledFor(logging.INFO))
+        self.assertTrue(other.isEnabledFor(logging.INFO))
+        self.assertFalse(other.isEnabledFor(logging.DEBUG))
+
+        # Loggers created before the configuration are updated too
+        configure_logging({"test-other": "ERROR"}, console="CRITICAL")
+        self.assertFalse(other.isEnabledFor(logging.WARNING))
+
+    def test_records_are_written_in_the_background(self):
+        configure_logging({}, console="CRITICAL")
+        first = get_logger("TestFile-0", "TestFile")
+        second = get_logger("TestFile-1", "TestFile")
+        first.info("first %s", "record")
+        second.warning("second record")
+        first.debug("not written")
+        stop_logging()
+
+        with open(os.path.join("Logs", "TestFile.log")) as file:
+            lines = file.read().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].endswith("TestFile-0 - INFO - first record"))
+        self.assertTrue(
+            lines[1].endswith("TestFile-1 - WARNING - second record"))
+
+    def test_scraper_level_applies_to_page_analysis(self):
+        # Pages are analyzed in parser processes, where configure_logging
+        # never runs, so what analyze_page finds is logged by record_page.
+        url = "https://www.ics.uci.edu/short"
+        configure_logging({"scraper": "DEBUG"}, console="CRITICAL")
+        with self.assertLogs("SCRAPER", logging.DEBUG) as logs:
+            self.assertEqual(list(scraper.record_page(url, None)), [])
+        self.assertIn(f"Low textual content detected for URL {url}", logs.output[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import json
+import os
+import shutil
+import socket
+import tempfile
+import unittest
+from urllib.request import urlopen
+
+from utils.metrics import Metrics
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.stats_file = os.path.join(self.tmpdir, "stats.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_disabled_metrics_record_nothing(self):
+        metrics = Metrics()
+
+        @metrics.timed("work")
+        def work():
+            return 42
+
+        with metrics.timer("download"):
+            metrics.incr("download.fetches", host="www.ics.uci.edu")
+        self.assertEqual(work(), 42)
+        self.assertEqual(metrics.counters, {})
+        self.assertEqual(metrics.timers, {})
+
+    def test_stats_file(self):
+        metrics = Metrics()
+        metrics.start(self.stats_file, interval=60)
+        try:
+            @metrics.timed("work")
+            def work():
+                return 42
+
+            for _ in range(3):
+                work()
+                metrics.incr("download.fetches", host="www.ics.uci.edu")
+            metrics.incr("download.fetches", host="www.cs.uci.edu")
+            metrics.incr("scraper.pages", 5)
+            metrics.gauge("frontier.queued", lambda: 7)
+            metrics.gauge("broken", lambda: 1 / 0)
+        finally:
+            metrics.close()
+
+        with open(self.stats_file) as file:
+            stats = json.load(file)
+        fetches = stats["counters"]["download.fetches"]
+        self.assertEqual(fetches["www.ics.uci.edu"]["count"], 3)
+        self.assertEqual(fetches["www.cs.uci.edu"]["count"], 1)
+        self.assertEqual(stats["counters"]["scraper.pages"]["count"], 5)
+        self.assertEqual(stats["timers"]["work"]["count"], 3)
+        self.assertEqual(stats["gauges"], {"frontier.queued": 7})
+
+    def test_prometheus_endpoint(self):
+        metrics = Metrics()
+        metrics.start(port=0)
+        self.assertFalse(metrics.enabled)
+
+        metrics.start(self.stats_file, interval=60, port=_free_port())
+        try:
+            metrics.incr("download.fetches", host="www.ics.uci.edu")
+            metrics.observe("download", 0.25)
+            metrics.gauge("frontier.host_queues", lambda: {"a.uci.edu": 2})
+            port = metrics.server.server_address[1]
+            with urlopen(f"http://127.0.0.1:{port}/metrics") as resp:
+                text = resp.read().decode("utf-8")
+        finally:
+            metrics.close()
+        self.assertIn(
+            'crawler_download_fetches_total{host="www.ics.uci.edu"} 1', text)
+        self.assertIn("crawler_download_seconds_count 1", text)
+        self.assertIn("crawler_download_seconds_sum 0.250000", text)
+        self.assertIn('crawler_frontier_host_queues{host="a.uci.edu"} 2', text)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from utils.page import Page, analyze_page, has_high_textual_content
+
+URL = "https://www.ics.uci.edu/research/index.html"
+BODY = " ".join(["crawler index ranking search"] * 30)
+CONTENT = (
+    "<html><head><title>Research</title>"
+    "<script>var skipped = 1;</script></head><body>"
+    "<header>Header words</header>"
+    "<nav><a href='/about'>About us</a> <a href='#top'>Top</a></nav>"
+    f"<main><p>{BODY}</p><p>The of and <a href='papers/x.html'>papers</a></p>"
+    "</main><footer>Footer</footer></body></html>").encode("utf-8")
+
+
+class TestPage(unittest.TestCase):
+
+    def test_links_do_not_build_the_tree(self):
+        page = Page(URL, CONTENT)
+        self.assertEqual(page.links, [
+            "https://www.ics.uci.edu/about",
+            "https://www.ics.uci.edu/research/index.html",
+            "https://www.ics.uci.edu/research/papers/x.html"])
+        self.assertIsNone(page._soup)
+
+    def test_boilerplate_is_kept_out_of_the_content_text(self):
+        page = Page(URL, CONTENT)
+        self.assertNotIn("Header", page.content_text)
+        self.assertNotIn("About", page.content_text)
+        self.assertNotIn("skipped", page.text)
+        self.assertTrue(page.text.startswith("Research Header words About us"))
+        self.assertTrue(page.content_text.startswith("Research crawler index"))
+
+
+class TestAnalyzePage(unittest.TestCase):
+
+    def test_fixture_page(self):
+        analysis = analyze_page(URL, 200, CONTENT, URL)
+        # Title, header, nav, body, "The of and papers" and footer
+        self.assertEqual(analysis.word_count, 1 + 2 + 3 + 120 + 4 + 1)
+        # Content words of 3 or more letters, outside header, nav and footer
+        self.assertEqual(analysis.content_word_count, 1 + 120 + 3)
+        self.assertEqual(analysis.word_counts["crawler"], 30)
+        self.assertEqual(analysis.word_counts["header"], 1)
+        self.assertNotIn("the", analysis.word_counts)
+        self.assertEqual(
+            analysis.fingerprint, Page(URL, CONTENT).stats.fingerprint())
+        self.assertEqual(analysis.links, Page(URL, CONTENT).links)
+        # Links are only followed from pages that downloaded fine
+        self.assertEqual(analyze_page(URL, 203, CONTENT, URL).links, [])
+
+    def test_short_page(self):
+        content = b"<html><body><p>Too short to index.</p></body></html>"
+        self.assertFalse(has_high_textual_content(Page(URL, content)))
+        self.assertIsNone(analyze_page(URL, 200, content, URL))
+        self.assertIsNone(analyze_page(URL, 200, b"", URL))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+import unittest
+from collections import Counter
+
+import scraper
+from crawler.page_cache import PageCache
+from utils.page import PageAnalysis
+from test_response import make_response
+
+
+class TestPageCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "pages.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_analysis_survives_a_new_crawl(self):
+        url = "https://www.ics.uci.edu/about"
+        analysis = PageAnalysis(
+            url, 200, 120, 2 ** 63 + 5, 100, Counter(research=3),
+            ["https://www.ics.uci.edu/people"])
+        cache = PageCache(self.path, max_age=3600)
+        cache.put(url, make_response(url, b"<p>about</p>"), analysis)
+        cache.put(url + "/empty", make_response(url, b"<p>empty</p>"), None)
+        cache.close()
+
+        cache = PageCache(self.path, max_age=3600)
+        try:
+            self.assertIsNone(cache.get("https://www.ics.uci.edu/other"))
+            cached = cache.get(url)
+            self.assertTrue(cache.is_fresh(cached))
+            self.assertEqual(cached.analysis.fingerprint, 2 ** 63 + 5)
+            self.assertEqual(cached.analysis.word_counts, {"research": 3})
+            self.assertEqual(
+                cached.analysis.links, ["https://www.ics.uci.edu/people"])
+            self.assertIsNone(cache.get(url + "/empty").analysis)
+        finally:
+            cache.close()
+        self.assertFalse(PageCache(self.path, max_age=0).is_fresh(cached))
+
+    def test_unchanged_pages(self):
+        url = "https://www.ics.uci.edu/news"
+        cache = PageCache(self.path, max_age=0)
+        try:
+            cache.put(url, make_response(url, b"<p>news</p>"), None)
+            cache.put(url + "/tagged", make_response(
+                url, b"<p>news</p>", {"ETag": '"v1"'}), None)
+            cached = cache.get(url)
+            self.assertTrue(
+                cached.is_unchanged(make_response(url, b"<p>news</p>")))
+            self.assertFalse(
+                cached.is_unchanged(make_response(url, b"<p>more news</p>")))
+            # The ETag decides over the content when both pages have one.
+            tagged = cache.get(url + "/tagged")
+            self.assertTrue(tagged.is_unchanged(make_response(
+                url, b"<p>news, updated</p>", {"ETag": '"v1"'})))
+            self.assertFalse(tagged.is_unchanged(make_response(
+                url, b"<p>news</p>", {"ETag": '"v2"'})))
+        finally:
+            cache.close()
+
+
+class TestExactDuplicates(unittest.TestCase):
+
+    def test_copies_are_not_analyzed(self):
+        content = b"<html><body><p>the same page twice</p></body></html>"
+        first = "https://www.ics.uci.edu/mirror/original"
+        second = "http://www.ics.uci.edu/mirror/original"
+        self.assertTrue(scraper.should_analyze(
+            first, make_response(first, content)))
+        self.assertFalse(scraper.should_analyze(
+            second, make_response(second, content)))
+        other = "https://www.ics.uci.edu/mirror/other"
+        self.assertTrue(scraper.should_analyze(
+            other, make_response(other, content + b" ")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import asyncio
+import os
+import unittest
+from concurrent.futures.process import BrokenProcessPool
+
+from crawler.parser_pool import (
+    get_parser_pool, parse, parse_async, shutdown_parser_pool)
+from utils.page import analyze_page
+
+
+class PoolConfig(object):
+    parser_processes = 1
+
+
+class TestParse(unittest.TestCase):
+
+    def tearDown(self):
+        shutdown_parser_pool()
+
+    def test_parser_processes_do_not_import_the_scraper(self):
+        content = b"<html><body>" + b" word" * 150 + b"</body></html>"
+        url = "https://www.ics.uci.edu/page"
+        analysis = parse(PoolConfig, analyze_page, url, 200, content, url)
+        self.assertEqual(analysis.word_count, 150)
+        self.assertFalse(parse(
+            PoolConfig, eval, "'scraper' in __import__('sys').modules"))
+
+    def test_broken_pool_is_replaced(self):
+        pool = get_parser_pool(PoolConfig)
+        with self.assertRaises(BrokenProcessPool):
+            pool.submit(os._exit, 1).result()
+        self.assertEqual(parse(PoolConfig, abs, -3), 3)
+        self.assertIsNot(get_parser_pool(PoolConfig), pool)
+        # A call that keeps breaking the pool is only retried once.
+        with self.assertRaises(BrokenProcessPool):
+            parse(PoolConfig, os._exit, 1)
+        self.assertEqual(parse(PoolConfig, abs, -4), 4)
+
+    def test_broken_pool_is_replaced_async(self):
+        with self.assertRaises(BrokenProcessPool):
+            get_parser_pool(PoolConfig).submit(os._exit, 1).result()
+        self.assertEqual(asyncio.run(parse_async(PoolConfig, abs, -5)), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
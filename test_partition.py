@@ -0,0 +1,151 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from collections import Counter
+from unittest import mock
+
+from crawler.coordinator import Coordinator, CoordinatorServer
+from crawler.partition import PartitionedFrontier, partition_of
+from test_frontier import make_config
+
+HOSTS = [f"https://h{i}.ics.uci.edu" for i in range(12)]
+LIMIT = 600
+
+
+def page_url(n):
+    return f"{HOSTS[n % len(HOSTS)]}/page/{n}"
+
+
+def run_node(node_id, node_count, coordinator, save_file, results):
+    # Crawls a graph where page n links to pages 2n+1 and 2n+2, which are
+    # mostly on hosts of other nodes.
+    config = make_config(save_file, [page_url(0)], threads_count=4)
+    config.node_id = node_id
+    config.node_count = node_count
+    config.coordinator = coordinator
+    config.forward_batch_size = 10
+    config.forward_interval = 0.05
+    frontier = PartitionedFrontier(config, True)
+    processed = list()
+
+    def worker():
+        while True:
+            url = frontier.get_tbd_url()
+            if url is None:
+                return
+            processed.append(url)
+            n = int(url.rsplit("/", 1)[1])
+            for child in (2 * n + 1, 2 * n + 2):
+                if child < LIMIT:
+                    frontier.add_url(page_url(child))
+            frontier.mark_url_complete(url)
+
+    workers = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    frontier.close()
+    results.put((node_id, processed))
+
+
+class TestPartitionedCrawl(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_partition_is_stable_and_by_host(self):
+        owners = Counter(partition_of(f"{host}/x", 3) for host in HOSTS * 10)
+        self.assertEqual(sum(owners.values()), 120)
+        self.assertEqual(
+            partition_of("https://H0.ics.uci.edu/a", 3),
+            partition_of("https://h0.ics.uci.edu/b?c=d", 3))
+
+    def test_coordinator_waits_for_every_node(self):
+        coordinator = Coordinator(2)
+        self.assertEqual(coordinator.poll(0, True), ([], False))
+        coordinator.send({"0": ["https://a.ics.uci.edu"]})
+        self.assertEqual(coordinator.poll(1, True), ([], False))
+        # Node 0 gets work, so it is not idle even though it said so.
+        self.assertEqual(
+            coordinator.poll(0, True), (["https://a.ics.uci.edu"], False))
+        self.assertEqual(coordinator.poll(1, True), ([], False))
+        self.assertEqual(coordinator.poll(0, True), ([], True))
+
+    def test_nodes_in_separate_processes_crawl_every_page_once(self):
+        node_count = 3
+        server = CoordinatorServer(node_count).start()
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        nodes = [
+            context.Process(target=run_node, args=(
+                node_id, node_count, server.address,
+                os.path.join(self.tmpdir, f"node{node_id}.db"), results))
+            for node_id in range(node_count)]
+        try:
+            for node in nodes:
+                node.start()
+            processed = dict(results.get(timeout=60) for _ in nodes)
+            for node in nodes:
+                node.join(timeout=10)
+        finally:
+            for node in nodes:
+                if node.is_alive():
+                    node.terminate()
+            server.stop()
+
+        every_url = [url for urls in processed.values() for url in urls]
+        self.assertEqual(len(every_url), LIMIT)
+        self.assertEqual(set(every_url), {page_url(n) for n in range(LIMIT)})
+        for node_id, urls in processed.items():
+            self.assertTrue(urls)
+            self.assertTrue(all(
+                partition_of(url, node_count) == node_id for url in urls))
+
+    def test_node_finishes_when_the_exchange_keeps_failing(self):
+        config = make_config(
+            os.path.join(self.tmpdir, "node.db"), [page_url(0)])
+        config.node_count = 1
+        config.forward_interval = 0.01
+        with mock.patch.object(PartitionedFrontier, "max_failures", 3), \
+                mock.patch.object(
+                    PartitionedFrontier, "_post",
+                    side_effect=ValueError("not json")):
+            frontier = PartitionedFrontier(config, True)
+            with self.assertLogs("FRONTIER") as logs:
+                self.assertEqual(frontier.get_tbd_url(), page_url(0))
+                frontier.add_url(page_url(1), page_url(0))
+                frontier.mark_url_complete(page_url(0))
+                self.assertEqual(frontier.get_tbd_url(), page_url(1))
+                frontier.mark_url_complete(page_url(1))
+                # Returns once the exchanger gives up, instead of blocking
+                self.assertIsNone(frontier.get_tbd_url())
+            frontier.close()
+        self.assertTrue(frontier.cluster_finished)
+        self.assertIn("ValueError: not json", "\n".join(logs.output))
+
+    def test_forwarded_urls_keep_their_depth(self):
+        config = make_config(
+            os.path.join(self.tmpdir, "node.db"), [page_url(0)])
+        config.node_count = 2
+        config.node_id = 0
+        remote = next(
+            page_url(n) for n in range(len(HOSTS))
+            if partition_of(page_url(n), 2) == 1)
+        with mock.patch.object(
+                PartitionedFrontier, "_post",
+                return_value={"urls": [], "finished": False}):
+            frontier = PartitionedFrontier(config, True)
+            frontier.add_url(remote, depth=7)
+            frontier.add_url(remote, page_url(0))
+            self.assertEqual(frontier.outbox[1][-2:], [[remote, 7], [remote, 0]])
+            frontier.close()
+
+if __name__ == "__main__":
+    unittest.main()
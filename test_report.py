@@ -0,0 +1,78 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from collections import Counter
+from unittest import mock
+
+from utils.report import TopK, ReportWriter
+
+REPORTS = [
+    "unique_pages.txt", "longest_page.txt", "common_words.txt",
+    "subdomains.txt"]
+
+
+class TestTopK(unittest.TestCase):
+
+    def test_matches_counter_most_common(self):
+        rng = random.Random(3)
+        words = [f"word{i}" for i in range(300)]
+        top, counts = TopK(20), Counter()
+        for _ in range(500):
+            page = Counter({
+                rng.choice(words): rng.randint(1, 1000)
+                for _ in range(rng.randint(1, 30))})
+            top.update(page)
+            counts.update(page)
+            expected = counts.most_common(20)
+            # Ties may be broken differently, so compare the counts, and
+            # that every word kept has its true count.
+            self.assertEqual(
+                [count for _, count in top.most_common()],
+                [count for _, count in expected])
+            for word, count in top.most_common():
+                self.assertEqual(counts[word], count)
+
+
+class TestReportWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def read(self, name):
+        with open(os.path.join(self.tmpdir, name)) as file:
+            return file.read()
+
+    def test_close_writes_every_report_through_a_temporary_file(self):
+        writer = ReportWriter(interval=3600.0, top_words=2, directory=self.tmpdir)
+        writer.add_page(
+            "https://www.ics.uci.edu/a", 120, Counter(crawler=3, page=1))
+        writer.add_page(
+            "http://vision.ics.uci.edu/b", 300, Counter(crawler=1, vision=5))
+        writer.add_page("https://www.ics.uci.edu/c")
+        with mock.patch("utils.report.os.replace", wraps=os.replace) as replace:
+            writer.close()
+
+        paths = [os.path.join(self.tmpdir, name) for name in REPORTS]
+        self.assertEqual(
+            sorted(replace.call_args_list),
+            sorted(mock.call(f"{path}.tmp", path) for path in paths))
+        self.assertEqual(sorted(os.listdir(self.tmpdir)), sorted(REPORTS))
+        self.assertEqual(self.read("unique_pages.txt"), "Total Unique Pages: 3\n")
+        self.assertEqual(
+            self.read("longest_page.txt"),
+            "Longest Page URL: http://vision.ics.uci.edu/b\nWord Count: 300\n")
+        self.assertEqual(
+            self.read("common_words.txt"),
+            "Most Common Words:\nvision: 5\ncrawler: 4\n")
+        self.assertEqual(
+            self.read("subdomains.txt"),
+            "http://vision.ics.uci.edu, 1\nhttps://www.ics.uci.edu, 2\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import pickle
+import unittest
+
+import cbor
+import requests
+
+from utils.response import Response, decode_cache_response
+
+
+def make_payload(url="https://www.ics.uci.edu/page",
+                 content=b"<html>page</html>", status=200, headers=None):
+    # A cache server reply for url, as decoded from cbor.
+    raw = requests.models.Response()
+    raw.status_code = status
+    raw.url = url
+    raw._content = content
+    raw.headers.update(headers or {})
+    return {"url": url, "status": status, "response": pickle.dumps(raw)}
+
+
+def make_body(status=200, content=b"<html>page</html>", headers=None):
+    return cbor.dumps(
+        make_payload(content=content, status=status, headers=headers))
+
+
+def make_response(url, content, headers=None):
+    return Response(make_payload(url, content, headers=headers))
+
+
+class Exploit(object):
+    def __reduce__(self):
+        return (os.system, ("true",))
+
+
+class TestResponse(unittest.TestCase):
+
+    def test_decodes_like_cbor(self):
+        for value in (
+                {"url": "u", "status": 200, "response": b"x" * 70000},
+                {"url": "u", "status": 404, "error": "Not found"},
+                {"url": "é", "status": 0, "flag": True, "none": None, "n": -5},
+                {"url": "u", "status": 1.5},
+                {"url": "u", "status": 200, "nested": {"a": [1, 2]}}):
+            decoded = decode_cache_response(cbor.dumps(value))
+            self.assertEqual(
+                {k: bytes(v) if isinstance(v, memoryview) else v
+                 for k, v in decoded.items()}, value)
+
+    def test_payload_is_not_copied(self):
+        body = make_body(content=b"x" * 100000)
+        decoded = decode_cache_response(body)
+        self.assertIsInstance(decoded["response"], memoryview)
+        self.assertIs(decoded["response"].obj, body)
+
+    def test_payload_is_decoded_lazily(self):
+        resp = Response(decode_cache_response(make_body(
+            content=b"<html>page</html>",
+            headers={"Content-Type": "text/HTML; charset=utf-8"})))
+        self.assertIsNotNone(resp._payload)
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(resp.raw_response.content, b"<html>page</html>")
+        self.assertIsNone(resp._payload)
+        self.assertEqual(resp.content_type, "text/html")
+        self.assertFalse(hasattr(resp, "__dict__"))
+
+    def test_python2_style_pickles(self):
+        raw = requests.models.Response()
+        raw._content = b"<html>old</html>"
+        raw.url = "https://www.ics.uci.edu"
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            resp = Response({
+                "url": raw.url, "status": 200,
+                "response": pickle.dumps(raw, protocol=protocol)})
+            self.assertEqual(resp.raw_response.content, b"<html>old</html>")
+
+    def test_refuses_other_classes(self):
+        resp = Response(decode_cache_response(cbor.dumps({
+            "url": "u", "status": 200, "response": pickle.dumps(Exploit())})))
+        self.assertIsNone(resp.raw_response)
+        self.assertEqual(resp.content_type, "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from threading import Thread
+
+from benchmarks.cache_server import SiteGraph, FakeCacheServer
+from crawler.frontier import Frontier
+from crawler.robots import RobotsCache
+from utils.robots import parse_robots, parse_sitemap
+from utils import get_urlhash
+from test_download import StandInConfig
+from test_frontier import make_config
+
+ROBOTS = """
+# Comments and unknown lines are ignored
+User-agent: Googlebot
+Disallow: /
+
+User-agent: *
+Disallow: /private
+Allow: /private/open
+Disallow: /search?
+Disallow: /*.php$
+Allow: /page
+Disallow: /page
+Crawl-delay: 2
+
+User-agent: IR
+Disallow: /ir-only
+Sitemap: https://www.ics.uci.edu/sitemap.xml
+"""
+
+
+class TestRobotsRules(unittest.TestCase):
+
+    def test_longest_match_decides(self):
+        rules = parse_robots(ROBOTS, "Other crawler")
+        allowed = rules.allowed
+        self.assertTrue(allowed("https://www.ics.uci.edu/"))
+        self.assertFalse(allowed("https://www.ics.uci.edu/private/notes"))
+        self.assertTrue(allowed("https://www.ics.uci.edu/private/open/notes"))
+        self.assertFalse(allowed("https://www.ics.uci.edu/search?q=x"))
+        self.assertTrue(allowed("https://www.ics.uci.edu/search"))
+        self.assertFalse(allowed("https://www.ics.uci.edu/a/index.php"))
+        self.assertTrue(allowed("https://www.ics.uci.edu/a/index.php?x=1"))
+        # Allow wins a tie
+        self.assertTrue(allowed("https://www.ics.uci.edu/page"))
+        self.assertEqual(rules.crawl_delay, 2.0)
+        self.assertEqual(rules.sitemaps, ["https://www.ics.uci.edu/sitemap.xml"])
+
+    def test_group_of_our_user_agent(self):
+        rules = parse_robots(ROBOTS, "IR UF24 71531201")
+        self.assertFalse(rules.allowed("https://www.ics.uci.edu/ir-only"))
+        self.assertTrue(rules.allowed("https://www.ics.uci.edu/private"))
+        self.assertIsNone(rules.crawl_delay)
+
+    def test_sitemaps(self):
+        urls, is_index = parse_sitemap(
+            b"<sitemapindex><sitemap><loc> https://a.uci.edu/s1.xml?a=1&amp;b=2"
+            b" </loc></sitemap></sitemapindex>")
+        self.assertEqual(urls, ["https://a.uci.edu/s1.xml?a=1&b=2"])
+        self.assertTrue(is_index)
+
+
+class TestRobotsCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "robots.db")
+        self.graph = SiteGraph(page_count=60, host_count=3)
+        self.server = FakeCacheServer(self.graph).start()
+        self.config = StandInConfig(self.server.address)
+        self.config.time_delay = 0.0
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.tmpdir)
+
+    def test_rules_are_fetched_once_and_kept_on_disk(self):
+        host = self.graph.hosts[1]
+        found = list()
+        robots = RobotsCache(self.config, self.path)
+        robots.add_listener(lambda *args: found.append(args))
+        self.assertTrue(robots.allowed(self.graph.page_url(1)))
+        self.assertFalse(robots.allowed(
+            f"https://{host}/events/calendar?date=2024-01-01"))
+        # robots.txt and the sitemap
+        self.assertEqual(self.server.requests, 2)
+        [(listener_host, rules, urls)] = found
+        self.assertEqual(listener_host, host)
+        self.assertEqual(rules.crawl_delay, 0.01)
+        self.assertEqual(len(urls), 20)
+        self.assertIn(self.graph.page_url(58), urls)
+        robots.close()
+
+        # A new crawl reads the sitemap again, but not robots.txt
+        robots = RobotsCache(self.config, self.path)
+        robots.add_listener(lambda *args: found.append(args))
+        self.assertTrue(robots.allowed(self.graph.page_url(1)))
+        self.assertEqual(self.server.requests, 3)
+        self.assertEqual(len(found), 2)
+        robots.close()
+
+    def test_frontier_applies_crawl_delay_and_sitemaps(self):
+        config = make_config(
+            os.path.join(self.tmpdir, "frontier.db"), self.graph.seed_urls)
+        frontier = Frontier(config, True)
+        try:
+            host = self.graph.hosts[1]
+            robots = RobotsCache(self.config, self.path)
+            robots.add_listener(frontier._apply_robots)
+            robots.allowed(self.graph.page_url(1))
+            robots.close()
+            self.assertEqual(frontier.to_be_downloaded.delays, {host: 0.01})
+            queue = frontier.to_be_downloaded.queues[host]
+            self.assertEqual(len(queue), 20)
+            # One link below the seeds, not level with them
+            self.assertEqual({queue.pop()[1][1] for _ in range(20)}, {1})
+        finally:
+            frontier.close()
+
+    def test_frontier_rejects_disallowed_urls_once_rules_are_known(self):
+        config = make_config(
+            os.path.join(self.tmpdir, "frontier.db"), self.graph.seed_urls)
+        frontier = Frontier(config, True)
+        robots = frontier.robots = RobotsCache(
+            self.config, self.path, sitemaps=False)
+        try:
+            path = "/events/calendar?date=2024-01-01"
+            known, unknown = (
+                f"https://{host}{path}" for host in self.graph.hosts[1:3])
+            self.assertIsNone(robots.cached_rules(known))
+            robots.allowed(self.graph.page_url(1))
+            self.assertIsNotNone(robots.cached_rules(known))
+            frontier.add_url(known)
+            frontier.add_url(unknown)
+            self.assertNotIn(get_urlhash(known), frontier.save)
+            self.assertIn(get_urlhash(unknown), frontier.save)
+        finally:
+            robots.close()
+            frontier.close()
+
+    def test_only_the_fetching_worker_waits_out_the_delay(self):
+        self.config.time_delay = 0.2
+        robots = RobotsCache(self.config, self.path)
+        robots.add_listener(lambda *args: None)
+        start = time.monotonic()
+        fetching = Thread(target=robots.allowed, args=(self.graph.page_url(1),))
+        fetching.start()
+        # Once robots.txt is read, other workers do not wait for the sitemap
+        # or the politeness delays of the worker that fetched it.
+        while robots.cached_rules(self.graph.page_url(1)) is None:
+            time.sleep(0.01)
+        self.assertTrue(robots.allowed(self.graph.page_url(4)))
+        self.assertLess(time.monotonic() - start, 0.15)
+        fetching.join()
+        # robots.txt, the delay, the sitemap, and the delay before the page
+        self.assertGreaterEqual(time.monotonic() - start, 0.4)
+        self.assertEqual(self.server.requests, 2)
+        robots.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+
+import scraper
+from test_response import make_response
+
+HOST = "https://discover.ics.uci.edu"
+
+
+class TestDiscoverLinks(unittest.TestCase):
+
+    def test_links_are_yielded_again_as_in_links_double(self):
+        link = f"{HOST}/popular"
+        yielded = [
+            page for page in range(1, 21)
+            if list(scraper.discover_links([link])) == [link]]
+        self.assertEqual(yielded, [1, 2, 4, 8, 16])
+
+    def test_duplicate_invalid_and_blocked_links_are_dropped(self):
+        # Three rejected files block their directory
+        for number in range(3):
+            url = f"{HOST}/files/dump{number}"
+            self.assertIsNotNone(scraper.content_gate.check(
+                url, make_response(url, b"%PDF-1.4")))
+        links = [
+            f"{HOST}/a", f"{HOST}/a", "https://www.google.com/",
+            f"{HOST}/slides.pdf", f"{HOST}/files/next", f"{HOST}/b"]
+        self.assertEqual(
+            list(scraper.discover_links(links)), [f"{HOST}/a", f"{HOST}/b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
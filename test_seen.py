@@ -0,0 +1,52 @@
+import unittest
+
+from utils.seen import SeenSet, BloomFilter, digest
+
+
+class TestSeenSet(unittest.TestCase):
+
+    def test_add_returns_whether_the_key_is_new(self):
+        seen = SeenSet()
+        self.assertTrue(seen.add("https://www.ics.uci.edu"))
+        self.assertFalse(seen.add("https://www.ics.uci.edu"))
+        self.assertTrue(seen.add("https://www.cs.uci.edu"))
+        self.assertIn("https://www.ics.uci.edu", seen)
+        self.assertNotIn("https://www.stat.uci.edu", seen)
+        self.assertEqual(len(seen), 2)
+
+    def test_growth_keeps_every_key(self):
+        seen = SeenSet(capacity=4)
+        slots = seen.slots
+        keys = [f"https://h{i % 7}.ics.uci.edu/page/{i}" for i in range(5000)]
+        for key in keys:
+            self.assertTrue(seen.add(key))
+        self.assertGreater(seen.slots, slots)
+        self.assertLessEqual(len(seen), seen.slots * SeenSet.MAX_LOAD)
+        self.assertEqual(len(seen), len(keys))
+        for key in keys:
+            self.assertIn(key, seen)
+            self.assertFalse(seen.add(key))
+        self.assertNotIn("https://h0.ics.uci.edu/page/5000", seen)
+
+    def test_bloom_tier_gives_the_same_answers(self):
+        plain, bloom = SeenSet(100), SeenSet(100, bloom=True)
+        for i in range(0, 2000, 2):
+            plain.add(str(i))
+            bloom.add(str(i))
+        for i in range(2000):
+            self.assertEqual(str(i) in bloom, str(i) in plain)
+            self.assertEqual(str(i) in plain, i % 2 == 0)
+
+    def test_bloom_filter_never_forgets(self):
+        bloom = BloomFilter(1000)
+        values = [digest(str(i)) for i in range(1000)]
+        for value in values:
+            bloom.add(value)
+        self.assertTrue(all(value in bloom for value in values))
+        false_positives = sum(
+            digest(f"other {i}") in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import random
+import unittest
+
+from utils.simhash_index import SimhashIndex
+
+
+def flip_bits(value, bits):
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+class TestSimhashIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(7)
+        self.index = SimhashIndex(max_distance=4)
+        # Enough fingerprints for the tables to grow a few times
+        self.stored = [self.rng.getrandbits(64) for _ in range(3000)]
+        for value in self.stored:
+            self.index.add(value)
+
+    def test_finds_fingerprints_up_to_max_distance(self):
+        self.assertEqual(len(self.index), len(self.stored))
+        for value in self.stored[::50]:
+            for distance in range(5):
+                query = flip_bits(value, self.rng.sample(range(64), distance))
+                self.assertEqual(self.index.find(query), value)
+                self.assertIn(query, self.index)
+
+    def test_misses_fingerprints_further_away(self):
+        for value in self.stored[::50]:
+            query = flip_bits(value, self.rng.sample(range(64), 5))
+            nearest = min(bin(query ^ other).count("1") for other in self.stored)
+            if nearest > 4:
+                self.assertIsNone(self.index.find(query))
+                self.assertNotIn(query, self.index)
+
+    def test_duplicates_and_zero(self):
+        index = SimhashIndex(max_distance=4, blocks=5)
+        self.assertNotIn(0, index)
+        for _ in range(3):
+            index.add(0)
+        self.assertEqual(index.find(0b1111), 0)
+        self.assertNotIn(0b11111, index)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import re
+import unittest
+
+from utils.page import Page
+from utils.tokenizer import TextStats, simhash
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "benchmarks", "fixtures")
+
+
+def distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+class TestTextStats(unittest.TestCase):
+
+    def test_counts_match_the_regex_helpers(self):
+        for name in os.listdir(FIXTURES):
+            with open(os.path.join(FIXTURES, name), "rb") as file:
+                page = Page(name, file.read())
+            stats = page.stats
+            words = re.findall(r"\b\w+\b", page.text.lower())
+            self.assertEqual(stats.word_count, len(words))
+            self.assertEqual(stats.content_word_count, len(
+                re.findall(r"\b[a-zA-Z]{3,}\b", page.content_text.lower())))
+            self.assertEqual(
+                dict(stats.word_counts()),
+                {w: c for w, c in stats.counts.items()
+                 if len(w) > 2 and w not in stats.stopwords})
+            self.assertEqual(sum(stats.counts.values()), len(words))
+
+    def test_boilerplate_only_counts_towards_the_page(self):
+        stats = TextStats()
+        stats.feed("Crawling the web politely")
+        stats.feed("Home About Contact", content=False)
+        self.assertEqual(stats.word_count, 7)
+        self.assertEqual(stats.content_word_count, 4)
+        self.assertEqual(stats.word_counts()["home"], 1)
+        self.assertNotIn("the", stats.word_counts())
+
+    def test_simhash_of_near_duplicates(self):
+        text = " ".join(f"word{i % 300} topic{i % 17}" for i in range(3000))
+        a, b, c = TextStats(), TextStats(), TextStats()
+        a.feed(text)
+        b.feed(text + " updated on may 17")
+        c.feed(" ".join(f"other{i % 300}" for i in range(3000)))
+        self.assertLessEqual(distance(a.fingerprint(), b.fingerprint()), 4)
+        self.assertGreater(distance(a.fingerprint(), c.fingerprint()), 4)
+
+    def test_simhash_handles_large_weights(self):
+        # Weights past 255 overflowed the simhash package on numpy 2
+        value = simhash({"calendar": 100000, "event": 3})
+        self.assertEqual(value, simhash({"calendar": 1}))
+        self.assertLess(value, 1 << 64)
+
+
+if __name__ == "__main__":
+    unittest.main()
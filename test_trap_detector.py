@@ -0,0 +1,106 @@
+import random
+import unittest
+
+from utils.trap_detector import CountMinSketch, TrapDetector
+
+HOST = "https://www.ics.uci.edu"
+
+
+class TestCountMinSketch(unittest.TestCase):
+
+    def test_counts_and_decay(self):
+        sketch = CountMinSketch(width_bits=10, depth=3)
+        for count in range(1, 6):
+            self.assertEqual(sketch.add("a"), count)
+        self.assertEqual(sketch.estimate("a"), 5)
+        self.assertEqual(sketch.estimate("never added"), 0)
+        sketch.decay()
+        self.assertEqual(sketch.estimate("a"), 2)
+        self.assertEqual(sketch.add("a"), 3)
+
+    def test_decay_halves_every_counter(self):
+        sketch = CountMinSketch(width_bits=12, depth=2)
+        rng = random.Random(5)
+        for row in sketch.rows:
+            for _ in range(500):
+                row[rng.randrange(len(row))] = rng.randrange(1 << 32)
+            row[0], row[-1] = 0xFFFFFFFF, 1
+        expected = [[count >> 1 for count in row] for row in sketch.rows]
+        sketch.decay()
+        self.assertEqual([list(row) for row in sketch.rows], expected)
+
+
+class TestTrapDetector(unittest.TestCase):
+
+    def setUp(self):
+        self.detector = TrapDetector(
+            pattern_limit=4, query_limit=6, calendar_limit=3, host_budget=8,
+            max_depth=5, max_segment_repeats=3, half_life=3600.0)
+
+    def first_trap(self, urls):
+        # Returns (position, reason) of the first url flagged as a trap.
+        for position, url in enumerate(urls):
+            reason = self.detector.is_trap(url)
+            if reason:
+                return position, reason
+        return None
+
+    def test_pages_are_not_traps(self):
+        for path in ("/", "/about", "/people/faculty", "/a/b/c/d/e"):
+            self.assertIsNone(self.detector.is_trap(HOST + path))
+
+    def test_deep_and_repeating_paths(self):
+        self.assertEqual(
+            self.detector.is_trap(HOST + "/a/b/c/d/e/f"), "path too deep")
+        self.assertEqual(
+            self.detector.is_trap(HOST + "/a/b/a/c/a"),
+            "repeated path segments")
+        self.assertIsNone(self.detector.is_trap(HOST + "/a/b/a/c"))
+
+    def test_repeated_pattern(self):
+        position, reason = self.first_trap(
+            f"{HOST}/page/{number}" for number in range(10))
+        self.assertEqual(position, 3)
+        self.assertEqual(reason, "repeated pattern www.ics.uci.edu/page/[digit]")
+
+    def test_query_and_calendar_explosions(self):
+        letters = "abcdefghij"
+        position, reason = self.first_trap(
+            f"{HOST}/search?q={letter}&sort=name" for letter in letters)
+        self.assertEqual(position, 5)
+        self.assertEqual(reason, "query explosion www.ics.uci.edu/search?q&sort")
+        # Calendar pages get a lower limit
+        position, reason = self.first_trap(
+            f"{HOST}/calendar?view={letter}" for letter in letters)
+        self.assertEqual(position, 2)
+        self.assertTrue(reason.startswith("query explosion"))
+
+    def test_host_budget(self):
+        position, reason = self.first_trap(
+            f"{HOST}/{letter}{number}"
+            for number, letter in enumerate("abcdefghijkl"))
+        self.assertEqual(position, 8)
+        self.assertEqual(reason, "host budget used up for www.ics.uci.edu")
+        # Paths without digits or a query do not use up the budget
+        self.assertIsNone(self.detector.is_trap(HOST + "/contact"))
+
+    def test_pattern_is_crawlable_again_after_half_life(self):
+        urls = [f"{HOST}/news/{number}" for number in range(6)]
+        self.assertEqual(self.first_trap(urls)[0], 3)
+        # Pretend half_life passed: every count is halved on the next url
+        self.detector.last_decay -= self.detector.half_life
+        self.assertIsNone(self.detector.is_trap(f"{HOST}/news/100"))
+        self.assertIsNotNone(self.detector.is_trap(f"{HOST}/news/101"))
+
+    def test_likelihood_does_not_count(self):
+        url = f"{HOST}/page/1"
+        self.assertEqual(self.detector.likelihood(url), 2 / 5)
+        for number in range(2):
+            self.detector.is_trap(f"{HOST}/page/{number}")
+        self.assertEqual(self.detector.likelihood(url), 2 / 4)
+        self.assertEqual(self.detector.likelihood(url), 2 / 4)
+        self.assertEqual(self.detector.likelihood(HOST + "/a/b/c/d/e/f/g"), 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
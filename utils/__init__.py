@@ -1,24 +1,127 @@
 import os
+import atexit
 import logging
+
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from threading import Lock
 from hashlib import sha256
 from urllib.parse import urlparse
 
+_LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Records are queued by the logging call and written by one background
+# thread, so a worker never waits on the console or a log file.
+_log_queue = SimpleQueue()
+_listener = None
+_listener_lock = Lock()
+# Every logger returned by get_logger, with the log file it writes to
+_loggers = dict()
+# Levels by lowercase logger or log file name, from the [LOGGING] section
+_levels = dict()
+_default_level = logging.INFO
+_console_handler = logging.StreamHandler()
+_console_handler.setLevel(logging.INFO)
+_console_handler.setFormatter(logging.Formatter(_LOG_FORMAT))
+
+
+class _LogFileHandler(logging.Handler):
+    """ Writes each record to Logs/<log file>.log, opening each file once. """
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.files = dict()
+
+    def emit(self, record):
+        handler = self.files.get(record.logfile)
+        if handler is None:
+            if not os.path.exists("Logs"):
+                os.makedirs("Logs")
+            handler = logging.FileHandler(f"Logs/{record.logfile}.log")
+            handler.setFormatter(logging.Formatter(_LOG_FORMAT))
+            self.files[record.logfile] = handler
+        handler.emit(record)
+
+    def close(self):
+        for handler in self.files.values():
+            handler.close()
+        super().close()
+
+
+class _LogQueueHandler(QueueHandler):
+    """ Queues records tagged with the log file of their logger. """
+    def __init__(self, queue, logfile):
+        super().__init__(queue)
+        self.logfile = logfile
+
+    def prepare(self, record):
+        record = super().prepare(record)
+        record.logfile = self.logfile
+        return record
+
+
+def _start_listener():
+    # Called with _listener_lock held.
+    global _listener
+    if _listener is None:
+        _listener = QueueListener(
+            _log_queue, _console_handler, _LogFileHandler(),
+            respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+
+
+def stop_logging():
+    """ Writes out every queued record and stops the background writer. """
+    global _listener
+    with _listener_lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+def _level_for(name, filename):
+    for key in (name.lower(), filename.lower()):
+        if key in _levels:
+            return _levels[key]
+    return _default_level
+
+
+def configure_logging(levels, default="INFO", console="INFO"):
+    """
+    Sets the level of every logger, including those already created.
+
+    Args:
+        levels (dict): Levels by logger name or log file name, e.g.
+            {"scraper": "DEBUG", "worker": "WARNING"}. Case insensitive.
+        default (str): Level of loggers not in levels.
+        console (str): Lowest level also printed to the console.
+    """
+    global _default_level
+    _levels.clear()
+    _levels.update(
+        (key.lower(), value.strip().upper()) for key, value in levels.items())
+    _default_level = default.strip().upper()
+    _console_handler.setLevel(console.strip().upper())
+    for name, filename in _loggers.items():
+        logging.getLogger(name).setLevel(_level_for(name, filename))
+
+
 def get_logger(name, filename=None):
+    """
+    Returns the logger `name`, writing to Logs/<filename or name>.log and the
+    console through the background writer. Handlers are only attached the
+    first time a name is asked for.
+    """
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    if not os.path.exists("Logs"):
-        os.makedirs("Logs")
-    fh = logging.FileHandler(f"Logs/{filename if filename else name}.log")
-    fh.setLevel(logging.DEBUG)
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.INFO)
-    formatter = logging.Formatter(
-       "%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-    fh.setFormatter(formatter)
-    ch.setFormatter(formatter)
-    # add the handlers to the logger
-    logger.addHandler(fh)
-    logger.addHandler(ch)
+    filename = filename if filename else name
+    with _listener_lock:
+        _start_listener()
+        if name not in _loggers:
+            _loggers[name] = filename
+            logger.setLevel(_level_for(name, filename))
+            logger.addHandler(_LogQueueHandler(_log_queue, filename))
     return logger
 
 
@@ -1,19 +1,63 @@
 import re
 
+from utils import get_logger
+
 
 class Config(object):
     def __init__(self, config):
         self.user_agent = config["IDENTIFICATION"]["USERAGENT"].strip()
-        print (self.user_agent)
+        get_logger("CRAWLER").info(f"User agent: {self.user_agent}")
         assert self.user_agent != "DEFAULT AGENT", "Set useragent in config.ini"
         assert re.match(r"^[a-zA-Z0-9_ ,]+$", self.user_agent), "User agent should not have any special characters outside '_', ',' and 'space'"
         self.threads_count = int(config["LOCAL PROPERTIES"]["THREADCOUNT"])
+        self.engine = config["LOCAL PROPERTIES"].get("ENGINE", "threads").strip()
+        self.concurrency = config["LOCAL PROPERTIES"].getint("CONCURRENCY", 100)
+        self.parser_processes = config["LOCAL PROPERTIES"].getint("PARSERS", 0)
         self.save_file = config["LOCAL PROPERTIES"]["SAVE"]
+        self.save_batch_size = config["LOCAL PROPERTIES"].getint("SAVEBATCH", 1000)
+        self.save_interval = config["LOCAL PROPERTIES"].getfloat("SAVEINTERVAL", 1.0)
+        self.page_cache_file = config["LOCAL PROPERTIES"].get("PAGECACHE", "").strip() or None
+        self.page_cache_age = config["LOCAL PROPERTIES"].getfloat("PAGECACHEAGE", 86400.0)
+        self.robots_cache_file = config["LOCAL PROPERTIES"].get("ROBOTSCACHE", "robots.db").strip()
+        self.robots_ttl = config["LOCAL PROPERTIES"].getfloat("ROBOTSTTL", 86400.0)
+        self.stats_file = config["LOCAL PROPERTIES"].get("STATSFILE", "").strip() or None
+        self.stats_interval = config["LOCAL PROPERTIES"].getfloat("STATSINTERVAL", 10.0)
+        self.metrics_port = config["LOCAL PROPERTIES"].getint("METRICSPORT", 0)
 
         self.host = config["CONNECTION"]["HOST"]
         self.port = int(config["CONNECTION"]["PORT"])
+        self.download_timeout = config["CONNECTION"].getfloat("TIMEOUT", 10.0)
+        self.download_retries = config["CONNECTION"].getint("RETRIES", 3)
+        self.download_backoff = config["CONNECTION"].getfloat("BACKOFF", 0.5)
 
         self.seed_urls = config["CRAWLER"]["SEEDURL"].split(",")
         self.time_delay = float(config["CRAWLER"]["POLITENESS"])
+        # robots.txt rules are followed, and sitemaps read, when ROBOTS is set
+        self.robots_file = (
+            self.robots_cache_file
+            if config["CRAWLER"].getboolean("ROBOTS", False) else None)
+        self.sitemaps = config["CRAWLER"].getboolean("SITEMAPS", True)
+        self.max_crawl_delay = config["CRAWLER"].getfloat("MAXCRAWLDELAY", 30.0)
+        # Larger responses, and pages with more links, are not parsed
+        self.max_page_bytes = config["CRAWLER"].getint("MAXBYTES", 2 << 20)
+        self.max_page_links = config["CRAWLER"].getint("MAXLINKS", 3000)
+        # Order urls are crawled in: "score", "bfs" or "fair"
+        self.frontier_policy = config["CRAWLER"].get("ORDER", "score").strip()
+
+        # A crawl split over NODES nodes by host hash, this being node NODEID
+        cluster = config["CLUSTER"] if config.has_section("CLUSTER") else {}
+        self.node_count = int(cluster.get("NODES", 1))
+        self.node_id = int(cluster.get("NODEID", 0))
+        coordinator_host, _, coordinator_port = cluster.get(
+            "COORDINATOR", "127.0.0.1:9100").strip().rpartition(":")
+        self.coordinator = (coordinator_host, int(coordinator_port))
+        self.forward_batch_size = int(cluster.get("FORWARDBATCH", 500))
+        self.forward_interval = float(cluster.get("FORWARDINTERVAL", 1.0))
+
+        # Levels of the loggers named in [LOGGING], e.g. SCRAPER = DEBUG
+        levels = dict(config["LOGGING"]) if config.has_section("LOGGING") else {}
+        self.log_level = levels.pop("level", "INFO")
+        self.console_log_level = levels.pop("console", "INFO")
+        self.log_levels = levels
 
         self.cache_server = None
\ No newline at end of file
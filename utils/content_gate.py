@@ -0,0 +1,105 @@
+from threading import Lock
+from urllib.parse import urlparse
+
+from utils.seen import SeenSet
+from utils.trap_detector import CountMinSketch
+
+# Leading bytes of file formats that are not web pages
+_MAGIC_NUMBERS = (
+    b"%PDF", b"%!PS", b"PK\x03\x04", b"\xd0\xcf\x11\xe0", b"{\\rtf",
+    b"\x89PNG", b"GIF8", b"\xff\xd8\xff", b"II*\x00", b"MM\x00*", b"BM",
+    b"\x1f\x8b", b"BZh", b"\xfd7zXZ", b"7z\xbc\xaf", b"Rar!", b"\x7fELF",
+    b"MZ", b"ID3", b"OggS", b"RIFF", b"fLaC", b"\x1aE\xdf\xa3")
+_SNIFF_BYTES = 512
+
+
+class ContentGate(object):
+    """
+    Drops responses that are not worth parsing, before they are parsed: too
+    large, not a web page by their Content-Type or their first bytes, or with
+    more links than any real page has.
+
+    Rejections are counted per host and per directory (the url path up to
+    its last "/") in count-min sketches, so memory stays fixed however many
+    responses are rejected; only the hosts and directories that reach their
+    limit are kept. Urls in a directory or on a host that keeps serving such
+    files and never served a page are skipped before download.
+
+    Args:
+        page_types (iterable): Content types parsed as pages; "" is a
+            response without a Content-Type.
+        max_bytes (int): Largest response parsed.
+        max_links (int): Most links a parsed page may have.
+        directory_limit (int): Rejections that block a directory.
+        host_limit (int): Rejections that block a host.
+        width_bits (int), depth (int): Size of the rejection count sketches.
+    """
+    def __init__(self, page_types, max_bytes=2 << 20, max_links=3000,
+                 directory_limit=3, host_limit=20, width_bits=14, depth=3):
+        self.page_types = frozenset(page_types)
+        self.max_bytes = max_bytes
+        self.max_links = max_links
+        self.directory_limit = directory_limit
+        self.host_limit = host_limit
+        self.lock = Lock()
+        self.rejected_directories = CountMinSketch(width_bits, depth)
+        self.rejected_hosts = CountMinSketch(width_bits, depth)
+        # Directories and hosts whose rejections reached their limit
+        self.blocked_directories = set()
+        self.blocked_hosts = set()
+        self.page_hosts = set()
+        self.page_directories = SeenSet()
+
+    def check(self, url, resp):
+        """
+        Returns why the response of url should not be parsed, or None if it
+        should. The size is checked before the response is unpickled.
+
+        Args:
+            url (str): The URL that was downloaded.
+            resp (Response): A response with status 200.
+        """
+        reason = self._reason(resp)
+        host, directory = _split(url)
+        with self.lock:
+            if reason is None:
+                self.page_hosts.add(host)
+                self.page_directories.add(directory)
+            else:
+                if self.rejected_hosts.add(host) >= self.host_limit:
+                    self.blocked_hosts.add(host)
+                if (self.rejected_directories.add(directory)
+                        >= self.directory_limit):
+                    self.blocked_directories.add(directory)
+        return reason
+
+    def _reason(self, resp):
+        if resp.size > self.max_bytes:
+            return f"Response of {resp.size} bytes"
+        if resp.content_type not in self.page_types:
+            return f"Content type {resp.content_type}"
+        content = resp.raw_response.content if resp.raw_response else None
+        if not content:
+            return None
+        head = content[:_SNIFF_BYTES]
+        if head.startswith(_MAGIC_NUMBERS) or b"\x00" in head:
+            return "Binary content"
+        # Counting the bytes is far cheaper than parsing, and close enough.
+        links = content.count(b"href=") + content.count(b"HREF=")
+        if links > self.max_links:
+            return f"{links} links"
+        return None
+
+    def is_blocked(self, url):
+        """ Whether url is on a host or in a directory that serves no pages. """
+        host, directory = _split(url)
+        with self.lock:
+            if (directory in self.blocked_directories
+                    and directory not in self.page_directories):
+                return True
+            return host in self.blocked_hosts and host not in self.page_hosts
+
+
+def _split(url):
+    parsed = urlparse(url)
+    return parsed.netloc, parsed.netloc + parsed.path.rpartition("/")[0]
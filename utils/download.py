@@ -1,21 +1,68 @@
 import requests
-import cbor
 import time
 
-from utils.response import Response
+from threading import local
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.metrics import metrics
+from utils.response import Response, decode_cache_response
+
+# One keep-alive session per thread, since the cache server is the same
+# host:port for the whole run and Session objects are not thread safe.
+_sessions = local()
+
+
+def get_session(config):
+    session = getattr(_sessions, "session", None)
+    if session is None:
+        retry = Retry(
+            total=config.download_retries,
+            backoff_factor=config.download_backoff,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=("GET",),
+            raise_on_status=False)
+        session = requests.Session()
+        session.mount("http://", HTTPAdapter(max_retries=retry))
+        _sessions.session = session
+    return session
+
 
 def download(url, config, logger=None):
     host, port = config.cache_server
-    resp = requests.get(
-        f"http://{host}:{port}/",
-        params=[("q", f"{url}"), ("u", f"{config.user_agent}")])
+    if metrics.enabled:
+        metrics.incr("download.fetches", host=urlparse(url).netloc)
+    try:
+        with metrics.timer("download"):
+            resp = get_session(config).get(
+                f"http://{host}:{port}/",
+                params=[("q", f"{url}"), ("u", f"{config.user_agent}")],
+                timeout=config.download_timeout)
+    except requests.RequestException as e:
+        # Connection errors and timeouts, after all retries.
+        metrics.incr("download.errors")
+        if logger:
+            logger.error(f"Cache server request failed for url {url}: {e}")
+        return Response({
+            "error": f"Cache server request failed: {e}",
+            "status": 0,
+            "url": url})
+    return decode_response(url, resp.status_code, resp.content, logger)
+
+
+def decode_response(url, status_code, content, logger=None):
+    """ Builds a Response from the body the cache server answered with. """
     try:
-        if resp and resp.content:
-            return Response(cbor.loads(resp.content))
+        if status_code < 400 and content:
+            return Response(decode_cache_response(content))
     except (EOFError, ValueError) as e:
         pass
-    logger.error(f"Spacetime Response error {resp} with url {url}.")
+    metrics.incr("download.errors")
+    if logger:
+        logger.error(
+            f"Spacetime Response error <{status_code}> with url {url}.")
     return Response({
-        "error": f"Spacetime Response error {resp} with url {url}.",
-        "status": resp.status_code,
+        "error": f"Spacetime Response error <{status_code}> with url {url}.",
+        "status": status_code,
         "url": url})
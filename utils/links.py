@@ -0,0 +1,146 @@
+import re
+
+from html import unescape
+from urllib.parse import urljoin, urlsplit
+
+from utils import normalize
+
+# The start of <a> and <base> tags, and the comments, scripts and styles
+# whose contents are skipped. An unclosed comment, script or style runs to
+# the end of the page, as it does in a browser.
+_TAG_RE = re.compile(
+    rb"<!--.*?(?:-->|\Z)"
+    rb"|<(script|style)(?=[\s>]).*?(?:</\1\s*>|\Z)"
+    rb"|<(a|base)(?=[\s/>])",
+    re.IGNORECASE | re.DOTALL)
+# The attributes and end of a tag, taking each run outside quotes whole.
+# Attribute values may contain ">".
+_ATTRIBUTES_RE = re.compile(
+    rb"""((?:(?=([^>"']+))\2|"[^"]*"|'[^']*')*)>""")
+# The most bytes of attributes looked at, so that an unclosed quote cannot
+# make every tag after it scan to the end of the page.
+_MAX_ATTRIBUTES = 2048
+_HREF_RE = re.compile(
+    rb"""\s([^\s"'=/>]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+)))?""")
+_BASE_RE = re.compile(rb"<base(?=[\s/>])", re.IGNORECASE)
+_SCHEME_RE = re.compile(r"[a-zA-Z][a-zA-Z0-9+.-]*:")
+# A "." or ".." path segment, which only urljoin resolves
+_DOT_SEGMENT_RE = re.compile(r"(?:^|/)\.\.?(?:/|$)")
+# Removed from anywhere in a url, as urlsplit does
+_UNSAFE_CHARACTERS = str.maketrans("", "", "\t\r\n")
+
+
+class BaseUrl(object):
+    """
+    The url the relative links of one page resolve against, split once.
+
+    Links of the common forms (absolute, "//host/...", "/path", "?query" and
+    "name" without "." segments) are joined by concatenation; anything else
+    goes through urljoin. Fragments are dropped, and so are tabs and line
+    breaks anywhere in a link and an empty query, as urljoin does.
+
+    Args:
+        url (str): The base url.
+    """
+    def __init__(self, url):
+        url = url.partition("#")[0]
+        self.url = url
+        parts = urlsplit(url)
+        # Only an absolute url with a host can be joined by concatenation.
+        self.simple = bool(parts.scheme and parts.netloc)
+        self.scheme = f"{parts.scheme}:"
+        self.origin = f"{parts.scheme}://{parts.netloc}"
+        self.without_query = f"{self.origin}{parts.path}"
+        self.directory = (
+            f"{self.origin}{parts.path.rpartition('/')[0]}/")
+
+    def join(self, href):
+        href = href.translate(_UNSAFE_CHARACTERS).strip().partition("#")[0]
+        if href.find("?") == len(href) - 1:
+            # An empty query is no query at all.
+            href = href[:-1]
+        if not self.simple:
+            return urljoin(self.url, href)
+        if not href:
+            return self.url
+        if _DOT_SEGMENT_RE.search(href.partition("?")[0]):
+            return urljoin(self.url, href)
+        first = href[0]
+        if first == "/":
+            if href.startswith("//"):
+                return self.scheme + href
+            return self.origin + href
+        if first == "?":
+            return self.without_query + href
+        if _SCHEME_RE.match(href):
+            return href
+        return self.directory + href
+
+
+def _href(attributes):
+    # The value of the first href attribute, or None.
+    for match in _HREF_RE.finditer(attributes):
+        if match.group(1).lower() == b"href":
+            value = match.group(2)
+            if value is None:
+                value = match.group(3)
+            if value is None:
+                value = match.group(4)
+            return value
+    return None
+
+
+def _decode(value):
+    try:
+        value = value.decode("utf-8")
+    except UnicodeDecodeError:
+        value = value.decode("latin-1")
+    return unescape(value) if "&" in value else value
+
+
+def _tags(content):
+    # The name and attributes of every <a> and <base> tag outside comments,
+    # scripts and styles, in order.
+    search = _TAG_RE.search
+    attributes = _ATTRIBUTES_RE.match
+    position = 0
+    while True:
+        match = search(content, position)
+        if match is None:
+            return
+        position = match.end()
+        name = match.group(2)
+        if name is None:
+            continue
+        tag = attributes(content, position, position + _MAX_ATTRIBUTES)
+        if tag is not None:
+            position = tag.end()
+            yield name, tag.group(1)
+
+
+def extract_links(content, base_url):
+    """
+    Yields the absolute, defragmented and normalized target of every <a href>
+    in an HTML page, in order, scanning the raw bytes without building a
+    tree. Links in comments, scripts and styles are skipped, and the first
+    <base href> of the page applies to every link.
+
+    Args:
+        content (bytes): The raw HTML content of the page.
+        base_url (str): The url of the page.
+    """
+    base = BaseUrl(base_url)
+    if _BASE_RE.search(content):
+        for name, attributes in _tags(content):
+            if name.lower() == b"base":
+                href = _href(attributes)
+                if href is not None:
+                    base = BaseUrl(base.join(_decode(href)))
+                    break
+    join = base.join
+    for name, attributes in _tags(content):
+        if len(name) != 1:
+            continue
+        href = _href(attributes)
+        if href is not None:
+            yield normalize(join(_decode(href)))
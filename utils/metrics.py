@@ -0,0 +1,268 @@
+import atexit
+import json
+import os
+import time
+
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread, Lock, Event
+
+
+class _NullTimer(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer(object):
+    __slots__ = ("metrics", "name", "host", "start")
+
+    def __init__(self, metrics, name, host):
+        self.metrics = metrics
+        self.name = name
+        self.host = host
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(
+            self.name, time.perf_counter() - self.start, self.host)
+        return False
+
+
+class Metrics(object):
+    """
+    Counters, timers and gauges of the crawl, written to a JSON stats file
+    every `interval` seconds and optionally served in the Prometheus text
+    format on localhost.
+
+    Everything is a no-op until `start` is called, so instrumented code
+    costs one attribute check per call when metrics are disabled.
+
+    Counters and timers may be kept per host. Gauges are functions read when
+    the stats are written, returning a number or a dict of host to number.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.lock = Lock()
+        self.counters = dict()
+        self.timers = dict()
+        self.gauges = dict()
+        self.started = time.time()
+        self.stats_file = None
+        self.interval = 10.0
+        self.stopped = Event()
+        self.writer = None
+        self.server = None
+        self.last_counters = dict()
+        self.last_dump = time.monotonic()
+
+    def start(self, stats_file=None, interval=10.0, port=0):
+        """
+        Enables the metrics.
+
+        Args:
+            stats_file (str): Where the stats are dumped, or None.
+            interval (float): Seconds between dumps of the stats file.
+            port (int): Port of the local Prometheus endpoint, 0 for none.
+        """
+        if self.enabled or not (stats_file or port):
+            return
+        self.enabled = True
+        self.started = time.time()
+        self.last_dump = time.monotonic()
+        self.stats_file = stats_file
+        self.interval = interval
+        if stats_file:
+            self.writer = Thread(target=self._dump_periodically, daemon=True)
+            self.writer.start()
+        if port:
+            self.server = ThreadingHTTPServer(
+                ("127.0.0.1", port), _handler_for(self))
+            self.server.daemon_threads = True
+            Thread(target=self.server.serve_forever, daemon=True).start()
+        atexit.register(self.close)
+
+    def close(self):
+        """ Writes the stats file one last time and stops serving. """
+        if not self.enabled or self.stopped.is_set():
+            return
+        self.stopped.set()
+        if self.writer is not None:
+            self.writer.join()
+            self.dump()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def incr(self, name, value=1, host=None):
+        if not self.enabled:
+            return
+        key = (name, host)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def timer(self, name, host=None):
+        """ Context manager timing its block into the timer `name`. """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, host)
+
+    def timed(self, name):
+        """ Decorator timing every call of a function into the timer `name`. """
+        def decorate(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def observe(self, name, seconds, host=None):
+        if not self.enabled:
+            return
+        key = (name, host)
+        with self.lock:
+            stats = self.timers.get(key)
+            if stats is None:
+                self.timers[key] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                if seconds > stats[2]:
+                    stats[2] = seconds
+
+    def gauge(self, name, func):
+        """ Registers func as the gauge `name`, read at every snapshot. """
+        self.gauges[name] = func
+
+    def snapshot(self):
+        """
+        Returns every metric as a dict. Counters come with their rate per
+        second since the previous snapshot.
+        """
+        now = time.monotonic()
+        with self.lock:
+            counters = dict(self.counters)
+            timers = {key: list(stats) for key, stats in self.timers.items()}
+            elapsed = max(now - self.last_dump, 1e-9)
+            last, self.last_counters, self.last_dump = (
+                self.last_counters, counters, now)
+
+        result = {
+            "uptime": time.time() - self.started,
+            "counters": {}, "timers": {}, "gauges": {}}
+        for (name, host), count in sorted(counters.items(), key=_sort_key):
+            entry = {
+                "count": count,
+                "rate": (count - last.get((name, host), 0)) / elapsed}
+            _put(result["counters"], name, host, entry)
+        for (name, host), (count, total, longest) in sorted(
+                timers.items(), key=_sort_key):
+            _put(result["timers"], name, host, {
+                "count": count, "total": total,
+                "mean": total / count, "max": longest})
+        for name, func in sorted(self.gauges.items()):
+            try:
+                result["gauges"][name] = func()
+            except Exception:
+                # A gauge must never break the stats.
+                continue
+        return result
+
+    def dump(self):
+        """ Writes a snapshot to the stats file, replacing the previous one. """
+        tmp_path = f"{self.stats_file}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(self.snapshot(), file, indent=2)
+        os.replace(tmp_path, self.stats_file)
+
+    def prometheus(self):
+        """ Returns the metrics in the Prometheus text exposition format. """
+        with self.lock:
+            counters = dict(self.counters)
+            timers = {key: list(stats) for key, stats in self.timers.items()}
+        lines = list()
+        for (name, host), count in sorted(counters.items(), key=_sort_key):
+            lines.append(f"{_metric(name)}_total{_labels(host)} {count}")
+        for (name, host), (count, total, _) in sorted(
+                timers.items(), key=_sort_key):
+            metric = f"{_metric(name)}_seconds"
+            lines.append(f"{metric}_count{_labels(host)} {count}")
+            lines.append(f"{metric}_sum{_labels(host)} {total:.6f}")
+        for name, func in sorted(self.gauges.items()):
+            try:
+                value = func()
+            except Exception:
+                continue
+            if isinstance(value, dict):
+                for host, number in sorted(value.items()):
+                    lines.append(f"{_metric(name)}{_labels(host)} {number}")
+            else:
+                lines.append(f"{_metric(name)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def _dump_periodically(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.dump()
+            except OSError:
+                continue
+
+
+def _sort_key(item):
+    name, host = item[0]
+    return name, host or ""
+
+
+def _put(section, name, host, entry):
+    if host is None:
+        section[name] = entry
+    else:
+        section.setdefault(name, {})[host] = entry
+
+
+def _metric(name):
+    return "crawler_" + name.replace(".", "_")
+
+
+def _labels(host):
+    if host is None:
+        return ""
+    host = str(host).replace("\\", "\\\\").replace('"', '\\"')
+    return f'{{host="{host}"}}'
+
+
+def _handler_for(metrics):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+
+# The metrics of this process, shared by every module
+metrics = Metrics()
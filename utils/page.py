@@ -0,0 +1,188 @@
+from bs4 import BeautifulSoup
+from bs4.element import NavigableString, CData
+
+from utils.links import extract_links
+from utils.tokenizer import TextStats
+
+# Prefer the C-backed lxml tree builder when it is installed; it is several
+# times faster than the pure Python html.parser on large pages.
+try:
+    import lxml  # noqa: F401
+    PARSER = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+
+# Tags whose text is navigation or layout rather than page content.
+BOILERPLATE_TAGS = ["nav", "footer", "header", "aside"]
+
+_TEXT_TYPES = (NavigableString, CData)
+
+
+class Page(object):
+    """
+    Parses a downloaded page once and shares the results with every consumer.
+
+    Each attribute is computed lazily on first access and cached, so callers
+    that bail out early (e.g. on low textual content) never pay for the rest.
+    Links are scanned from the raw content, so reading only the links never
+    builds the tree.
+
+    Args:
+        url (str): The URL the page was requested with.
+        content (bytes): The raw HTML content of the page.
+        base_url (str): The URL relative links resolve against. Defaults to url.
+    """
+    def __init__(self, url, content, base_url=None):
+        self.url = url
+        self.content = content
+        self.base_url = base_url or url
+        self._soup = None
+        self._text = None
+        self._content_text = None
+        self._boilerplate_text = None
+        self._stats = None
+        self._links = None
+
+    @property
+    def soup(self):
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.content, PARSER)
+        return self._soup
+
+    @property
+    def text(self):
+        """ All visible text of the page, space separated. """
+        if self._text is None:
+            self._collect_text()
+        return self._text
+
+    @property
+    def content_text(self):
+        """ Visible text with navigation, header, footer and aside removed. """
+        if self._content_text is None:
+            self._collect_text()
+        return self._content_text
+
+    @property
+    def stats(self):
+        """ Word counts and SimHash of the page, from one tokenizing pass. """
+        if self._stats is None:
+            if self._content_text is None:
+                self._collect_text()
+            stats = TextStats()
+            stats.feed(self._content_text)
+            stats.feed(self._boilerplate_text, content=False)
+            self._stats = stats
+        return self._stats
+
+    @property
+    def links(self):
+        """
+        Absolute, defragmented and normalized targets of every <a href> on
+        the page, resolved against its <base href> if it has one.
+        """
+        if self._links is None:
+            self._links = list(extract_links(self.content, self.base_url))
+        return self._links
+
+    def _collect_text(self):
+        # Walk the tree once and build both text views, instead of
+        # decomposing boilerplate tags (which would mutate the shared tree).
+        soup = self.soup
+        boilerplate = set()
+        for tag in soup.find_all(BOILERPLATE_TAGS):
+            boilerplate.update(id(s) for s in tag.find_all(string=True))
+
+        text, content_text, boilerplate_text = [], [], []
+        for node in soup.descendants:
+            if type(node) not in _TEXT_TYPES:
+                continue
+            stripped = node.strip()
+            if not stripped:
+                continue
+            text.append(stripped)
+            if id(node) in boilerplate:
+                boilerplate_text.append(stripped)
+            else:
+                content_text.append(stripped)
+        self._text = " ".join(text)
+        self._content_text = " ".join(content_text)
+        self._boilerplate_text = " ".join(boilerplate_text)
+
+
+def has_high_textual_content(page):
+    """
+    Determines if a page has enough words to be worth indexing.
+
+    Args:
+        page (Page): The parsed page.
+
+    Returns:
+        bool: True if the page has at least 100 words, otherwise False.
+    """
+    if not page.content:
+        return False
+    return page.stats.word_count >= 100
+
+
+def count_content_words(page):
+    """
+    Returns the number of words of 3 or more letters in the page content
+    """
+    # Words outside <script>, <style>, <nav>, <footer>, <header>, and <aside>
+    return page.stats.content_word_count
+
+
+def count_words_in_content(page):
+    """
+    Returns a counter object of every word in the content and its count, filtering out stop words
+    """
+    return page.stats.word_counts()
+
+
+class PageAnalysis(object):
+    """
+    Everything the crawl needs to know about a page, computed without touching
+    any global state, so it can be produced in another process.
+    """
+    def __init__(self, url, status, word_count, fingerprint,
+                 content_word_count, word_counts, links):
+        self.url = url
+        self.status = status
+        self.word_count = word_count
+        self.fingerprint = fingerprint
+        self.content_word_count = content_word_count
+        self.word_counts = word_counts
+        self.links = links
+
+
+def analyze_page(url, status, content, base_url):
+    """
+    Parses a page once and extracts its statistics and links.
+
+    This runs in the parser processes, which only import this module and
+    its dependencies, never the scraper and the crawl state it builds.
+
+    Args:
+        url (str): The URL that was downloaded.
+        status (int): The status of the response.
+        content (bytes): The raw HTML content of the page.
+        base_url (str): The URL relative links resolve against.
+
+    Returns:
+        PageAnalysis: The analysis, or None if the page has too little text.
+    """
+    # Parse the page once and share the result with every analysis step
+    page = Page(url, content, base_url)
+
+    if not has_high_textual_content(page):
+        return None
+
+    return PageAnalysis(
+        url, status, page.stats.word_count,
+        # SimHash of the page words, weighted by their counts
+        page.stats.fingerprint(),
+        count_content_words(page),
+        count_words_in_content(page),
+        # Links are only followed from pages that downloaded fine
+        page.links if status == 200 else [])
@@ -0,0 +1,151 @@
+import atexit
+import os
+import time
+
+from collections import Counter
+from queue import Queue, Empty
+from threading import Thread, Lock
+from urllib.parse import urlparse
+
+_STOP = object()
+
+
+class TopK(object):
+    """
+    Word counts with the k most common words maintained incrementally.
+
+    Counts only ever grow, so a word can only enter the top k when its count
+    passes the smallest count in it. `floor` is a lower bound on that count,
+    which keeps most updates from looking at the top k at all.
+    """
+    def __init__(self, k):
+        self.k = k
+        self.counts = Counter()
+        self.top = dict()
+        self.floor = 0
+
+    def update(self, word_counts):
+        counts, top = self.counts, self.top
+        for word, count in word_counts.items():
+            total = counts[word] + count
+            counts[word] = total
+            if word in top:
+                top[word] = total
+            elif len(top) < self.k:
+                top[word] = total
+                if len(top) == self.k:
+                    self.floor = min(top.values())
+            elif total > self.floor:
+                lowest = min(top, key=top.get)
+                if total > top[lowest]:
+                    del top[lowest]
+                    top[word] = total
+                self.floor = min(top.values())
+
+    def most_common(self):
+        return sorted(self.top.items(), key=lambda item: -item[1])
+
+
+class ReportWriter(object):
+    """
+    Collects page events on a background thread and writes the crawl reports
+    (unique pages, longest page, most common words and subdomains) every
+    `interval` seconds and on shutdown, instead of on every page.
+
+    Each report is written to a temporary file and renamed over the previous
+    one, so readers never see a half written report. The thread is started by
+    the first event, so importing this in a parser process costs nothing.
+
+    Args:
+        interval (float): Seconds between report snapshots.
+        top_words (int): How many of the most common words to report.
+        directory (str): Where the report files are written.
+    """
+    def __init__(self, interval=10.0, top_words=50, directory="."):
+        self.interval = interval
+        self.directory = directory
+        self.events = Queue()
+        self.lock = Lock()
+        self.thread = None
+        self.pages = 0
+        self.longest_page = ("", 0)
+        self.words = TopK(top_words)
+        self.subdomains = dict()
+
+    def add_page(self, url, word_count=0, word_counts=None):
+        """
+        Records a processed page.
+
+        Args:
+            url (str): The URL of the page.
+            word_count (int): Words counted towards the longest page.
+            word_counts (Counter): Counts of the words on the page.
+        """
+        if self.thread is None:
+            self._start()
+        self.events.put((url, word_count, word_counts))
+
+    def close(self):
+        """ Applies the pending events and writes the final reports. """
+        with self.lock:
+            thread, self.thread = self.thread, None
+        if thread is not None:
+            self.events.put(_STOP)
+            thread.join()
+
+    def _start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = Thread(target=self._run, daemon=True)
+                self.thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        next_flush = time.monotonic() + self.interval
+        while True:
+            try:
+                event = self.events.get(
+                    timeout=max(0, next_flush - time.monotonic()))
+            except Empty:
+                event = None
+            if event is _STOP:
+                self.flush()
+                return
+            if event is not None:
+                self._apply(*event)
+            if time.monotonic() >= next_flush:
+                self.flush()
+                next_flush = time.monotonic() + self.interval
+
+    def _apply(self, url, word_count, word_counts):
+        self.pages += 1
+        if word_count > self.longest_page[1]:
+            self.longest_page = (url, word_count)
+        if word_counts:
+            self.words.update(word_counts)
+        parsed = urlparse(url)
+        if parsed.netloc.endswith("uci.edu"):
+            # Keep the scheme of the first page seen on the subdomain.
+            entry = self.subdomains.setdefault(parsed.netloc, [parsed.scheme, 0])
+            entry[1] += 1
+
+    def flush(self):
+        self._write(
+            "unique_pages.txt", f"Total Unique Pages: {self.pages}\n")
+        url, word_count = self.longest_page
+        self._write(
+            "longest_page.txt",
+            f"Longest Page URL: {url}\nWord Count: {word_count}\n")
+        self._write(
+            "common_words.txt", "Most Common Words:\n" + "".join(
+                f"{word}: {count}\n" for word, count in self.words.most_common()))
+        self._write("subdomains.txt", "".join(
+            f"{scheme}://{netloc}, {count}\n"
+            for netloc, (scheme, count) in sorted(self.subdomains.items())))
+
+    def _write(self, name, text):
+        path = os.path.join(self.directory, name)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as file:
+            file.write(text)
+        os.replace(tmp_path, path)
@@ -1,14 +1,227 @@
+import io
 import pickle
+import struct
+
+from hashlib import blake2b
+
+import cbor
+
+# The classes a pickled requests Response is made of, under their Python 3
+# and Python 2 names. Unpickling anything else is refused, since the pickle
+# comes over the network.
+_SAFE_CLASSES = frozenset([
+    ("requests.models", "Response"),
+    ("requests.models", "PreparedRequest"),
+    ("requests.structures", "CaseInsensitiveDict"),
+    ("requests.cookies", "RequestsCookieJar"),
+    ("http.cookiejar", "Cookie"),
+    ("http.cookiejar", "DefaultCookiePolicy"),
+    ("cookielib", "Cookie"),
+    ("cookielib", "DefaultCookiePolicy"),
+    ("collections", "OrderedDict"),
+    ("datetime", "timedelta"),
+    ("datetime", "datetime"),
+    ("copyreg", "_reconstructor"),
+    ("copy_reg", "_reconstructor"),
+    ("builtins", "object"),
+    ("__builtin__", "object"),
+    # Bytes in Python 3 pickles of protocol 2 and lower
+    ("_codecs", "encode"),
+])
+
+
+_resolved_classes = dict()
+
+
+def _resolve(module, name):
+    # Resolved once through the stock find_class, which also maps the
+    # Python 2 names, so unpickling pays for a dict lookup only.
+    if not _resolved_classes:
+        unpickler = pickle.Unpickler(io.BytesIO(b""))
+        for safe_module, safe_name in _SAFE_CLASSES:
+            _resolved_classes[safe_module, safe_name] = unpickler.find_class(
+                safe_module, safe_name)
+    return _resolved_classes[module, name]
+
+
+class _ResponseUnpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        try:
+            return _resolve(module, name)
+        except KeyError:
+            raise pickle.UnpicklingError(
+                f"Refusing to unpickle {module}.{name}") from None
+
+
+class _ViewReader(object):
+    # A file over a memoryview. io.BytesIO would copy the whole view first.
+    def __init__(self, view):
+        self.view = memoryview(view)
+        self.offset = 0
+
+    def read(self, size=-1):
+        start = self.offset
+        end = len(self.view) if size < 0 else min(start + size, len(self.view))
+        self.offset = end
+        return bytes(self.view[start:end])
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def readline(self):
+        start = self.offset
+        end = len(self.view)
+        for index in range(start, end):
+            if self.view[index] == 10:
+                end = index + 1
+                break
+        self.offset = end
+        return bytes(self.view[start:end])
+
+
+def safe_loads(data):
+    """ Unpickles a requests Response, refusing any other classes. """
+    if isinstance(data, bytes):
+        data = io.BytesIO(data)
+    else:
+        data = _ViewReader(data)
+    return _ResponseUnpickler(data).load()
+
 
 class Response(object):
+    """
+    A download as answered by the cache server.
+
+    The pickled requests Response in `resp_dict["response"]` is only
+    unpickled when `raw_response` is first used, so responses that are
+    skipped on their status never pay for it.
+    """
+    __slots__ = (
+        "url", "status", "error", "_payload", "_raw_response", "_digest")
+
     def __init__(self, resp_dict):
         self.url = resp_dict["url"]
         self.status = resp_dict["status"]
         self.error = resp_dict["error"] if "error" in resp_dict else None
-        try:
-            self.raw_response = (
-                pickle.loads(resp_dict["response"])
-                if "response" in resp_dict else
-                None)
-        except TypeError:
-            self.raw_response = None
+        self._payload = resp_dict.get("response")
+        self._raw_response = None
+        self._digest = None
+
+    @property
+    def raw_response(self):
+        if self._payload is not None:
+            payload, self._payload = self._payload, None
+            try:
+                self._raw_response = safe_loads(payload)
+            except (pickle.UnpicklingError, TypeError, ValueError,
+                    EOFError, AttributeError, ImportError):
+                self._raw_response = None
+        return self._raw_response
+
+    @property
+    def size(self):
+        """
+        Bytes of the response. Before it is unpickled, the size of the pickle,
+        which is the page content plus a few hundred bytes.
+        """
+        if self._payload is not None:
+            return len(self._payload)
+        raw_response = self.raw_response
+        return len(raw_response.content or b"") if raw_response is not None else 0
+
+    @property
+    def content_type(self):
+        """ The lowercase media type of the page, or "" if unknown. """
+        raw_response = self.raw_response
+        if raw_response is None:
+            return ""
+        content_type = raw_response.headers.get("Content-Type") or ""
+        return content_type.split(";", 1)[0].strip().lower()
+
+    @property
+    def content_digest(self):
+        """ A hex digest of the page content, or "" if there is none. """
+        if self._digest is None:
+            raw_response = self.raw_response
+            content = raw_response.content if raw_response is not None else None
+            self._digest = blake2b(
+                content, digest_size=16).hexdigest() if content else ""
+        return self._digest
+
+
+def decode_cache_response(body):
+    """
+    Decodes the cbor map the cache server answers with.
+
+    Byte strings (the pickled response) are returned as memoryview slices
+    of body rather than copies. Maps that are not a flat map of text keys
+    to numbers, text, bytes or simple values are left to the cbor package.
+
+    Args:
+        body (bytes): The HTTP body.
+
+    Returns:
+        dict: The decoded map.
+    """
+    try:
+        return _decode_flat_map(memoryview(body))
+    except (ValueError, IndexError, struct.error):
+        return cbor.loads(bytes(body))
+
+
+def _decode_head(view, offset):
+    # Returns (major type, argument, offset after the head).
+    initial = view[offset]
+    major, info = initial >> 5, initial & 0x1f
+    offset += 1
+    if info < 24:
+        return major, info, offset
+    if info == 24:
+        return major, view[offset], offset + 1
+    if info == 25:
+        return major, struct.unpack_from(">H", view, offset)[0], offset + 2
+    if info == 26:
+        return major, struct.unpack_from(">I", view, offset)[0], offset + 4
+    if info == 27:
+        return major, struct.unpack_from(">Q", view, offset)[0], offset + 8
+    # Indefinite lengths and reserved values
+    raise ValueError("Unsupported cbor item")
+
+
+_SIMPLE_VALUES = {20: False, 21: True, 22: None, 23: None}
+
+
+def _decode_item(view, offset):
+    major, argument, offset = _decode_head(view, offset)
+    if major == 0:
+        return argument, offset
+    if major == 1:
+        return -1 - argument, offset
+    if major in (2, 3):
+        end = offset + argument
+        if end > len(view):
+            raise ValueError("Truncated cbor item")
+        data = view[offset:end]
+        if major == 3:
+            return str(data, "utf-8"), end
+        return data, end
+    if major == 7 and argument in _SIMPLE_VALUES:
+        return _SIMPLE_VALUES[argument], offset
+    raise ValueError("Unsupported cbor item")
+
+
+def _decode_flat_map(view):
+    major, length, offset = _decode_head(view, 0)
+    if major != 5:
+        raise ValueError("Not a cbor map")
+    result = dict()
+    for _ in range(length):
+        key, offset = _decode_item(view, offset)
+        if not isinstance(key, str):
+            raise ValueError("Unsupported cbor key")
+        result[key], offset = _decode_item(view, offset)
+    if offset != len(view):
+        raise ValueError("Trailing data after cbor map")
+    return result
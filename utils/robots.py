@@ -0,0 +1,139 @@
+import re
+
+from html import unescape
+from urllib.parse import urlparse
+
+_TOKEN_RE = re.compile(r"[a-z_-]*")
+_LOC_RE = re.compile(rb"<loc>\s*([^<]+?)\s*</loc>", re.IGNORECASE)
+# Marks the rule stored at a trie node; no path character is None.
+_RULE = None
+
+
+class RobotsRules(object):
+    """
+    The robots.txt rules of one host that apply to our user agent.
+
+    Plain path prefixes are kept in a character trie, so a path is checked
+    in one walk over its characters. The longest matching rule decides, and
+    Allow wins a tie, as in RFC 9309. Rules with "*" or a trailing "$" are
+    rare and are matched as regular expressions after the walk.
+
+    Args:
+        rules (iterable): (allow, path) pairs.
+        crawl_delay (float): Seconds between fetches asked for, or None.
+        sitemaps (iterable): Sitemap urls listed in the file.
+    """
+    def __init__(self, rules=(), crawl_delay=None, sitemaps=()):
+        self.trie = dict()
+        self.patterns = list()
+        self.crawl_delay = crawl_delay
+        self.sitemaps = list(sitemaps)
+        for allow, path in rules:
+            if "*" in path or path.endswith("$"):
+                self._add_pattern(allow, path)
+            else:
+                self._add_prefix(allow, path)
+
+    def _add_prefix(self, allow, path):
+        node = self.trie
+        for char in path:
+            node = node.setdefault(char, dict())
+        # Allow wins over a Disallow of the same path.
+        node[_RULE] = allow or node.get(_RULE, False)
+
+    def _add_pattern(self, allow, path):
+        anchored = path.endswith("$")
+        expression = ".*".join(
+            re.escape(part) for part in path.rstrip("$").split("*"))
+        self.patterns.append(
+            (len(path), allow, re.compile(expression + ("$" if anchored else ""))))
+
+    def allowed(self, url):
+        """ Whether url may be fetched, judged by its path and query. """
+        parsed = urlparse(url)
+        path = parsed.path or "/"
+        if parsed.query:
+            path = f"{path}?{parsed.query}"
+        # Walk the trie, remembering the deepest rule on the way.
+        best_length, allow = 0, True
+        node = self.trie
+        for length, char in enumerate(path, 1):
+            node = node.get(char)
+            if node is None:
+                break
+            if _RULE in node:
+                best_length, allow = length, node[_RULE]
+        for length, pattern_allow, pattern in self.patterns:
+            if (length > best_length or (length == best_length and pattern_allow)) \
+                    and pattern.match(path):
+                best_length, allow = length, pattern_allow
+        return allow
+
+
+ALLOW_ALL = RobotsRules()
+
+
+def parse_robots(text, user_agent):
+    """
+    Parses a robots.txt file.
+
+    The group named by the product token of `user_agent` (its leading
+    letters, "-" and "_") applies, or the "*" group if there is none.
+    Groups of the same name are merged.
+
+    Args:
+        text (str): The robots.txt file.
+        user_agent (str): The user agent of the crawler.
+
+    Returns:
+        RobotsRules: The rules that apply to user_agent.
+    """
+    token = _TOKEN_RE.match(user_agent.lower()).group()
+    groups = dict()
+    sitemaps = list()
+    agents, in_rules = list(), False
+    for line in text.splitlines():
+        key, colon, value = line.split("#", 1)[0].partition(":")
+        if not colon:
+            continue
+        key, value = key.strip().lower(), value.strip()
+        if key == "sitemap":
+            sitemaps.append(value)
+        elif key == "user-agent":
+            if in_rules:
+                agents, in_rules = list(), False
+            agents.append(value.lower())
+            groups.setdefault(value.lower(), ([], []))
+        elif key in ("allow", "disallow", "crawl-delay") and agents:
+            in_rules = True
+            for agent in agents:
+                rules, delays = groups[agent]
+                if key == "crawl-delay":
+                    delays.append(value)
+                elif value:
+                    # An empty Disallow allows everything.
+                    rules.append((key == "allow", value))
+
+    rules, delays = groups.get(token) or groups.get("*", ([], []))
+    crawl_delay = None
+    for delay in delays:
+        try:
+            crawl_delay = float(delay)
+        except ValueError:
+            pass
+    return RobotsRules(rules, crawl_delay, sitemaps)
+
+
+def parse_sitemap(content):
+    """
+    Returns a tuple (urls, is_index) with the <loc> urls of a sitemap, which
+    are other sitemaps when is_index is True.
+
+    Args:
+        content (bytes): The sitemap XML.
+    """
+    is_index = b"<sitemapindex" in content[:1024].lower()
+    urls = [
+        unescape(loc.decode("utf-8", "replace"))
+        for loc in _LOC_RE.findall(content)]
+    return urls, is_index
@@ -0,0 +1,137 @@
+from hashlib import blake2b
+from threading import Lock
+
+DIGEST_SIZE = 16
+_EMPTY = bytes(DIGEST_SIZE)
+
+
+def digest(key):
+    """ Fixed-width binary digest of a url (or url hash) string. """
+    value = blake2b(key.encode("utf-8"), digest_size=DIGEST_SIZE).digest()
+    # The all-zero digest marks an empty slot in the table.
+    return value if value != _EMPTY else b"\x01" + value[1:]
+
+
+class BloomFilter(object):
+    """
+    A fixed-size Bloom filter over digests. It never forgets an added digest,
+    and answers "not present" for most others without touching the table.
+
+    Args:
+        capacity (int): Expected number of items.
+        bits_per_item (int): Filter size per expected item, ~1% false
+            positives at 10.
+    """
+    def __init__(self, capacity, bits_per_item=10):
+        self.size = max(64, capacity * bits_per_item)
+        self.hashes = max(1, round(bits_per_item * 0.69))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        # Double hashing from the two halves of the digest.
+        h1 = int.from_bytes(value[:8], "little")
+        h2 = int.from_bytes(value[8:16], "little") | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hashes)]
+
+    def add(self, value):
+        bits = self.bits
+        for position in self._positions(value):
+            bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        bits = self.bits
+        for position in self._positions(value):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class SeenSet(object):
+    """
+    A compact set of seen urls.
+
+    Stores a 16 byte digest per url in one bytearray used as an open-addressing
+    hash table with linear probing, instead of keeping every url string (or its
+    64 character hex hash) as a Python object. The table doubles and is
+    rehashed whenever it is more than MAX_LOAD full.
+
+    An optional Bloom filter in front answers most `in` checks of unseen urls
+    without probing the table. It is off by default and no set in the crawl
+    turns it on: add probes the table either way, and the filter is sized
+    for `capacity`, so it only pays off for sets mostly queried with `in`
+    whose final size is known up front.
+
+    Args:
+        capacity (int): Initial number of urls to size the table for.
+        bloom (bool): Whether to keep a Bloom filter front tier.
+    """
+    MAX_LOAD = 0.7
+
+    def __init__(self, capacity=1 << 16, bloom=False):
+        slots = 1
+        while slots * self.MAX_LOAD < capacity:
+            slots <<= 1
+        self.lock = Lock()
+        self.count = 0
+        self._allocate(slots)
+        self.bloom = BloomFilter(capacity) if bloom else None
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, key):
+        return self.contains(key)
+
+    def add(self, key):
+        """ Adds key, returning True if it was not in the set before. """
+        value = digest(key)
+        with self.lock:
+            if self.bloom is not None:
+                self.bloom.add(value)
+            index, found = self._probe(value)
+            if found:
+                return False
+            start = index * DIGEST_SIZE
+            self.table[start:start + DIGEST_SIZE] = value
+            self.count += 1
+            if self.count > self.limit:
+                self._grow()
+            return True
+
+    def contains(self, key):
+        value = digest(key)
+        with self.lock:
+            if self.bloom is not None and value not in self.bloom:
+                return False
+            return self._probe(value)[1]
+
+    def _allocate(self, slots):
+        self.slots = slots
+        self.mask = slots - 1
+        self.limit = int(slots * self.MAX_LOAD)
+        self.table = bytearray(slots * DIGEST_SIZE)
+        self.view = memoryview(self.table)
+
+    def _probe(self, value):
+        # Returns (slot, True) if value is stored, else (empty slot, False).
+        view, mask = self.view, self.mask
+        index = int.from_bytes(value[:8], "little") & mask
+        while True:
+            start = index * DIGEST_SIZE
+            stored = view[start:start + DIGEST_SIZE]
+            if stored == value:
+                return index, True
+            if stored == _EMPTY:
+                return index, False
+            index = (index + 1) & mask
+
+    def _grow(self):
+        old = self.table
+        self.view.release()
+        self._allocate(self.slots * 2)
+        for start in range(0, len(old), DIGEST_SIZE):
+            value = old[start:start + DIGEST_SIZE]
+            if value != _EMPTY:
+                index = self._probe(value)[0] * DIGEST_SIZE
+                self.table[index:index + DIGEST_SIZE] = value
@@ -0,0 +1,120 @@
+from array import array
+from itertools import combinations
+
+try:
+    _popcount = int.bit_count
+except AttributeError:
+    # Python < 3.10
+    def _popcount(value):
+        return bin(value).count("1")
+
+# Multiplier of Fibonacci hashing, which spreads the masked keys (whose low
+# bits are often all zero) over the slots.
+_GOLDEN = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+
+
+class SimhashIndex(object):
+    """
+    Finds stored SimHash fingerprints within a Hamming distance of a query
+    without comparing against every stored fingerprint.
+
+    The fingerprint is cut into `blocks` blocks. Two fingerprints differing
+    in at most max_distance bits agree exactly on at least
+    blocks - max_distance of them (pigeonhole), so there is one table for
+    every such combination of blocks, keyed by their bits. A query is a
+    lookup per table and only compares against fingerprints with the same
+    key.
+
+    Fingerprints are stored once, in an array of 64 bit integers. Each table
+    is an open-addressing hash table with linear probing in an array of 32
+    bit positions in that array, at most MAX_LOAD full, so a fingerprint
+    costs 8 bytes plus 6 to 11 bytes per table, instead of a dict entry and
+    an int object per table.
+
+    With the default of max_distance + 2 blocks, a 64 bit fingerprint and a
+    distance of 4 give 15 tables keyed by ~21 bits, which keeps few
+    fingerprints per key up to about a million fingerprints.
+    max_distance + 1 blocks needs only 5 tables (less memory) but 13 bit
+    keys, so each query compares against more fingerprints sooner.
+
+    Args:
+        max_distance (int): Largest Hamming distance counted as near-duplicate.
+        bits (int): Width of the fingerprints, at most 64.
+        blocks (int): Number of blocks the fingerprint is cut into.
+    """
+    MAX_LOAD = 0.75
+
+    def __init__(self, max_distance=4, bits=64, blocks=None):
+        self.max_distance = max_distance
+        if blocks is None:
+            blocks = max_distance + 2
+        width, extra = divmod(bits, blocks)
+        masks = list()
+        shift = 0
+        for i in range(blocks):
+            size = width + (1 if i < extra else 0)
+            masks.append(((1 << size) - 1) << shift)
+            shift += size
+        # A table's key is the fingerprint masked down to its blocks.
+        self.keys = [
+            sum(masks[i] for i in chosen)
+            for chosen in combinations(range(blocks), blocks - max_distance)]
+        self.values = array("Q")
+        self._allocate(1 << 10)
+
+    def __len__(self):
+        return len(self.values)
+
+    def _allocate(self, slots):
+        # Empty tables of `slots` slots; a slot holds position + 1, 0 if free.
+        self.slot_bits = slots.bit_length() - 1
+        self.slot_mask = slots - 1
+        self.limit = int(slots * self.MAX_LOAD)
+        self.tables = [array("I", bytes(4 * slots)) for _ in self.keys]
+
+    def _slot(self, key):
+        return ((key * _GOLDEN) & _MASK64) >> (64 - self.slot_bits)
+
+    def _insert(self, table, key, entry):
+        slot_mask = self.slot_mask
+        slot = self._slot(key)
+        while table[slot]:
+            slot = (slot + 1) & slot_mask
+        table[slot] = entry
+
+    def add(self, value):
+        self.values.append(value)
+        entry = len(self.values)
+        if entry > self.limit:
+            self._grow()
+            return
+        for table, mask in zip(self.tables, self.keys):
+            self._insert(table, value & mask, entry)
+
+    def _grow(self):
+        # Doubles every table and inserts every fingerprint again.
+        self._allocate((self.slot_mask + 1) * 2)
+        for table, mask in zip(self.tables, self.keys):
+            for entry, value in enumerate(self.values, 1):
+                self._insert(table, value & mask, entry)
+
+    def find(self, value):
+        """ Returns a stored fingerprint near value, or None. """
+        max_distance, slot_mask = self.max_distance, self.slot_mask
+        values = self.values
+        for table, mask in zip(self.tables, self.keys):
+            key = value & mask
+            slot = self._slot(key)
+            entry = table[slot]
+            while entry:
+                candidate = values[entry - 1]
+                if (candidate & mask == key
+                        and _popcount(candidate ^ value) <= max_distance):
+                    return candidate
+                slot = (slot + 1) & slot_mask
+                entry = table[slot]
+        return None
+
+    def __contains__(self, value):
+        return self.find(value) is not None
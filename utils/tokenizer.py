@@ -0,0 +1,140 @@
+import re
+from collections import Counter
+from hashlib import blake2b
+
+_WORD_RE = re.compile(r"\b\w+\b")
+
+# Words too common to say anything about a page
+STOPWORDS = frozenset([
+    "a", "about", "above", "after", "again", "against", "all", "am", "an", "and", "any",
+    "are", "aren't", "as", "at", "be", "because", "been", "before", "being", "below",
+    "between", "both", "but", "by", "can't", "cannot", "could", "couldn't", "did", "didn't",
+    "do", "does", "doesn't", "doing", "don't", "down", "during", "each", "few", "for", "from",
+    "further", "had", "hadn't", "has", "hasn't", "have", "haven't", "having", "he", "he'd",
+    "he'll", "he's", "her", "here", "here's", "hers", "herself", "him", "himself", "his", "how",
+    "how's", "i", "i'd", "i'll", "i'm", "i've", "if", "in", "into", "is", "isn't", "it", "it's",
+    "its", "itself", "let's", "me", "more", "most", "mustn't", "my", "myself", "no", "nor",
+    "not", "of", "off", "on", "once", "only", "or", "other", "ought", "our", "ours", "ourselves",
+    "out", "over", "own", "same", "shan't", "she", "she'd", "she'll", "she's", "should",
+    "shouldn't", "so", "some", "such", "than", "that", "that's", "the", "their", "theirs", "them",
+    "themselves", "then", "there", "there's", "these", "they", "they'd", "they'll", "they're",
+    "they've", "this", "those", "through", "to", "too", "under", "until", "up", "very", "was",
+    "wasn't", "we", "we'd", "we'll", "we're", "we've", "were", "weren't", "what", "what's",
+    "when", "when's", "where", "where's", "which", "while", "who", "who's", "whom", "why",
+    "why's", "with", "won't", "would", "wouldn't", "you", "you'd", "you'll", "you're", "you've",
+    "your", "yours", "yourself", "yourselves"])
+
+# Bit i of a byte spread to lane i of a big integer. Adding spread hashes
+# counts every bit position at once, one lane per position.
+_LANE = 32
+_LANE_MASK = (1 << _LANE) - 1
+_SPREAD = [
+    sum(1 << (_LANE * bit) for bit in range(8) if value >> bit & 1)
+    for value in range(256)]
+
+_hashes = dict()
+_HASH_CACHE_SIZE = 100000
+
+
+def _feature_hash(feature, byte_count):
+    # blake2b rather than hash(), which differs between parser processes.
+    key = (feature, byte_count)
+    value = _hashes.get(key)
+    if value is None:
+        if len(_hashes) >= _HASH_CACHE_SIZE:
+            _hashes.clear()
+        value = _hashes[key] = int.from_bytes(
+            blake2b(feature.encode("utf-8"), digest_size=byte_count).digest(),
+            "little")
+    return value
+
+
+def simhash(features, bits=64):
+    """
+    Computes the SimHash fingerprint of weighted features.
+
+    Args:
+        features (dict): Feature strings mapped to integer weights.
+        bits (int): Width of the fingerprint, a multiple of 8.
+
+    Returns:
+        int: The fingerprint.
+    """
+    byte_count = bits // 8
+    sums = [0] * byte_count
+    total = 0
+    for feature, weight in features.items():
+        value = _feature_hash(feature, byte_count)
+        total += weight
+        for i in range(byte_count):
+            sums[i] += weight * _SPREAD[value & 255]
+            value >>= 8
+
+    # A bit is set when more than half of the weight had it set.
+    fingerprint = 0
+    for i, lanes in enumerate(sums):
+        for bit in range(8):
+            if 2 * ((lanes >> (_LANE * bit)) & _LANE_MASK) > total:
+                fingerprint |= 1 << (8 * i + bit)
+    return fingerprint
+
+
+class TextStats(object):
+    """
+    Word statistics of a page, built from its text in a single pass.
+
+    Text is fed in chunks, each tokenized once into a word counter; every
+    statistic is then derived from the distinct words rather than from the
+    token stream again.
+
+    Args:
+        stopwords (frozenset): Words left out of `word_counts`.
+        min_length (int): Shortest word counted by `word_counts` and
+            `content_word_count`.
+    """
+    def __init__(self, stopwords=STOPWORDS, min_length=3):
+        self.stopwords = stopwords
+        self.min_length = min_length
+        self.word_count = 0
+        self.content_counts = Counter()
+        self.boilerplate_counts = Counter()
+
+    def feed(self, text, content=True):
+        """
+        Tokenizes one chunk of text.
+
+        Args:
+            text (str): The text.
+            content (bool): False for navigation, header, footer and aside
+                text, which only counts towards the whole page.
+        """
+        words = _WORD_RE.findall(text.lower())
+        self.word_count += len(words)
+        if content:
+            self.content_counts.update(words)
+        else:
+            self.boilerplate_counts.update(words)
+
+    @property
+    def counts(self):
+        """ Counts of every word on the page. """
+        return self.content_counts + self.boilerplate_counts
+
+    @property
+    def content_word_count(self):
+        """ Number of content words of `min_length` or more ASCII letters. """
+        min_length = self.min_length
+        return sum(
+            count for word, count in self.content_counts.items()
+            if len(word) >= min_length and word.isascii() and word.isalpha())
+
+    def word_counts(self):
+        """ Counts of the words of `min_length` or more that are not stopwords. """
+        min_length, stopwords = self.min_length, self.stopwords
+        return Counter({
+            word: count for word, count in self.counts.items()
+            if len(word) >= min_length and word not in stopwords})
+
+    def fingerprint(self, bits=64):
+        """ SimHash of the page, with every word weighted by its count. """
+        return simhash(self.counts, bits)
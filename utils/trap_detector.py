@@ -0,0 +1,160 @@
+import re
+import sys
+import time
+
+from array import array
+from urllib.parse import urlparse
+
+_DIGITS_RE = re.compile(r"\d+")
+# Dates in paths or queries, e.g. /2024/05/ or 2024-05-17, as calendars use.
+_DATE_RE = re.compile(r"(19|20)\d\d[-/_]?(0[1-9]|1[0-2])")
+_CALENDAR_WORDS = ("calendar", "ical", "event", "tribe", "date=", "day=")
+
+
+class CountMinSketch(object):
+    """
+    Approximate counts of arbitrary keys in fixed memory.
+
+    Counts are never underestimated. Conservative update (only the smallest
+    counters are raised) keeps overestimates from hash collisions low.
+    `decay` halves every counter, so old counts fade away.
+
+    Args:
+        width_bits (int): log2 of the counters per row.
+        depth (int): Number of rows; width_bits * depth is at most 64.
+    """
+    def __init__(self, width_bits=16, depth=4):
+        self.width_bits = width_bits
+        self.mask = (1 << width_bits) - 1
+        self.depth = depth
+        self.rows = [array("I", bytes(4 << width_bits)) for _ in range(depth)]
+        # Clears the top bit of every counter of a row read as one integer
+        itemsize = self.rows[0].itemsize
+        lane = ((1 << (8 * itemsize - 1)) - 1).to_bytes(itemsize, sys.byteorder)
+        self.halve_mask = int.from_bytes(lane * (1 << width_bits), sys.byteorder)
+
+    def _indexes(self, key):
+        # One hash() call gives width_bits of index for each row.
+        value = hash(key)
+        mask, width_bits = self.mask, self.width_bits
+        return [(value >> (width_bits * i)) & mask for i in range(self.depth)]
+
+    def add(self, key):
+        """ Counts key once more and returns its estimated count. """
+        indexes = self._indexes(key)
+        rows = self.rows
+        estimate = min(row[i] for row, i in zip(rows, indexes)) + 1
+        for row, i in zip(rows, indexes):
+            if row[i] < estimate:
+                row[i] = estimate
+        return estimate
+
+    def estimate(self, key):
+        return min(row[i] for row, i in zip(self.rows, self._indexes(key)))
+
+    def decay(self):
+        # Halves a whole row at once, read as one integer and shifted right
+        # by a bit, masking off the bit every counter gets from the next one.
+        # Looping over the counters in Python takes about a second.
+        for row in self.rows:
+            halved = (int.from_bytes(row, sys.byteorder) >> 1) & self.halve_mask
+            memoryview(row).cast("B")[:] = halved.to_bytes(
+                len(row) * row.itemsize, sys.byteorder)
+
+
+class TrapDetector(object):
+    """
+    Flags crawler traps in fixed memory with O(1) work per url (O(path length)
+    to normalize it).
+
+    A url is a trap when:
+      * its path repeats one segment too often (/a/b/a/b/a/b) or is too deep,
+      * its path and query, with digit runs replaced, was seen
+        `pattern_limit` times,
+      * its path with the same query parameter names was seen with
+        `query_limit` different values, or `calendar_limit` for urls that look
+        like calendar pages,
+      * its host used up its budget of `host_budget` parametrized urls (urls
+        with digits in the path or a query string).
+
+    Every count lives in a count-min sketch that is halved every
+    `half_life` seconds, so paths that were popular early are not blocked
+    forever.
+    """
+    def __init__(self, pattern_limit=10, query_limit=50, calendar_limit=10,
+                 host_budget=2000, max_depth=12, max_segment_repeats=3,
+                 half_life=3600.0, width_bits=16, depth=4):
+        self.pattern_limit = pattern_limit
+        self.query_limit = query_limit
+        self.calendar_limit = calendar_limit
+        self.host_budget = host_budget
+        self.max_depth = max_depth
+        self.max_segment_repeats = max_segment_repeats
+        self.half_life = half_life
+        self.patterns = CountMinSketch(width_bits, depth)
+        self.queries = CountMinSketch(width_bits, depth)
+        self.hosts = CountMinSketch(width_bits, depth)
+        self.last_decay = time.monotonic()
+
+    def is_trap(self, url):
+        """ Counts url and returns a short reason if it is a trap, else None. """
+        now = time.monotonic()
+        if now - self.last_decay >= self.half_life:
+            self.last_decay = now
+            for sketch in (self.patterns, self.queries, self.hosts):
+                sketch.decay()
+
+        parsed, segments, pattern, shape, limit = self._keys(url)
+        if len(segments) > self.max_depth:
+            return "path too deep"
+        if len(segments) > len(set(segments)):
+            repeats = max(segments.count(s) for s in set(segments))
+            if repeats >= self.max_segment_repeats:
+                return "repeated path segments"
+
+        if self.patterns.add(pattern) >= self.pattern_limit:
+            return f"repeated pattern {pattern}"
+
+        if shape and self.queries.add(shape) >= limit:
+            return f"query explosion {shape}"
+
+        # Digits in the path or a query string
+        if pattern != f"{parsed.netloc}{parsed.path}":
+            if self.hosts.add(parsed.netloc) > self.host_budget:
+                return f"host budget used up for {parsed.netloc}"
+        return None
+
+    def likelihood(self, url):
+        """
+        How close url is to being flagged as a trap, from 0 to 1, judged by
+        what was counted so far. Unlike is_trap, url itself is not counted.
+        """
+        _, segments, pattern, shape, limit = self._keys(url)
+        score = max(
+            len(segments) / self.max_depth,
+            self.patterns.estimate(pattern) / self.pattern_limit)
+        if shape:
+            score = max(score, self.queries.estimate(shape) / limit)
+        return min(score, 1.0)
+
+    def _keys(self, url):
+        # Returns (parsed url, path segments, pattern key, query shape key or None,
+        # query limit) of url.
+        parsed = urlparse(url)
+        path = parsed.path
+        segments = [segment for segment in path.split("/") if segment]
+        query = parsed.query
+        target = f"{path}?{query}" if query else path
+        pattern = f"{parsed.netloc}{_DIGITS_RE.sub('[digit]', target)}"
+        if not query:
+            return parsed, segments, pattern, None, self.query_limit
+        names = sorted(
+            part.partition("=")[0] for part in query.split("&") if part)
+        shape = f"{parsed.netloc}{path}?{'&'.join(names)}"
+        lowered = target.lower()
+        limit = (
+            self.calendar_limit
+            if _DATE_RE.search(lowered) or any(
+                word in lowered for word in _CALENDAR_WORDS)
+            else self.query_limit)
+        return parsed, segments, pattern, shape, limit
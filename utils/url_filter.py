@@ -0,0 +1,70 @@
+from urllib.parse import urlparse
+
+
+class UrlFilter(object):
+    """
+    Decides which urls may be crawled, with every rule prepared once.
+
+    Hosts are matched by domain suffix and the decision is cached per host,
+    and file extensions are looked up in a frozenset by the text after the
+    last dot of the path, instead of matching regular expressions per url.
+
+    Args:
+        domains (iterable): Allowed domains; their subdomains are allowed too.
+        path_prefixes (dict): Hosts only allowed under one of the given paths.
+        extensions (iterable): Lowercase file extensions that are never crawled.
+        schemes (iterable): Allowed url schemes.
+        host_cache_size (int): Host decisions remembered before the cache resets.
+    """
+    def __init__(self, domains, path_prefixes=None, extensions=(),
+                 schemes=("http", "https"), host_cache_size=100000):
+        self.domains = tuple(domains)
+        self.suffixes = tuple(f".{domain}" for domain in self.domains)
+        self.path_prefixes = {
+            host: tuple(prefixes)
+            for host, prefixes in (path_prefixes or {}).items()}
+        self.extensions = frozenset(extensions)
+        self.schemes = frozenset(schemes)
+        self.host_cache_size = host_cache_size
+        self.hosts = dict()
+
+    def __call__(self, url):
+        return self.is_valid(url)
+
+    def is_valid(self, url):
+        try:
+            parsed = urlparse(url)
+        except ValueError:
+            # Malformed urls, e.g. an unclosed "[" in the host
+            return False
+        if parsed.scheme not in self.schemes:
+            return False
+
+        allowed = self.hosts.get(parsed.netloc)
+        if allowed is None:
+            allowed = self._check_host(parsed.netloc)
+        if allowed is not True:
+            # The host is only allowed under some paths.
+            if not allowed or not parsed.path.startswith(allowed):
+                return False
+
+        _, dot, extension = parsed.path.rpartition(".")
+        return not (dot and extension.lower() in self.extensions)
+
+    def filter(self, urls):
+        """ Returns the urls of a page that may be crawled, in order. """
+        is_valid = self.is_valid
+        return [url for url in urls if is_valid(url)]
+
+    def _check_host(self, netloc):
+        # True for allowed hosts, a tuple of path prefixes for hosts allowed
+        # under those paths, and False otherwise.
+        if netloc in self.path_prefixes:
+            allowed = self.path_prefixes[netloc]
+        else:
+            host = netloc.lower()
+            allowed = host in self.domains or host.endswith(self.suffixes)
+        if len(self.hosts) >= self.host_cache_size:
+            self.hosts.clear()
+        self.hosts[netloc] = allowed
+        return allowed